@@ -4,20 +4,28 @@
 
 import os
 import sys
+import queue
 import logging
 from collections.abc import Iterator
 from typing import TextIO
 
-LOG_FMT = '%(asctime)s %(levelname)-8s %(name)s: %(message)s'
-logger = logging.getLogger('HamCC')
-logging.basicConfig(filename='./hamcc.log', filemode='w', format=LOG_FMT,
-                    level=logging.INFO)
-
 from adif_file import adi
 from adif_file import __version_str__ as __version_adif_file__
 
 from . import __proj_name__, __version_str__, __author_name__, __copyright__
 from .hamcc import CassiopeiaConsole
+from .adi_index import LogIndex
+from .adi_writer import ADIWriter, SYNC_POLICIES, serialize_record
+from .scp import ScpIndex
+from .contest import DUPE_RULES, dupe_start_date
+from .history import call_history
+from .dxcc import CtyIndex
+from .bandplan import validate_records
+from .locator import fill_distances
+from .pipeline import QUEUE_SIZE, GROUP_SIZE, END, Stage, Reader, drain
+
+LOG_FMT = '%(asctime)s %(levelname)-8s %(name)s: %(message)s'
+logger = logging.getLogger('HamCC')
 
 
 def qso_iterator(qso_stream: TextIO) -> Iterator:
@@ -31,23 +39,92 @@ def qso_iterator(qso_stream: TextIO) -> Iterator:
             yield line
 
 
+def log_result(res: str, seq: str = ''):
+    """Log a result of the evaluation by its kind
+    :param res: the result
+    :param seq: the evaluated sequence (results of a sequence are only logged if they are warnings or errors)"""
+
+    msg = f'{res} for "{seq}"' if seq else res
+    if res.startswith('Warning:'):
+        logger.warning(msg)
+    elif res.startswith('Error:'):
+        logger.error(msg)
+    elif res and not seq:
+        logger.info(msg)
+
+
+def evaluate_qso(cc: CassiopeiaConsole, qso: str | list[str]):
+    """Evaluate and finalise a QSO given as line or as list of sequences
+    :param cc: the console
+    :param qso: the QSO"""
+
+    logger.info(f'Processing QSO: {qso}')
+    if type(qso) is str:
+        results = cc.evaluate_line(qso.strip() + ' ')
+    else:
+        results = [(val, cc.evaluate(val)) for val in qso]
+    for seq, res in results:
+        log_result(res, seq)
+    log_result(cc.finalize_qso())
+
+
+def start_writer_stages(writer: ADIWriter, batch_time: float) -> tuple[queue.Queue, tuple[Stage, ...]]:
+    """Start the threads serializing and writing groups of QSOs
+    :param writer: the writer
+    :param batch_time: the maximum time in seconds to hold QSOs before writing
+    :return: tuple of the queue for the groups of QSOs and the stages"""
+
+    records_q, texts_q = queue.Queue(QUEUE_SIZE), queue.Queue(QUEUE_SIZE)
+    stages = (
+        Stage('serializer', lambda qs: [(q, serialize_record(q)) for q in qs], records_q, texts_q),
+        Stage('writer', lambda rs: [writer.write(q, t) for q, t in rs], texts_q,
+              idle=writer.poll, timeout=batch_time if batch_time > 0 else None),
+    )
+    for s in stages:
+        s.start()
+    return records_q, stages
+
+
+def stop_writer_stages(records_q: queue.Queue, stages: tuple[Stage, ...],
+                       pending: list[dict[str, str]]) -> Exception | None:
+    """Pass the remaining QSOs to the stages and wait until they are written
+    :param records_q: the queue for the groups of QSOs
+    :param stages: the stages
+    :param pending: the QSOs not passed to the stages yet
+    :return: the first error of a stage or None"""
+
+    if pending:
+        records_q.put(pending)
+    records_q.put(END)
+    for s in stages:
+        s.join()
+    return next((s.error for s in stages if s.error), None)
+
+
 def process_qsos(qsos: list[list[str]] | TextIO, file: str,
-                 own_call: str, own_loc: str, own_name: str, append: bool = False,  # noqa: C901
-                 contest_id: str = '', qso_number: int = 1):
+                 own_call: str, own_loc: str, own_name: str, append: bool = False,
+                 contest_id: str = '', qso_number: int = 1,
+                 batch_size: int = 1, batch_time: float = 0.0, sync: str = 'flush', scp: ScpIndex = None,
+                 dupe_rule: str = 'band-mode', history_file: str = None, cty: CtyIndex = None):
     """Process a list of text input from stdin or commandline as it was typed in console"""
 
     adi_f = None
+    writer = None
+    stages = ()
+    pending = []  # QSOs are passed on in groups while more input is waiting
+    index = LogIndex(file, dupe_start_date())
     try:
         fmode = 'a' if append else 'w'
         fexists = os.path.isfile(file)
 
         last_qso = {}
         if fexists and append:
-            logger.info('Loading last QSO...')
-            doc = adi.load(file)
-            last_qso = doc['RECORDS'][-1] if doc['RECORDS'] else {}
+            logger.info('Loading last QSO and logged event QSOs...')
+            index.refresh()
+            last_qso = index.last_qso
 
         adi_f = open(file, fmode)
+        writer = ADIWriter(adi_f, serialize_record, batch_size, batch_time, sync, index.add_records)
 
         if not append or not fexists:
             logger.info('Initialising ADIF file...')
@@ -57,60 +134,62 @@ def process_qsos(qsos: list[list[str]] | TextIO, file: str,
                     'PROGRAMVERSION': __version_str__,
                 }}
 
-            adi_f.write(adi.dumps(adi_header, comment='ADIF export by hamcc'))
-            adi_f.flush()
+            writer.write_text(adi.dumps(adi_header, comment='ADIF export by hamcc'))
+            index.reset()
             logger.info('...done')
 
-        cc = CassiopeiaConsole(own_call, own_loc, own_name, contest_id, qso_number, last_qso)
-        qsos = qsos if type(qsos) is list else qso_iterator(qsos)
-        for qso in qsos:
-            if type(qso) is str:
-                qso = qso.strip().split(' ')
-                logger.info(f'Processing QSO: {qso}')
-                for chunk in qso:
-                    for char in chunk:
-                        cc.append_char(char)
-                    res = cc.append_char(' ')
-                    if res:
-                        if res.startswith('Warning:'):
-                            logger.warning(f'{res} for "{chunk}"')
-                        elif res.startswith('Error:'):
-                            logger.error(f'{res} for "{chunk}"')
-            else:
-                logger.info(f'Processing QSO: {qso}')
-                for val in qso:
-                    res = cc.evaluate(val)
-                    if res:
-                        if res.startswith('Warning:'):
-                            logger.warning(f'{res} for "{val}"')
-                        elif res.startswith('Error:'):
-                            logger.error(f'{res} for "{val}"')
-
-            res = cc.finalize_qso()
-            if res:
-                if res.startswith('Warning:'):
-                    logger.warning(res)
-                elif res.startswith('Error:'):
-                    logger.error(res)
-                else:
-                    logger.info(res)
-
-            while cc.has_qsos():
+        cc = CassiopeiaConsole(own_call, own_loc, own_name, contest_id, qso_number, last_qso, scp=scp,
+                               dupe_rule=dupe_rule, history=call_history(history_file, index), cty=cty)
+        cc.add_logged(index.events)
+
+        # Read, serialize and write in own threads to overlap I/O with the evaluation
+        input_q = queue.Queue(QUEUE_SIZE)
+        reader = Reader(qsos if type(qsos) is list else qso_iterator(qsos), input_q)
+        reader.start()
+        records_q, stages = start_writer_stages(writer, batch_time)
+
+        for qso in drain(input_q):
+            evaluate_qso(cc, qso)
+            if cc.has_qsos():
                 logger.info(f'Saving {len(cc.qsos)} QSO(s)...')
-                adi_f.write('\n\n' + adi.dumps({'RECORDS': [cc.pop_qso()]}))
-                adi_f.flush()
+            pending.extend(cc.drain_qsos())
+            if pending and (input_q.empty() or len(pending) >= GROUP_SIZE):
+                records_q.put(pending)
+                pending = []
+
+            failed = next((s.error for s in stages if s.error), None)
+            if failed:
+                raise failed
+        if reader.error:
+            raise reader.error
         logger.info('...done')
     except KeyboardInterrupt:
         logger.info('Received keyboard interrupt')
     finally:
-        if adi_f:
-            adi_f.close()
-            logger.info('Closed ADIF file')
+        failed = stop_writer_stages(records_q, stages, pending) if stages else None  # Write the evaluated QSOs
+        try:
+            if writer:
+                writer.close()
+                logger.info(f'{writer.committed} QSO(s) written')
+        except Exception as exc:
+            if not failed:
+                raise
+            logger.error(f'Could not close the ADIF file after a failed stage: {exc}')
+        finally:
+            if adi_f:
+                adi_f.close()
+                logger.info('Closed ADIF file')
+            index.close()
+        if failed:
+            raise failed  # Not hidden by errors on closing
 
 
 def main():
     import argparse
 
+    logging.basicConfig(filename='./hamcc.log', filemode='w', format=LOG_FMT,
+                        level=logging.INFO)
+
     parser = argparse.ArgumentParser(description='Log Ham Radio QSOs via console',
                                      formatter_class=argparse.RawDescriptionHelpFormatter,
                                      epilog=f'Author: {__author_name__}\n{__copyright__}')
@@ -125,6 +204,10 @@ def main():
                         help='a QSO string to import instead of running the console (argument can be used repeatedly per QSO)')
     parser.add_argument('--stdin', dest='stdin', action='store_true',
                         help='read QSO strings from STDIN instead of running the console')
+    parser.add_argument('--check', dest='check', metavar='QSO_FILE',
+                        help='check a file of QSO strings (one per line) for errors and warnings, nothing is written')
+    parser.add_argument('--jobs', dest='jobs', type=int, default=None,
+                        help='the number of processes to use with --check (default: number of CPUs)')
     parser.add_argument('-c', '--call', dest='own_call', default='',
                         help='your callsign')
     parser.add_argument('-l', '--locator', dest='own_loc', default='',
@@ -141,6 +224,20 @@ def main():
                         help='load stored QSOs to edit them (creates backup and opens a new file)')
     parser.add_argument('-x', '--overwrite', dest='overwrite', action='store_true',
                         help='overwriting the file instead of appending the QSOs')
+    parser.add_argument('--scp', dest='scp', metavar='SCP_FILE',
+                        help='a Super Check Partial file (e.g. MASTER.SCP) to look up known calls')
+    parser.add_argument('--history', dest='history', metavar='HISTORY_FILE',
+                        help='a call history file (CSV e.g. from N1MM+) to fill in name, locator, QTH and exchange')
+    parser.add_argument('--cty', dest='cty', metavar='CTY_FILE',
+                        help='a country file (cty.dat or cty.csv) to add DXCC entity, continent and zones to the QSOs')
+    parser.add_argument('--dupe-rule', dest='dupe_rule', choices=DUPE_RULES, default='band-mode',
+                        help='the fields beside the call a QSO is a dupe on within an event (default: band-mode)')
+    parser.add_argument('--batch-size', dest='batch_size', type=int, default=1,
+                        help='the number of QSOs written to the file at once (default: 1)')
+    parser.add_argument('--batch-time', dest='batch_time', type=float, default=0.0,
+                        help='the maximum time in seconds to hold QSOs before writing (default: 0 = no limit)')
+    parser.add_argument('--sync', dest='sync', choices=SYNC_POLICIES, default='flush',
+                        help='make written QSOs durable by flushing the file or syncing to disk (default: flush)')
     parser.add_argument('--log-level', dest='log_level', choices=['DEBUG', 'INFO', 'WARNING'],
                         default='INFO',
                         help='set level for messages')
@@ -151,6 +248,17 @@ def main():
         logger.setLevel(args.log_level)
         logging.getLogger('hamcc').setLevel(args.log_level)
 
+    if args.check:
+        from .check import check_file
+        messages = check_file(args.check, args.own_call, args.own_loc, args.own_name, args.event, args.exchange,
+                              args.dupe_rule, args.scp, args.cty, args.jobs)
+        errors = 0
+        for line_no, seq, res in messages:
+            print(f'{args.check}:{line_no}: {res}' + (f' for "{seq}"' if seq else ''))
+            errors += res.startswith('Error:')
+        print(f'{errors} error(s), {len(messages) - errors} warning(s)')
+        sys.exit(1 if errors else 0)
+
     if args.qso or args.stdin:
         stderr_handler = logging.StreamHandler()
         stderr_handler.setFormatter(logging.Formatter(LOG_FMT))
@@ -158,9 +266,25 @@ def main():
         logger.addHandler(stderr_handler)
         logging.getLogger('hamcc').addHandler(stderr_handler)
 
+    scp = None
+    if args.scp:
+        try:
+            scp = ScpIndex.load(args.scp)
+        except OSError as exc:
+            logger.error(f'Could not load SCP file "{args.scp}": {exc}')
+
+    cty = None
+    if args.cty:
+        try:
+            cty = CtyIndex.load(args.cty)
+        except OSError as exc:
+            logger.error(f'Could not load country file "{args.cty}": {exc}')
+
+    if args.qso or args.stdin:
         qsos = sys.stdin if args.stdin else args.qso
         process_qsos(qsos, args.file, args.own_call, args.own_loc, args.own_name,
-                     not args.overwrite, args.event, args.exchange)
+                     not args.overwrite, args.event, args.exchange,
+                     args.batch_size, args.batch_time, args.sync, scp, args.dupe_rule, args.history, cty)
     else:
         from datetime import datetime
         from ._console_ import run_console
@@ -176,12 +300,19 @@ def main():
                 os.rename(args.file, bak_file)
                 doc = adi.load(bak_file)
                 records = doc['RECORDS']
+                for i, problem in validate_records(records):
+                    logger.warning(f'{problem} for loaded QSO #{i + 1} with {records[i].get("CALL", "")}')
+                logger.info(f'Calculated distance of {fill_distances(records)} loaded QSO(s)')
 
         run_console(args.file, args.own_call, args.own_loc, args.own_name,
-                    args.overwrite, args.event, args.exchange, records, args.online)
+                    args.overwrite, args.event, args.exchange, records, args.online,
+                    args.batch_size, args.batch_time, args.sync, scp, args.dupe_rule, args.history, cty)
 
         logger.info('Stopped console')
 
+    if scp:
+        scp.close()
+
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,4 @@
+__version__ = 'v0.0.0'
+__version_str__ = 'v0.0.0'
+__branch__ = ''
+__unclean__ = False
@@ -22,15 +22,25 @@ from adif_file import adi
 
 from . import __version_str__
 from .hamcc import CassiopeiaConsole, adif_date2iso, adif_time2iso
+from .adi_index import LogIndex
+from .contest import dupe_start_date
+from .history import call_history
+from .adi_writer import ADIWriter, serialize_record
+from .locator import path
+from .journal import QSOJournal
 
 PROMPT = 'QSO> '
 LN_MYDATA = 0
 LN_QSODATA = 1
 LN_INPUT = 2
 LN_INFO = 3
+LN_STATUS = 4
 
+TICK = 1.0  # Interval for timed work in the main loop in s
+PARTIAL_CALLS = 8  # Number of worked before calls shown while typing
 
-def qso2str(qso, pos, cnt) -> tuple[str, str]:
+
+def qso2str(qso, pos, cnt, score=None) -> tuple[str, str]:
     d = adif_date2iso(qso['QSO_DATE'][:8])
     t = adif_time2iso(qso['TIME_ON'][:4])
     if '*' in qso['QSO_DATE']:
@@ -61,12 +71,19 @@ def qso2str(qso, pos, cnt) -> tuple[str, str]:
     if 'CONTEST_ID' in qso and qso["CONTEST_ID"]:
         event_info = (f'[ $ {qso["CONTEST_ID"]} | -N {qso.get("STX", qso["STX_STRING"])} | '
                       f'% {qso.get("SRX", qso.get("SRX_STRING", ""))} ]')
+        if score is not None:
+            event_info += f' [ {score} ]'
     elif 'MY_SIG' in qso:
         event_info = f'[ $ {qso["MY_SIG"]} | -N {qso["MY_SIG_INFO"]} | % {qso.get("SIG_INFO", "")} ]'
 
     loc = ''
     if 'GRIDSQUARE' in qso:
         loc = f'{qso["QTH"]} ({qso["GRIDSQUARE"]})' if 'QTH' in qso else qso["GRIDSQUARE"]
+        try:
+            dist, azimuth = path(qso.get('MY_GRIDSQUARE', ''), qso['GRIDSQUARE'])
+            loc += f' {dist:0.0f} km {azimuth:0.0f} deg'
+        except ValueError:
+            pass
 
     my_loc = ''
     if 'MY_GRIDSQUARE' in qso:
@@ -80,21 +97,77 @@ def qso2str(qso, pos, cnt) -> tuple[str, str]:
     return line1, line2
 
 
-def read_adi(file: str) -> tuple[dict[str, str], dict[str, tuple[str, str]]]:
-    last_qso = {}
-    worked_calls = {}
-
-    doc = adi.load(file)
-    for r in doc['RECORDS']:
-        if all(f in r for f in ('CALL', 'QSO_DATE', 'TIME_ON')):
-            last_qso = r
-            worked_calls[r['CALL']] = (r['QSO_DATE'], r['TIME_ON'])
-    return last_qso, worked_calls
+class Screen:
+    """Keep the lines of the console and repaint only lines which changed since the last render"""
+
+    def __init__(self, stdscr: window):
+        self.__stdscr__ = stdscr
+        self.__lines__: dict[int, str] = {}
+        self.__rendered__: dict[int, str] = {}
+
+    def set_line(self, y: int, text: str):
+        """Set the text of a line, it will be painted on the next render
+        :param y: the line number
+        :param text: the text"""
+
+        self.__lines__[y] = text
+
+    def render(self, y: int, x: int) -> int:
+        """Repaint the changed lines and move the cursor
+        :param y: the line of the cursor
+        :param x: the column of the cursor
+        :return: the number of lines repainted"""
+
+        count = 0
+        for ln, text in self.__lines__.items():
+            if self.__rendered__.get(ln) != text:
+                self.__stdscr__.addstr(ln, 0, text)
+                self.__stdscr__.clrtoeol()
+                self.__rendered__[ln] = text
+                count += 1
+        self.__stdscr__.move(y, x)
+        self.__stdscr__.refresh()
+        return count
+
+    def invalidate(self):
+        """Force a repaint of all lines on the next render e.g. after the screen was cleared"""
+
+        self.__rendered__.clear()
+
+
+def load_cache(cc: CassiopeiaConsole, records: list[dict[str, str]], journal: QSOJournal) -> int:
+    """Cache the QSOs loaded from the ADIF file and the unsaved QSOs restored from the journal
+    Only the restored QSOs are journaled, the loaded QSOs are kept in the backup file.
+    :param cc: the console
+    :param records: the loaded QSOs, the list is cleared
+    :param journal: the journal
+    :return: the number of restored QSOs"""
+
+    if records:
+        logger.info('Loading QSOs...')
+        for r in records:
+            cc.append_qso(r)
+        records.clear()  # The QSOs are held by cc from now on
+        logger.info(f'...done {len(cc.qsos)} QSOs')
+    loaded = len(cc.qsos)
+
+    restored = journal.replay()
+    for r in restored:
+        cc.append_qso(r)
+    if restored:
+        logger.info(f'Restored {len(restored)} unsaved QSO(s) from journal')
+    journal.compact(cc.qsos, loaded)  # The journal starts with the restored QSOs
+    return len(restored)
 
 
 def command_console(stdscr, file, own_call, own_loc, own_name, append=False,  # noqa: C901
-                    contest_id='', qso_number=1, records: list = None, online=False):
+                    contest_id='', qso_number=1, records: list = None, online=False,
+                    batch_size=1, batch_time=0.0, sync='flush', scp=None, dupe_rule='band-mode', history_file=None,
+                    cty=None):
     adi_f = None
+    writer = None
+    index = LogIndex(file, dupe_start_date())
+    journal = QSOJournal(file + '.journal')
     if records is None:
         records = []
 
@@ -106,9 +179,11 @@ def command_console(stdscr, file, own_call, own_loc, own_name, append=False,  #
         worked_calls = []
         if fexists and append:
             logger.info('Loading last QSO and worked before...')
-            last_qso, worked_calls = read_adi(file)
+            index.refresh()
+            last_qso, worked_calls = index.last_qso, index.worked_calls
 
         adi_f = open(file, fmode)
+        writer = ADIWriter(adi_f, serialize_record, batch_size, batch_time, sync, index.add_records)
 
         if not append or not fexists:
             logger.info('Initialising ADIF file...')
@@ -118,118 +193,137 @@ def command_console(stdscr, file, own_call, own_loc, own_name, append=False,  #
                     'PROGRAMVERSION': __version_str__,
                 }}
 
-            adi_f.write(adi.dumps(adi_header, comment='ADIF export by hamcc'))
-            adi_f.flush()
+            writer.write_text(adi.dumps(adi_header, comment='ADIF export by hamcc'))
+            index.reset()
             logger.info('...done')
 
         if records:
             last_qso = records[-1]
 
-        cc = CassiopeiaConsole(own_call, own_loc, own_name, contest_id, qso_number, last_qso, worked_calls, online)
-        if records:
-            logger.info('Loading QSOs...')
-            for r in records:
-                cc.append_qso(r)
-            logger.info(f'...done {len(cc.qsos)} QSOs')
+        cc = CassiopeiaConsole(own_call, own_loc, own_name, contest_id, qso_number, last_qso, worked_calls, online,
+                               scp, suggest_similar=True, dupe_rule=dupe_rule,
+                               history=call_history(history_file, index), cty=cty, journal=journal)
+        cc.add_logged(index.events)
+        restored = load_cache(cc, records, journal)
 
         # Clear screen
         stdscr.clear()
-        ln1, ln2 = qso2str(cc.current_qso, cc.edit_pos, 0)
-        stdscr.addstr(LN_MYDATA, 0, ln1)
-        stdscr.addstr(LN_QSODATA, 0, ln2)
+        screen = Screen(stdscr)
 
         fname = '...' + adi_f.name[-40:] if len(adi_f.name) > 40 else adi_f.name
         last_qso_str = (f'. Last QSO: {last_qso["CALL"]} '
                         f'worked on {adif_date2iso(last_qso["QSO_DATE"])} '
                         f'at {adif_time2iso(last_qso["TIME_ON"])}') if last_qso and 'CALL' in last_qso else ''
-        stdscr.addstr(LN_INFO, 0, f'{"Appending to" if append else "Overwriting"} "{fname}"{last_qso_str}')
-        stdscr.addstr(LN_INPUT, 0, PROMPT)
-
-        stdscr.refresh()
-        stdscr.nodelay(True)
+        info = f'{"Appending to" if append else "Overwriting"} "{fname}"{last_qso_str}'
+        if restored:
+            info = f'Restored {restored} unsaved QSO(s)'
+        input_buf = ''  # The input line after the prompt
 
         try:
             logger.info('Entering main loop...')
+            next_tick = time.monotonic() + TICK
+            key_time = None
+            keys = []
             while True:
-                py, px = stdscr.getyx()
-                ln1, ln2 = qso2str(cc.current_qso, cc.edit_pos, len(cc.qsos))
-                stdscr.addstr(LN_MYDATA, 0, ln1)
-                stdscr.clrtoeol()
-                stdscr.addstr(LN_QSODATA, 0, ln2)
-                stdscr.clrtoeol()
-                stdscr.addstr(py, px, '')
-
-                while True:
-                    try:
-                        c = stdscr.getkey()
-                        break
-                    except error:
-                        time.sleep(.01)
-
-                if c == 'KEY_UP':
-                    cc.load_prev()
-                    stdscr.addstr(LN_INFO, 0, '')
-                    stdscr.clrtoeol()
-                    stdscr.addstr(LN_INPUT, 0, PROMPT)
-                    stdscr.clrtoeol()
-                elif c == 'KEY_DOWN':
-                    cc.load_next()
-                    stdscr.addstr(LN_INFO, 0, '')
-                    stdscr.clrtoeol()
-                    stdscr.addstr(LN_INPUT, 0, PROMPT)
-                    stdscr.clrtoeol()
-                elif c == 'KEY_DC':
-                    res = cc.del_selected()
-                    if res >= 0:
-                        stdscr.addstr(LN_INFO, 0, f'Deleted QSO #{res + 1}')
-                    else:
-                        stdscr.addstr(LN_INFO, 0, '')
-                    stdscr.clrtoeol()
-                    stdscr.addstr(LN_INPUT, 0, PROMPT)
-                    stdscr.clrtoeol()
-                elif len(c) > 1 or c in '\r\t':
-                    continue
-                elif c == '\n':  # Flush QSO to stack
-                    res = cc.append_char(c)
-                    stdscr.addstr(LN_INFO, 0, res)
-                    stdscr.clrtoeol()
-                    stdscr.addstr(LN_INPUT, 0, PROMPT)
-                    stdscr.clrtoeol()
-                elif c == '!':  # Write QSOs to disk
-                    cc.append_char('\n')
-                    i = 0
-                    msg = ''
-                    while cc.has_qsos():
-                        adi_f.write('\n\n' + adi.dumps({'RECORDS': [cc.pop_qso()]}))
-                        adi_f.flush()
-                        i += 1
-                        msg = f'{i} QSO(s) written to disk'
-                    stdscr.addstr(LN_INFO, 0, msg)
-                    stdscr.clrtoeol()
-                    stdscr.addstr(LN_INPUT, 0, PROMPT)
-                    stdscr.clrtoeol()
-                else:  # Concat sequence
-                    res = cc.append_char(c)
-                    stdscr.addstr(LN_INFO, 0, res)
-                    stdscr.clrtoeol()
-                    if c in ('~', '?'):
-                        stdscr.addstr(LN_INPUT, 0, PROMPT)
-                        stdscr.clrtoeol()
-                    else:
-                        stdscr.addstr(py, px, '')
-                        if c == '\b':  # TODO: Is there a better way?
+                ln1, ln2 = qso2str(cc.current_qso, cc.edit_pos, len(cc.qsos), cc.score)
+                screen.set_line(LN_MYDATA, ln1)
+                screen.set_line(LN_QSODATA, ln2)
+                screen.set_line(LN_INPUT, PROMPT + input_buf)
+                screen.set_line(LN_INFO, info)
+                screen.set_line(LN_STATUS, 'Rate: {}/h 10 min | {}/h 60 min | {} best hour'.format(*cc.rates()))
+                lines = screen.render(LN_INPUT, len(PROMPT) + len(input_buf))
+                if key_time is not None:
+                    logger.debug(f'{len(keys)} key(s) rendered in {(time.perf_counter() - key_time) * 1000:.2f} ms, '
+                                 f'{lines} line(s) repainted')
+                    key_time = None
+
+                # Block until a key is pressed or the next timed work is due
+                stdscr.timeout(max(0, int((next_tick - time.monotonic()) * 1000)))
+                keys = []
+                try:
+                    keys.append(stdscr.getkey())
+                    key_time = time.perf_counter()
+
+                    # Drain typeahead (e.g. pasted text) to process it with a single render
+                    stdscr.nodelay(True)
+                    while True:
+                        keys.append(stdscr.getkey())
+                except error:
+                    pass
+
+                now = time.monotonic()
+                if now >= next_tick:
+                    next_tick = now + TICK
+                    cc.refresh_time()
+                    journal.sync()
+                    i = writer.poll()
+                    if i:
+                        info = f'{i} QSO(s) written to disk'
+
+                lookup = False  # Show partial matches of the typed call
+                for c in keys:
+                    lookup = False
+                    if c == 'KEY_UP':
+                        cc.load_prev()
+                        info = ''
+                        input_buf = ''
+                    elif c == 'KEY_DOWN':
+                        cc.load_next()
+                        info = ''
+                        input_buf = ''
+                    elif c == 'KEY_DC':
+                        res = cc.del_selected()
+                        info = f'Deleted QSO #{res + 1}' if res >= 0 else ''
+                        input_buf = ''
+                    elif c == 'KEY_RESIZE':
+                        stdscr.clear()
+                        screen.invalidate()
+                    elif len(c) > 1 or c in '\r\t':
+                        continue
+                    elif c == '\n':  # Flush QSO to stack
+                        info = cc.append_char(c)
+                        input_buf = ''
+                    elif c == '!':  # Write QSOs to disk
+                        cc.append_char('\n')
+                        for q in cc.drain_qsos():
+                            writer.write(q)
+                        i = writer.commit()  # Always write on user request
+                        journal.compact(cc.qsos)
+                        info = f'{i} QSO(s) written to disk' if i else ''
+                        input_buf = ''
+                    else:  # Concat sequence
+                        res = cc.append_char(c)
+                        if c in ('~', '?'):
+                            info = res
+                            input_buf = ''
+                        elif c == '\b':
+                            info = ''
+                            lookup = True
                             if res == '\b':
-                                stdscr.addstr(c)
-                                stdscr.clrtoeol()
+                                input_buf = input_buf[:-1]
                         else:
-                            stdscr.addstr(c)
+                            info = res
+                            lookup = not res
+                            input_buf += c
+
+                if lookup:
+                    matches = []
+                    calls = cc.partial_calls(limit=PARTIAL_CALLS)
+                    if calls:
+                        matches.append('Worked: ' + ' '.join(calls))
+                    calls = cc.scp_calls(limit=PARTIAL_CALLS)
+                    if calls:
+                        matches.append('SCP: ' + ' '.join(calls))
+                    if matches:
+                        info = ' | '.join(matches)
         except KeyboardInterrupt:
             logger.info('Received keyboard interrupt')
         finally:
             logger.info(f'Saving {len(cc.qsos)} QSO(s)...')
-            while cc.has_qsos():
-                adi_f.write('\n\n' + adi.dumps({'RECORDS': [cc.pop_qso()]}))
-                adi_f.flush()
+            for q in cc.drain_qsos():
+                writer.write(q)
+            writer.close()
+            journal.compact(cc.qsos)
             logger.info('...done')
     except Exception as exc:  # Print exception info due to curses wrapper removes traceback
         print(f'{type(exc).__name__}: {exc}', file=sys.stderr)
@@ -238,11 +332,16 @@ def command_console(stdscr, file, own_call, own_loc, own_name, append=False,  #
         if adi_f:
             adi_f.close()
             logger.info('Closed ADIF file')
+        index.close()
+        journal.close()
 
 
-def run_console(file, own_call, own_loc, own_name, overwrite, event, exchange, records, online=False):
+def run_console(file, own_call, own_loc, own_name, overwrite, event, exchange, records, online=False,
+                batch_size=1, batch_time=0.0, sync='flush', scp=None, dupe_rule='band-mode', history_file=None,
+                cty=None):
     if os.name == 'nt':
         os.system("mode con cols=120 lines=25")
 
     wrapper(command_console, file, own_call, own_loc, own_name,
-            not overwrite, event, exchange, records, online)
+            not overwrite, event, exchange, records, online, batch_size, batch_time, sync, scp, dupe_rule,
+            history_file, cty)
@@ -0,0 +1,304 @@
+# Copyright 2024 by Andreas Schawo, licensed under CC BY-SA 4.0
+
+"""Keep a sidecar index of an ADI file with the information needed at startup"""
+
+import os
+import json
+import logging
+from collections.abc import Iterator
+
+from .hamcc import CassiopeiaConsole
+from .adi_reader import ADIScanner
+from .history import HISTORY_FIELDS, HistoryEntry
+
+logger = logging.getLogger(__name__)
+
+INDEX_VERSION = 5
+FINGERPRINT_SIZE = 64
+# Fields of QSOs belonging to a contest or SIG activation, kept for dupe checking and scoring
+EVENT_FIELDS = ('QSO_DATE', 'TIME_ON', 'CALL', 'BAND', 'MODE', 'CONTEST_ID', 'MY_SIG', 'MY_SIG_INFO',
+                'SRX_STRING', 'GRIDSQUARE')
+LAST_FIELDS = CassiopeiaConsole.INIT_FIELDS + ('CALL',)
+SCAN_FIELDS = tuple(dict.fromkeys(LAST_FIELDS + EVENT_FIELDS + HISTORY_FIELDS))
+
+
+class LogIndex:
+    """Worked before calls, last QSO, event QSOs and call history of an ADI file stored in a file next to it
+    (e.g. hamcc_log.adi.idx)
+
+    The index covers the ADI file up to a byte offset. On refresh only data appended behind this offset is scanned.
+    If the file was rewritten the index is rebuilt.
+
+    The index file starts with a fixed size header line followed by entry lines which are only appended.
+    Later entries replace earlier ones on loading, so adding QSOs does not need to rewrite the whole file.
+    The header records the length of the index file it covers. Entries behind it were added by a session which
+    did not close the index (e.g. a crash) and are dropped on loading, the QSOs are scanned again instead.
+    The call history entries are skipped on loading and read only on request by history()."""
+
+    HEADER_FMT = 'HAMCC-IDX {:02d} {:015d} {:015d} {:020d} {:015d} {:<' + str(FINGERPRINT_SIZE * 2) + '}\n'
+    HEADER_SIZE = len(HEADER_FMT.format(0, 0, 0, 0, 0, ''))
+
+    def __init__(self, file: str, events_since: str = ''):
+        """
+        :param file: the ADI file
+        :param events_since: only QSOs of events from this date (YYYYMMDD) on are kept in memory"""
+
+        self.__file__ = file
+        self.__idx_file__ = file + '.idx'
+
+        self.__offset__ = 0
+        self.__size__ = 0
+        self.__mtime__ = 0
+        self.__length__ = 0  # Length of the index file covered by the header
+        self.__fingerprint__ = ''
+
+        self.__last_qso__: dict[str, str] = {}
+        self.__last_changed__ = False
+        self.__worked_calls__: dict[str, tuple[str, str]] = {}
+        self.__events_since__ = events_since
+        self.__events__: list[dict[str, str]] = []
+        self.__entries__ = 0
+
+        self.__idx_f__ = None
+
+    @property
+    def last_qso(self) -> dict[str, str]:
+        return self.__last_qso__
+
+    @property
+    def worked_calls(self) -> dict[str, tuple[str, str]]:
+        return self.__worked_calls__
+
+    @property
+    def events(self) -> list[dict[str, str]]:
+        """The QSOs belonging to a contest or SIG activation since the date given on creation"""
+        return self.__events__
+
+    def __read_header__(self, f) -> bool:
+        header = f.readline()
+        parts = header.split()
+        if len(header) != self.HEADER_SIZE or len(parts) not in (6, 7) or parts[0] != 'HAMCC-IDX':
+            return False
+        try:
+            if int(parts[1]) != INDEX_VERSION:
+                return False
+            self.__offset__, self.__size__, self.__mtime__ = int(parts[2]), int(parts[3]), int(parts[4])
+            self.__length__ = int(parts[5])
+        except ValueError:
+            return False
+        self.__fingerprint__ = parts[6] if len(parts) == 7 else ''
+        return self.__length__ >= self.HEADER_SIZE
+
+    def __write_header__(self):
+        self.__idx_f__.flush()
+        self.__length__ = max(self.HEADER_SIZE, os.fstat(self.__idx_f__.fileno()).st_size)
+        self.__idx_f__.seek(0)
+        self.__idx_f__.write(self.HEADER_FMT.format(INDEX_VERSION, self.__offset__, self.__size__,
+                                                    self.__mtime__, self.__length__, self.__fingerprint__))
+        self.__idx_f__.flush()
+        self.__idx_f__.seek(0, os.SEEK_END)
+
+    def __file_fingerprint__(self, offset: int) -> str:
+        with open(self.__file__, 'rb') as f:
+            start = max(0, offset - FINGERPRINT_SIZE)
+            f.seek(start)
+            return f.read(offset - start).hex()
+
+    def __is_current__(self, st: os.stat_result) -> bool:
+        return st.st_size == self.__size__ and st.st_mtime_ns == self.__mtime__
+
+    def __is_appended__(self, st: os.stat_result) -> bool:
+        if not st.st_size > self.__size__ >= self.__offset__:
+            return False
+        return self.__file_fingerprint__(self.__offset__) == self.__fingerprint__
+
+    def __load__(self) -> bool:
+        """Load the whole index file"""
+
+        try:
+            with open(self.__idx_file__, 'r+', encoding='utf-8') as f:
+                if not self.__read_header__(f):
+                    return False
+                idx_size = os.fstat(f.fileno()).st_size
+                if idx_size < self.__length__:
+                    return False
+                if idx_size > self.__length__:
+                    logger.info(f'Dropping {idx_size - self.__length__} byte(s) of entries not covered by the index')
+                    f.truncate(self.__length__)
+                    f.seek(0)
+                    f.readline()
+
+                worked = self.__worked_calls__
+                for line in f:
+                    if line.startswith('W '):
+                        parts = line.split()
+                        if len(parts) == 4:
+                            worked[parts[1]] = (parts[2], parts[3])
+                            self.__entries__ += 1
+                    elif line.startswith('E\t'):
+                        values = line[2:-1].split('\t')
+                        if len(values) == len(EVENT_FIELDS) and values[0] >= self.__events_since__:
+                            self.__events__.append(dict(zip(EVENT_FIELDS, values)))
+                    elif line.startswith('H\t'):
+                        continue
+                    elif line.startswith('L '):
+                        self.__last_qso__ = json.loads(line[2:])
+        except FileNotFoundError:
+            return False
+        except (OSError, ValueError) as exc:
+            logger.warning(f'Could not load index "{self.__idx_file__}": {exc}')
+            return False
+        return True
+
+    def __open__(self, rewrite: bool, keep_history: bool = False):
+        if rewrite:
+            history = list(self.__read_history__()) if keep_history else []
+            self.__idx_f__ = open(self.__idx_file__, 'w', encoding='utf-8')
+            self.__write_header__()
+            for call, (date, time) in self.__worked_calls__.items():
+                self.__idx_f__.write(f'W {call} {date} {time}\n')
+            for r in self.__events__:  # Events older than events_since are dropped
+                self.__write_event__(r)
+            self.__idx_f__.writelines(history)
+            self.__write_header__()  # The rewritten entries are covered even if the index is not closed
+            self.__entries__ = len(self.__worked_calls__)
+            self.__last_changed__ = bool(self.__last_qso__)
+        else:
+            self.__idx_f__ = open(self.__idx_file__, 'r+', encoding='utf-8')
+            self.__idx_f__.seek(0, os.SEEK_END)
+
+    def reset(self):
+        """Start a new empty index e.g. after the ADI file was overwritten"""
+
+        self.close()
+        self.__offset__ = self.__size__ = self.__mtime__ = self.__length__ = 0
+        self.__fingerprint__ = ''
+        self.__last_qso__ = {}
+        self.__worked_calls__ = {}
+        self.__events__ = []
+        self.__open__(True)
+
+    def refresh(self):
+        """Load the index and bring it up to date with the ADI file
+        Only appended data is scanned, a rewritten file or a broken index leads to a full rebuild."""
+
+        st = os.stat(self.__file__)
+        if not self.__load__():
+            logger.info(f'Building index "{self.__idx_file__}"...')
+            self.reset()
+            self.__scan__(st)
+        elif self.__is_current__(st):
+            logger.info('Index is up to date')
+            self.__open__(False)
+        elif self.__is_appended__(st):
+            logger.info(f'Updating index from offset {self.__offset__}...')
+            self.__open__(self.__entries__ > 2 * len(self.__worked_calls__) + 1000, True)
+            self.__scan__(st)
+        else:
+            logger.info(f'Rebuilding index "{self.__idx_file__}"...')
+            self.reset()
+            self.__scan__(st)
+
+    def __scan__(self, st: os.stat_result):
+        scanner = ADIScanner(self.__file__, SCAN_FIELDS, self.__offset__)
+        for r in scanner:
+            self.add(r)
+        self.__offset__ = scanner.offset
+        self.__fingerprint__ = self.__file_fingerprint__(self.__offset__)
+        self.__size__ = st.st_size
+        self.__mtime__ = st.st_mtime_ns
+        self.__write_header__()
+
+    def open_append(self) -> bool:
+        """Open the index to add written QSOs without loading it
+        This only succeeds if the index is up to date with the ADI file.
+        :return: True if the index is up to date"""
+
+        try:
+            with open(self.__idx_file__, encoding='utf-8') as f:
+                if not self.__read_header__(f) or os.fstat(f.fileno()).st_size != self.__length__:
+                    return False
+            if not self.__is_current__(os.stat(self.__file__)):
+                return False
+        except OSError:
+            return False
+
+        self.__open__(False)
+        return True
+
+    def add(self, record: dict[str, str]):
+        """Add a QSO which was written to the ADI file
+        :param record: the QSO"""
+
+        if 'CALL' in record and 'QSO_DATE' in record and 'TIME_ON' in record:
+            call, date, time = record['CALL'], record['QSO_DATE'], record['TIME_ON']
+            self.__worked_calls__[call] = (date, time)
+            self.__last_qso__ = {f: record[f] for f in LAST_FIELDS if f in record}
+            self.__last_changed__ = True
+            if self.__idx_f__ and call and ' ' not in call:
+                self.__idx_f__.write(f'W {call} {date} {time}\n')
+                self.__entries__ += 1
+
+            if record.get('CONTEST_ID') or record.get('MY_SIG_INFO'):
+                event = {f: ' '.join(str(record.get(f, '')).split()) for f in EVENT_FIELDS}
+                if event['QSO_DATE'] >= self.__events_since__:
+                    self.__events__.append(event)
+                if self.__idx_f__:
+                    self.__write_event__(event)
+
+        if self.__idx_f__ and record.get('CALL'):
+            values = [' '.join(str(record.get(f, '')).split()) for f in HISTORY_FIELDS]
+            if any(values):
+                call = ' '.join(record['CALL'].split())
+                self.__idx_f__.write('H\t' + call + '\t' + '\t'.join(values) + '\n')
+
+    def __write_event__(self, event: dict[str, str]):
+        self.__idx_f__.write('E\t' + '\t'.join(event[f] for f in EVENT_FIELDS) + '\n')
+
+    def __read_history__(self) -> Iterator[str]:
+        try:
+            with open(self.__idx_file__, encoding='utf-8') as f:
+                for line in f:
+                    if line.startswith('H\t') and line.endswith('\n'):  # Skip a line still being written
+                        yield line
+        except FileNotFoundError:
+            return
+
+    def history(self) -> Iterator[HistoryEntry]:
+        """Read the call history entries of the logged QSOs in order of logging
+        Entries added since the index was opened are only included after they were flushed by close().
+        :return: an iterator over tuples of call and the values of HISTORY_FIELDS"""
+
+        for line in self.__read_history__():
+            entry = line[2:-1].split('\t')
+            if len(entry) == len(HISTORY_FIELDS) + 1:
+                yield tuple(entry)
+
+    def add_records(self, records: list[dict[str, str]]):
+        """Add QSOs which were written to the ADI file
+        :param records: the QSOs"""
+
+        for r in records:
+            self.add(r)
+
+    def close(self):
+        """Store the state of the ADI file and close the index"""
+
+        if not self.__idx_f__:
+            return
+
+        try:
+            if self.__last_changed__:
+                self.__idx_f__.write(f'L {json.dumps(self.__last_qso__)}\n')
+                self.__last_changed__ = False
+
+            st = os.stat(self.__file__)
+            self.__offset__ = self.__size__ = st.st_size
+            self.__mtime__ = st.st_mtime_ns
+            self.__fingerprint__ = self.__file_fingerprint__(self.__offset__)
+            self.__write_header__()
+        except OSError as exc:
+            logger.warning(f'Could not update index "{self.__idx_file__}": {exc}')
+        finally:
+            self.__idx_f__.close()
+            self.__idx_f__ = None
@@ -0,0 +1,203 @@
+# Copyright 2024 by Andreas Schawo, licensed under CC BY-SA 4.0
+
+"""Read records from ADIF ADI files as a stream without loading the whole file"""
+
+import io
+import os
+import re
+import logging
+from typing import BinaryIO
+from collections.abc import Iterable, Iterator
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 64 * 1024
+TAIL_BLOCK_SIZE = 4 * 1024
+
+# Tag with name, length and optional type
+REGEX_TAG = re.compile(rb'<([^<>:]+)(?::([0-9]+)[^<>]*)?>')
+
+
+class ADIScanner:
+    """Iterate over the records of an ADI file chunk by chunk
+    Only the requested fields are extracted. The memory used is bound by the chunk size and the size of one record.
+    The field length is counted in characters, non ASCII data is expected as UTF-8."""
+
+    def __init__(self, file: str | BinaryIO, fields: Iterable[str] = None, offset: int = 0,
+                 chunk_size: int = CHUNK_SIZE):
+        """
+        :param file: the ADI file to scan or an opened binary stream
+        :param fields: the fields to extract (default: all)
+        :param offset: the byte offset to start scanning at (must be at a record boundary)
+        :param chunk_size: the number of bytes to read at once"""
+
+        self.__file__ = file
+        self.__fields__ = frozenset(f.upper() for f in fields) if fields else None
+        self.__start__ = offset
+        self.__chunk_size__ = chunk_size
+        self.__offset__ = offset
+        self.__names__: dict[bytes, str] = {}
+
+    @property
+    def offset(self) -> int:
+        """The byte offset behind the last complete record or header scanned so far"""
+        return self.__offset__
+
+    def __field_name__(self, raw: bytes) -> str:
+        name = self.__names__.get(raw)
+        if name is None:
+            name = self.__names__[raw] = raw.decode('ascii', 'replace').strip().upper()
+        return name
+
+    @staticmethod
+    def __char_end__(buf: bytes, start: int, length: int) -> int:
+        """Find the end of a value with the given count of UTF-8 characters
+        :return: the end index or -1 if the buffer ends before"""
+
+        count = 0
+        i = start
+        while i < len(buf):
+            if buf[i] & 0xC0 != 0x80:  # Not a continuation byte
+                if count == length:
+                    return i
+                count += 1
+            i += 1
+        return -1
+
+    def __iter__(self) -> Iterator[dict[str, str]]:
+        if hasattr(self.__file__, 'read'):
+            yield from self.__scan__(self.__file__)
+        else:
+            with open(self.__file__, 'rb') as f:
+                yield from self.__scan__(f)
+
+    def __scan__(self, f: BinaryIO) -> Iterator[dict[str, str]]:
+        fields = self.__fields__
+        names = self.__names__
+        field_name = self.__field_name__
+
+        f.seek(self.__start__)
+        buf = b''
+        base = self.__start__  # File offset of buf[0]
+        pos = 0  # Position behind the last consumed tag or data
+        eof = False
+        record = {}
+
+        while True:
+            # A tag match never contains another '<', so real tags are always found even if some data contains
+            # tag like text. These matches inside data are skipped by position.
+            for m in REGEX_TAG.finditer(buf, pos):
+                if m.start() < pos:
+                    continue
+
+                raw_name, length = m.groups()
+                name = names.get(raw_name) or field_name(raw_name)
+                if length is None:
+                    pos = m.end()
+                    if name == 'EOR':
+                        self.__offset__ = base + pos
+                        if record:
+                            yield record
+                            record = {}
+                    elif name == 'EOH':
+                        self.__offset__ = base + pos
+                        record = {}
+                    continue
+
+                start = m.end()
+                end = start + int(length)
+                raw = buf[start:end]
+                if raw.isascii():
+                    value = raw.decode()
+                else:
+                    end = self.__char_end__(buf, start, int(length))
+                    value = buf[start:end].decode('utf-8', 'replace')
+                if end < 0 or end > len(buf):
+                    pos = m.start()  # Data not complete
+                    break
+
+                if fields is None or name in fields:
+                    record[name] = value
+                pos = end
+            else:
+                lt = buf.find(b'<', pos)
+                pos = lt if lt >= 0 else len(buf)  # Keep a tag which may not be complete
+
+            if eof:
+                break
+
+            # Drop consumed data and read the next chunk
+            buf = buf[pos:]
+            base += pos
+            pos = 0
+            chunk = f.read(self.__chunk_size__)
+            if chunk:
+                buf += chunk
+            else:
+                eof = True
+
+
+def iter_records(file: str, fields: Iterable[str] = None, offset: int = 0) -> Iterator[dict[str, str]]:
+    """Iterate over the records of an ADI file
+    :param file: the ADI file
+    :param fields: the fields to extract (default: all)
+    :param offset: the byte offset to start scanning at
+    :return: an iterator over the records"""
+
+    return iter(ADIScanner(file, fields, offset))
+
+
+def read_tail_record(file: str, fields: Iterable[str] = None) -> dict[str, str] | None:
+    """Read the last record of an ADI file by reading backwards from the end of the file
+    Only the blocks up to the previous record boundary are read.
+    :param file: the ADI file
+    :param fields: the fields to extract (default: all)
+    :return: the last record, an empty dict if there is no record or None if the tail could not be parsed"""
+
+    with open(file, 'rb') as f:
+        pos = f.seek(0, os.SEEK_END)
+        tail = b''
+        while True:
+            step = min(TAIL_BLOCK_SIZE, pos)
+            pos -= step
+            f.seek(pos)
+            tail = f.read(step) + tail
+
+            low = tail.lower()
+            last_eor = low.rfind(b'<eor>')
+            if last_eor >= 0:
+                start = max(low.rfind(b'<eor>', 0, last_eor), low.rfind(b'<eoh>', 0, last_eor))
+                if start >= 0:
+                    start += 5
+                    break
+
+            if pos == 0:  # Reached the beginning of the file
+                if last_eor < 0:
+                    return {} if low.find(b'<eoh>') >= 0 or not low.strip() else None
+                start = 0
+                break
+
+    segment = tail[start:last_eor + 5]
+    scanner = ADIScanner(io.BytesIO(segment), fields)
+    records = list(scanner)
+    if len(records) != 1 or scanner.offset != len(segment):
+        return None
+    return records[0]
+
+
+def read_last_record(file: str, fields: Iterable[str] = None) -> dict[str, str]:
+    """Read the last record of an ADI file
+    Reads the tail of the file only and falls back to a full scan if the tail could not be parsed.
+    :param file: the ADI file
+    :param fields: the fields to extract (default: all)
+    :return: the last record or an empty dict"""
+
+    last = read_tail_record(file, fields)
+    if last is not None:
+        return last
+
+    logger.warning(f'Could not read last record from the end of "{file}", scanning whole file...')
+    last = {}
+    for last in iter_records(file, fields):
+        pass
+    return last
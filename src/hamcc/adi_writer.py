@@ -0,0 +1,197 @@
+# Copyright 2024 by Andreas Schawo, licensed under CC BY-SA 4.0
+
+"""Write records to ADIF ADI files in batches with a selectable durability policy"""
+
+import os
+import re
+import time
+import logging
+from typing import TextIO
+from collections.abc import Callable
+
+from .hamcc import CassiopeiaConsole
+
+logger = logging.getLogger(__name__)
+
+SYNC_POLICIES = ('none', 'flush', 'fsync')
+
+# Fields produced by CassiopeiaConsole, the tags of these are precomputed
+RECORD_FIELDS = tuple(CassiopeiaConsole.QSO_REQ_FIELDS) + (
+    'MY_CITY', 'MY_NAME', 'FREQ', 'TX_PWR', 'RST_RCVD', 'RST_SENT', 'NAME', 'QTH', 'COMMENT', 'QSL_RCVD',
+    'CONTEST_ID', 'SRX', 'SRX_STRING', 'STX', 'STX_STRING', 'MY_SIG', 'MY_SIG_INFO', 'SIG', 'SIG_INFO',
+    'COUNTRY', 'DXCC', 'CONT', 'CQZ', 'ITUZ', 'DISTANCE')
+TAG_LENGTHS = 64
+
+REGEX_PARAM = re.compile(r'[a-zA-Z][a-zA-Z_0-9]*')
+REGEX_NON_ADI = re.compile(r'[^ -~\n\r]')  # Not allowed in ADI values
+
+FIELD_TAGS: dict[str, tuple[str, ...]] = {f: tuple(f'<{f}:{n}>' for n in range(TAG_LENGTHS)) for f in RECORD_FIELDS}
+
+
+def field_tag(name: str, length: int) -> str:
+    """Get the tag for a field and value length, tags for short values are cached per field
+    :param name: the field name
+    :param length: the length of the value
+    :return: the tag e.g. <CALL:6> or an empty string for *_INTL fields (not allowed in ADI)
+    :raises ValueError: if the field name contains not allowed characters"""
+
+    tags = FIELD_TAGS.get(name)
+    if tags is None:
+        if not REGEX_PARAM.fullmatch(name):
+            raise ValueError(f'Field "{name}" contains not allowed characters')
+        if name.upper().endswith('_INTL'):
+            tags = FIELD_TAGS[name] = ()
+        else:
+            tags = FIELD_TAGS[name] = tuple(f'<{name.upper()}:{n}>' for n in range(TAG_LENGTHS))
+    if not tags:
+        return ''
+    return tags[length] if length < TAG_LENGTHS else f'<{name.upper()}:{length}>'
+
+
+def serialize_record(record: dict) -> str:
+    """Convert a record to ADI text as adif_file.adi.dumps does for a single record without header
+    Empty values and *_INTL fields are skipped, non ASCII characters are replaced by "_".
+    :param record: the record
+    :return: the ADI text (empty if the record has no values)"""
+
+    parts = []
+    for i, (name, value) in enumerate(record.items(), 1):
+        if type(value) is not str:
+            if isinstance(value, bool):
+                value = 'Y' if value else 'N'
+            elif isinstance(value, (str, int, float)):
+                value = str(value)
+            else:
+                logger.warning(f'Skipped field "{name}" due to invalid type {type(value).__name__}')
+                continue
+        if not value:
+            continue
+        if not (value.isascii() and value.isprintable()) and REGEX_NON_ADI.search(value):
+            logger.warning(f'Replaced non ASCII chars in field "{name}"')
+            value = REGEX_NON_ADI.sub('_', value)
+
+        tag = field_tag(name, len(value))
+        if not tag:
+            continue
+        parts.append(tag)
+        parts.append(value)
+        parts.append('\n' if i % 5 == 0 else ' ')
+
+    if not parts:
+        return ''
+    if parts[-1] != '\n':
+        parts.append('\n')
+    parts.append('<EOR>')
+    return ''.join(parts)
+
+
+class ADIWriter:
+    """Collect serialized records and write them to the stream as a batch (group commit)
+    A batch is committed if it holds batch_size records or its first record is older than batch_time seconds.
+    Time based commits while no records are written need a regular call of poll().
+
+    Per committed batch the stream is
+    - none: only written (the data may stay in the buffer of the stream until close)
+    - flush: flushed to the operating system
+    - fsync: flushed and synced to the disk"""
+
+    def __init__(self, stream: TextIO, serializer: Callable[[dict], str] = serialize_record, batch_size: int = 1,
+                 batch_time: float = 0.0, sync: str = 'flush', on_commit: Callable[[list[dict]], None] = None):
+        """
+        :param stream: the opened ADI file
+        :param serializer: a function converting a record to ADI text
+        :param batch_size: the maximum number of records per batch
+        :param batch_time: the maximum age of a batch in seconds (0 for no time limit)
+        :param sync: the durability policy per batch (one of none, flush, fsync)
+        :param on_commit: called with the records of each committed batch"""
+
+        if sync not in SYNC_POLICIES:
+            raise ValueError(f'Unknown sync policy "{sync}"')
+        if batch_size < 1:
+            raise ValueError('Batch size must be at least 1')
+
+        self.__stream__ = stream
+        self.__serializer__ = serializer
+        self.__batch_size__ = batch_size
+        self.__batch_time__ = batch_time
+        self.__sync__ = sync
+        self.__on_commit__ = on_commit
+
+        self.__parts__: list[str] = []
+        self.__records__: list[dict] = []
+        self.__first__ = 0.0
+        self.__committed__ = 0
+
+    @property
+    def pending(self) -> int:
+        """The number of records not committed yet"""
+        return len(self.__records__)
+
+    @property
+    def committed(self) -> int:
+        """The number of records committed so far"""
+        return self.__committed__
+
+    def __due__(self) -> bool:
+        return self.__batch_time__ > 0 and time.monotonic() - self.__first__ >= self.__batch_time__
+
+    def write(self, record: dict, text: str = None) -> int:
+        """Add a record to the current batch and commit the batch if it is full or due
+        :param record: the record
+        :param text: the record already serialized e.g. in another thread (default: use the serializer)
+        :return: the number of records committed"""
+
+        if not self.__parts__:
+            self.__first__ = time.monotonic()
+        self.__parts__.append('\n\n' + (self.__serializer__(record) if text is None else text))
+        self.__records__.append(record)
+
+        if len(self.__records__) >= self.__batch_size__ or self.__due__():
+            return self.commit()
+        return 0
+
+    def write_text(self, text: str):
+        """Write text (e.g. the header) to the stream and commit it with all pending records
+        :param text: the text"""
+
+        if not self.__parts__:
+            self.__first__ = time.monotonic()
+        self.__parts__.append(text)
+        self.commit()
+
+    def commit(self) -> int:
+        """Write the current batch to the stream regarding the sync policy
+        :return: the number of records committed"""
+
+        if not self.__parts__:
+            return 0
+
+        self.__stream__.write(''.join(self.__parts__))
+        if self.__sync__ != 'none':
+            self.__stream__.flush()
+            if self.__sync__ == 'fsync':
+                os.fsync(self.__stream__.fileno())
+
+        records = self.__records__
+        self.__parts__ = []
+        self.__records__ = []
+        self.__committed__ += len(records)
+        logger.debug(f'Committed {len(records)} record(s)')
+
+        if records and self.__on_commit__:
+            self.__on_commit__(records)
+        return len(records)
+
+    def poll(self) -> int:
+        """Commit the current batch if it is due
+        :return: the number of records committed"""
+
+        if self.__parts__ and self.__due__():
+            return self.commit()
+        return 0
+
+    def close(self):
+        """Commit pending records and flush the stream, the stream itself is not closed"""
+
+        self.commit()
+        self.__stream__.flush()
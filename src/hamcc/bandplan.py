@@ -0,0 +1,71 @@
+# Copyright 2024 by Andreas Schawo, licensed under CC BY-SA 4.0
+
+"""Look up the band of a frequency and check FREQ and BAND of QSOs for consistency"""
+
+import os
+import json
+import logging
+from bisect import bisect_right
+from collections.abc import Iterable, Iterator
+
+logger = logging.getLogger(__name__)
+
+
+def __read_bandplan__(file: str) -> dict[str, list[float]]:
+    try:
+        logger.debug(f'Reading JSON data "{file}"...')
+        with open(os.path.join(os.path.dirname(__file__), file)) as jf:
+            return json.load(jf)
+    except OSError:
+        return {}
+
+
+# Band edges in MHz as defined by the ADIF band enumeration
+BANDPLAN = __read_bandplan__('data/bandplan.json')
+
+# Lower and upper edges sorted by lower edge for bisecting
+__EDGES__ = sorted((lower, upper, band) for band, (lower, upper) in BANDPLAN.items())
+LOWER_EDGES = [e[0] for e in __EDGES__]
+UPPER_EDGES = [e[1] for e in __EDGES__]
+EDGE_BANDS = [e[2] for e in __EDGES__]
+
+
+def band_of(freq: float) -> str:
+    """Get the band of a frequency
+    :param freq: the frequency in MHz
+    :return: the band or an empty string if the frequency is outside of all bands"""
+
+    i = bisect_right(LOWER_EDGES, freq) - 1
+    if i >= 0 and freq <= UPPER_EDGES[i]:
+        return EDGE_BANDS[i]
+    return ''
+
+
+def check_freq(freq: str, band: str) -> str:
+    """Check if a frequency is in a band
+    :param freq: the frequency in MHz as ADIF value
+    :param band: the band
+    :return: an empty string if the frequency is in the band, else the problem"""
+
+    try:
+        found = band_of(float(freq))
+    except ValueError:
+        return f'Invalid frequency {freq}'
+    if not found:
+        return f'Frequency {freq} MHz is not in any band'
+    if band and found != band.lower():
+        return f'Frequency {freq} MHz is not in band {band}'
+    return ''
+
+
+def validate_records(records: Iterable[dict[str, str]]) -> Iterator[tuple[int, str]]:
+    """Check FREQ and BAND of records e.g. of a loaded log
+    :param records: the records
+    :return: an iterator over the index and the problem of each inconsistent record"""
+
+    for i, r in enumerate(records):
+        freq = r.get('FREQ')
+        if freq:
+            problem = check_freq(freq, r.get('BAND', ''))
+            if problem:
+                yield i, problem
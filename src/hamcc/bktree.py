@@ -0,0 +1,123 @@
+# Copyright 2024 by Andreas Schawo, licensed under CC BY-SA 4.0
+
+"""Find similar callsigns within a small edit distance e.g. to detect busted calls"""
+
+from collections.abc import Iterable
+
+
+def pattern_masks(pattern: str) -> dict[str, int]:
+    """Get the bit masks of the positions of each char in a pattern for levenshtein()
+    :param pattern: the pattern
+    :return: the bit mask per char"""
+
+    peq = {}
+    for i, c in enumerate(pattern):
+        peq[c] = peq.get(c, 0) | (1 << i)
+    return peq
+
+
+def levenshtein(pattern: str, text: str, peq: dict[str, int] = None) -> int:
+    """Calculate the Levenshtein distance with the bit-parallel algorithm of Myers (in the formulation of Hyyrö)
+    A column of the distance matrix is held in the bits of two integers, so each char of the text takes a few
+    integer operations instead of a loop over the pattern.
+    :param pattern: the first string
+    :param text: the second string
+    :param peq: the precomputed pattern_masks() of the pattern if the pattern is used repeatedly
+    :return: the edit distance"""
+
+    m = len(pattern)
+    if m == 0:
+        return len(text)
+    if peq is None:
+        peq = pattern_masks(pattern)
+
+    mask = (1 << m) - 1
+    last = 1 << (m - 1)
+    pv = mask  # Positive vertical deltas
+    mv = 0  # Negative vertical deltas
+    score = m
+
+    for c in text:
+        eq = peq.get(c, 0)
+        xv = eq | mv
+        xh = ((((eq & pv) + pv) & mask) ^ pv) | eq
+        ph = mv | (~(xh | pv) & mask)
+        mh = pv & xh
+        if ph & last:
+            score += 1
+        elif mh & last:
+            score -= 1
+        ph = ((ph << 1) | 1) & mask
+        mh = (mh << 1) & mask
+        pv = mh | (~(xv | ph) & mask)
+        mv = ph & xv
+    return score
+
+
+class BKTree:
+    """Burkhard-Keller tree over callsigns with the Levenshtein distance as metric
+    Each child of a node is keyed by its distance to the node. A search for calls within distance k of a query
+    only descends into children keyed d-k to d+k (triangle inequality) where d is the distance of the node."""
+
+    def __init__(self, calls: Iterable[str] = ()):
+        """
+        :param calls: the callsigns to add"""
+
+        self.__root__: tuple[str, dict] | None = None
+        self.__size__ = 0
+        for c in calls:
+            self.add(c)
+
+    def __len__(self) -> int:
+        return self.__size__
+
+    def add(self, call: str) -> bool:
+        """Add a callsign to the tree
+        :param call: the callsign
+        :return: True if the call was not in the tree before"""
+
+        call = call.upper()
+        if not call:
+            return False
+        if self.__root__ is None:
+            self.__root__ = (call, {})
+            self.__size__ += 1
+            return True
+
+        peq = pattern_masks(call)
+        node_call, children = self.__root__
+        while True:
+            d = levenshtein(call, node_call, peq)
+            if d == 0:
+                return False
+            child = children.get(d)
+            if child is None:
+                children[d] = (call, {})
+                self.__size__ += 1
+                return True
+            node_call, children = child
+
+    def search(self, call: str, max_dist: int = 2) -> list[tuple[int, str]]:
+        """Find the callsigns within an edit distance of a call
+        :param call: the callsign to search for
+        :param max_dist: the maximum edit distance
+        :return: list of tuples (distance, callsign) sorted by distance and call"""
+
+        call = call.upper()
+        if self.__root__ is None or not call:
+            return []
+
+        peq = pattern_masks(call)
+        found = []
+        stack = [self.__root__]
+        while stack:
+            node_call, children = stack.pop()
+            d = levenshtein(call, node_call, peq)
+            if d <= max_dist:
+                found.append((d, node_call))
+            for dist in range(max(1, d - max_dist), d + max_dist + 1):
+                child = children.get(dist)
+                if child is not None:
+                    stack.append(child)
+        found.sort()
+        return found
@@ -0,0 +1,89 @@
+# Copyright 2024 by Andreas Schawo, licensed under CC BY-SA 4.0
+
+"""Find callsigns starting with or containing a fragment while typing"""
+
+from bisect import bisect_left, insort
+from collections.abc import Iterable, Iterator
+
+
+class CallIndex:
+    """Sorted arrays over callsigns for partial lookups
+    Calls starting with a fragment are found by bisecting the sorted calls. Calls containing a fragment are found
+    by bisecting the sorted suffixes of all calls (a suffix array), so a query does not depend on the number of
+    calls but only on the number of matches."""
+
+    def __init__(self, calls: Iterable[str] = ()):
+        """
+        :param calls: the callsigns to index"""
+
+        unique = {c.upper() for c in calls if c}
+        self.__calls__: list[str] = sorted(unique)
+        self.__suffixes__: list[tuple[str, str]] = sorted((c[i:], c) for c in unique for i in range(1, len(c)))
+
+    def __len__(self) -> int:
+        return len(self.__calls__)
+
+    def __contains__(self, call: str) -> bool:
+        call = call.upper()
+        i = bisect_left(self.__calls__, call)
+        return i < len(self.__calls__) and self.__calls__[i] == call
+
+    def add(self, call: str) -> bool:
+        """Add a callsign to the index
+        :param call: the callsign
+        :return: True if the call was not indexed before"""
+
+        call = call.upper()
+        if not call or call in self:
+            return False
+
+        insort(self.__calls__, call)
+        for i in range(1, len(call)):
+            insort(self.__suffixes__, (call[i:], call))
+        return True
+
+    def starting_with(self, fragment: str) -> Iterator[str]:
+        """Iterate over the calls starting with a fragment in alphabetical order
+        :param fragment: the beginning of the calls
+        :return: an iterator over the matching calls"""
+
+        fragment = fragment.upper()
+        calls = self.__calls__
+        for i in range(bisect_left(calls, fragment), len(calls)):
+            if not calls[i].startswith(fragment):
+                break
+            yield calls[i]
+
+    def containing(self, fragment: str) -> Iterator[str]:
+        """Iterate over the calls containing a fragment but not starting with it
+        Each call is returned once in order of the matching suffix.
+        :param fragment: the part of the calls
+        :return: an iterator over the matching calls"""
+
+        fragment = fragment.upper()
+        suffixes = self.__suffixes__
+        seen = set()
+        for i in range(bisect_left(suffixes, (fragment,)), len(suffixes)):
+            suffix, call = suffixes[i]
+            if not suffix.startswith(fragment):
+                break
+            if call not in seen and not call.startswith(fragment):
+                seen.add(call)
+                yield call
+
+    def matches(self, fragment: str, limit: int = 5) -> list[str]:
+        """Get the calls matching a fragment, calls starting with the fragment first
+        :param fragment: the fragment
+        :param limit: the maximum number of calls
+        :return: the list of matching calls"""
+
+        result = []
+        if not fragment or limit <= 0:
+            return result
+
+        for found in (self.starting_with(fragment), self.containing(fragment)):
+            for call in found:
+                result.append(call)
+                if len(result) >= limit:
+                    return result
+        return result
@@ -0,0 +1,198 @@
+# Copyright 2024 by Andreas Schawo, licensed under CC BY-SA 4.0
+
+"""Check a file of QSO strings for errors and warnings on multiple cores without writing QSOs
+
+Band, mode, date, time and the other session values flow from one QSO to the next. A cheap sequential pass
+evaluates only these values (and the dupe and worked before state) and takes a snapshot of the session at the
+start of each chunk of lines. The chunks are then evaluated completely in a process pool, each starting from its
+snapshot, so the result is the same as evaluating the file line by line."""
+
+import logging
+from concurrent.futures import ProcessPoolExecutor
+
+from .hamcc import CassiopeiaConsole
+from .scp import ScpIndex
+from .dxcc import CtyIndex
+
+logger = logging.getLogger(__name__)
+
+CHUNK_LINES = 2000  # Lines evaluated per task
+
+Message = tuple[int, str, str]  # Line number, sequence and result
+Chunk = tuple[list[tuple[int, str]], dict, frozenset[tuple[int, int]], dict[str, tuple[str, str]], dict]
+
+
+def read_qso_lines(file: str) -> list[tuple[int, str]]:
+    """Read the QSO strings of a file, empty lines are skipped
+    :param file: the file
+    :return: list of tuples of line number (starting at 1) and line"""
+
+    with open(file, encoding='utf-8', errors='replace') as f:
+        return [(i, line.strip()) for i, line in enumerate(f, 1) if line.strip()]
+
+
+class StateConsole(CassiopeiaConsole):
+    """Evaluates only what is carried over to the next QSO, calls are taken as typed and only checked for dupes
+    The dupes are marked by line number and the count of calls evaluated in the line. For the calls of a chunk
+    the worked before entries logged before the chunk are kept in chunk_worked."""
+
+    # Locator, name, RST and exchange do not change the session or the dupe state, * may start a call
+    SKIPPED_PREFIXES = frozenset('@\'.,%')
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.__line__ = 0
+        self.__calls__ = 0
+        self.dupe_marks: set[tuple[int, int]] = set()
+        self.chunk_worked: dict[str, tuple[str, str]] = {}
+        self.__chunk_calls__: set[str] = set()
+
+    def start_chunk(self):
+        self.dupe_marks = set()
+        self.chunk_worked = {}
+        self.__chunk_calls__ = set()
+
+    def start_line(self, line_no: int):
+        self.__line__ = line_no
+        self.__calls__ = 0
+
+    def evaluate(self, seq: str) -> str:
+        if seq and seq[0] in self.SKIPPED_PREFIXES:
+            self.__qso_active__ = True
+            return ''
+        return super().evaluate(seq)
+
+    def evaluate_call(self, seq: str) -> str:
+        self.__calls__ += 1
+        call = seq.upper()
+        self.__cur_qso__['CALL'] = call
+        if call not in self.__chunk_calls__:
+            self.__chunk_calls__.add(call)
+            if call in self.__worked_calls__:
+                self.chunk_worked[call] = self.__worked_calls__[call]
+        if self.check_call(seq) and self.is_dupe():
+            self.dupe_marks.add((self.__line__, self.__calls__))
+        return ''
+
+    def finalize_qso(self) -> str:
+        self.evaluate(self.__cur_seq__)
+        self.__cur_seq__ = ''
+        self.__long_mode__ = False
+
+        if self.__qso_active__:
+            self.__dupes__.add(self.__cur_qso__)
+            if self.__cur_qso__['CALL']:
+                self.__worked_calls__[self.__cur_qso__['CALL']] = (self.__cur_qso__['QSO_DATE'],
+                                                                   self.__cur_qso__['TIME_ON'])
+            self.clear()
+            if self.__event__:
+                self.finalize_event()
+        return ''
+
+
+class CheckConsole(CassiopeiaConsole):
+    """Evaluates a chunk of lines, dupes are taken from the marks of the StateConsole"""
+
+    def __init__(self, dupe_marks: frozenset[tuple[int, int]], *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.__line__ = 0
+        self.__calls__ = 0
+        self.__dupe_marks__ = dupe_marks
+
+    def start_line(self, line_no: int):
+        self.__line__ = line_no
+        self.__calls__ = 0
+
+    def evaluate_call(self, seq: str) -> str:
+        self.__calls__ += 1
+        return super().evaluate_call(seq)
+
+    def is_dupe(self, qso: dict[str, str] = None) -> bool:
+        if qso is None:
+            return (self.__line__, self.__calls__) in self.__dupe_marks__
+        return super().is_dupe(qso)
+
+
+def evaluate_lines(cc: CassiopeiaConsole, lines: list[tuple[int, str]]) -> list[Message]:
+    """Evaluate lines like process_qsos and collect the warnings and errors
+    :param cc: the console, StateConsole or CheckConsole
+    :param lines: the numbered lines
+    :return: list of tuples of line number, sequence and result"""
+
+    messages = []
+    for line_no, line in lines:
+        cc.start_line(line_no)
+        results = cc.evaluate_line(line + ' ')
+        results.append(('', cc.finalize_qso()))
+        for seq, res in results:
+            if res.startswith(('Warning:', 'Error:')):
+                messages.append((line_no, seq, res))
+        for _ in cc.drain_qsos():
+            pass
+    return messages
+
+
+__worker__: dict = {}  # Lookups loaded once per worker process
+
+
+def __init_worker__(scp_file: str | None, cty_file: str | None):
+    __worker__['scp'] = ScpIndex.load(scp_file) if scp_file else None
+    __worker__['cty'] = CtyIndex.load(cty_file) if cty_file else None
+
+
+def check_chunk(chunk: Chunk) -> list[Message]:
+    """Evaluate a chunk of lines starting from a session snapshot
+    :param chunk: tuple of numbered lines, session state, dupe marks, worked before calls and the arguments of
+                  the console
+    :return: list of tuples of line number, sequence and result"""
+
+    lines, state, dupe_marks, worked, options = chunk
+    cc = CheckConsole(dupe_marks, scp=__worker__.get('scp'), cty=__worker__.get('cty'), init_worked=worked,
+                      **options)
+    cc.restore_session(state)
+    return evaluate_lines(cc, lines)
+
+
+def check_file(file: str, own_call: str = '', own_loc: str = '', own_name: str = '',
+               contest_id: str = '', qso_number: int = 1, dupe_rule: str = 'band-mode',
+               scp_file: str = None, cty_file: str = None,
+               jobs: int = None, chunk_lines: int = CHUNK_LINES) -> list[Message]:
+    """Check a file of QSO strings as if it was imported via stdin
+    :param file: the file with one QSO per line
+    :param own_call: the own call
+    :param own_loc: the own locator and QTH
+    :param own_name: the own name
+    :param contest_id: the event to start with
+    :param qso_number: the first QSO number or exchange of the event
+    :param dupe_rule: the dupe rule
+    :param scp_file: a Super Check Partial file to look up calls
+    :param cty_file: a country file
+    :param jobs: the number of processes (default: number of CPUs)
+    :param chunk_lines: the number of lines per task
+    :return: list of tuples of line number, sequence and result ordered by line"""
+
+    lines = read_qso_lines(file)
+    options = {'my_call': own_call, 'my_loc': own_loc, 'my_name': own_name, 'event': contest_id,
+               'event_ref': qso_number, 'dupe_rule': dupe_rule}
+
+    logger.info(f'Evaluating session values of {len(lines)} line(s)...')
+    state_cc = StateConsole(**options)
+    chunks: list[Chunk] = []
+    for start in range(0, len(lines), chunk_lines):
+        part = lines[start:start + chunk_lines]
+        state = state_cc.session_state()
+        state_cc.start_chunk()
+        evaluate_lines(state_cc, part)
+        chunks.append((part, state, frozenset(state_cc.dupe_marks), state_cc.chunk_worked, options))
+
+    logger.info(f'Checking {len(chunks)} chunk(s)...')
+    messages = []
+    if len(chunks) <= 1 or jobs == 1:
+        __init_worker__(scp_file, cty_file)
+        for chunk in chunks:
+            messages.extend(check_chunk(chunk))
+    else:
+        with ProcessPoolExecutor(jobs, initializer=__init_worker__, initargs=(scp_file, cty_file)) as pool:
+            for result in pool.map(check_chunk, chunks):
+                messages.extend(result)
+    return messages
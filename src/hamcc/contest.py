@@ -0,0 +1,287 @@
+# Copyright 2024 by Andreas Schawo, licensed under CC BY-SA 4.0
+
+"""Detect duplicate QSOs within a contest or a SIG activation (e.g. POTA) and keep the score of a contest"""
+
+import os
+import re
+import json
+import logging
+import datetime
+from collections import Counter
+from collections.abc import Callable, Iterable
+
+logger = logging.getLogger(__name__)
+
+# Fields of a QSO which have to match beside the event for a dupe
+DUPE_RULES = {
+    'call': ('CALL',),
+    'band': ('CALL', 'BAND'),
+    'band-mode': ('CALL', 'BAND', 'MODE'),
+}
+DUPE_DAYS = 2  # Contests last up to 48 hours, logged QSOs of the event from older days are ignored
+
+PORTABLE_SUFFIXES = ('P', 'M', 'MM', 'AM', 'QRP', 'A')
+REGEX_PREFIX = re.compile(r'(.*[0-9])[A-Z]+')
+
+
+def __read_contests__(file: str) -> dict[str, dict]:
+    try:
+        logger.debug(f'Reading JSON data "{file}"...')
+        with open(os.path.join(os.path.dirname(__file__), file)) as jf:
+            return json.load(jf)
+    except OSError:
+        return {}
+
+
+CONTESTS = __read_contests__('data/contests.json')
+
+
+def dupe_start_date(days: int = DUPE_DAYS) -> str:
+    """Get the first date logged QSOs have to be checked against for dupes
+    :param days: the number of days before today (UTC)
+    :return: the date in ADIF format YYYYMMDD"""
+
+    start = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(days=days)
+    return start.strftime('%Y%m%d')
+
+
+def event_key(qso: dict[str, str]) -> tuple[str, ...]:
+    """Get the event a QSO belongs to
+    A contest is identified by its CONTEST_ID, an activation by MY_SIG, MY_SIG_INFO and the UTC day, because
+    activations (e.g. POTA) are counted per day.
+    :param qso: the QSO
+    :return: the event key (empty if the QSO does not belong to an event)"""
+
+    contest = str(qso.get('CONTEST_ID', ''))
+    if contest:
+        return contest.upper(),
+    sig_info = str(qso.get('MY_SIG_INFO', ''))
+    if sig_info:
+        return str(qso.get('MY_SIG', '')).upper(), sig_info.upper(), str(qso.get('QSO_DATE', ''))[:8]
+    return ()
+
+
+class DupeIndex:
+    """Count the QSOs per event and dupe rule fields, so a dupe check is a single dictionary lookup
+    QSOs are counted and not only stored as set, so removing a dupe keeps the QSO it duplicates."""
+
+    def __init__(self, rule: str = 'band-mode'):
+        """
+        :param rule: the dupe rule (one of the keys of DUPE_RULES)"""
+
+        if rule not in DUPE_RULES:
+            raise ValueError(f'Unknown dupe rule "{rule}"')
+        self.__rule__ = rule
+        self.__fields__ = DUPE_RULES[rule]
+        self.__counts__: Counter[tuple[str, ...]] = Counter()
+
+    @property
+    def rule(self) -> str:
+        return self.__rule__
+
+    def __len__(self) -> int:
+        return self.__counts__.total()
+
+    def key(self, qso: dict[str, str]) -> tuple[str, ...] | None:
+        """Get the dupe key of a QSO
+        :param qso: the QSO
+        :return: the key or None if the QSO has no call or does not belong to an event"""
+
+        event = event_key(qso)
+        if not event or not qso.get('CALL'):
+            return None
+        return event + tuple(str(qso.get(f, '')).upper() for f in self.__fields__)
+
+    def add(self, qso: dict[str, str]):
+        """Count a logged QSO
+        :param qso: the QSO"""
+
+        key = self.key(qso)
+        if key:
+            self.__counts__[key] += 1
+
+    def add_records(self, records: Iterable[dict[str, str]]):
+        """Count logged QSOs
+        :param records: the QSOs"""
+
+        for r in records:
+            self.add(r)
+
+    def remove(self, qso: dict[str, str]):
+        """Uncount a QSO which was deleted or is going to be changed
+        :param qso: the QSO"""
+
+        key = self.key(qso)
+        if key and key in self.__counts__:
+            self.__counts__[key] -= 1
+            if self.__counts__[key] <= 0:
+                del self.__counts__[key]
+
+    def is_dupe(self, qso: dict[str, str]) -> bool:
+        """Check if a QSO was already logged regarding the dupe rule
+        :param qso: the new QSO
+        :return: True if the QSO is a dupe"""
+
+        key = self.key(qso)
+        return bool(key) and key in self.__counts__
+
+    def describe(self, qso: dict[str, str]) -> str:
+        """Get the values of a QSO relevant for the dupe rule e.g. for a message
+        :param qso: the QSO
+        :return: the values separated by space"""
+
+        return ' '.join(qso.get(f, '') for f in self.__fields__ if qso.get(f))
+
+
+def contest_definition(contest_id: str) -> dict:
+    """Get the scoring rules of a contest from data/contests.json
+    :param contest_id: the contest id
+    :return: the definition or the DEFAULT definition (one point per QSO) for unknown contests"""
+
+    return CONTESTS.get(contest_id.upper(), CONTESTS.get('DEFAULT', {}))
+
+
+def wpx_prefix(call: str) -> str:
+    """Get the prefix of a call as counted by the CQ WPX contest
+    The prefix reaches up to the last digit of the call (e.g. YY1YYY -> YY1). A prefix designator replaces the call
+    and gets a 0 appended if it has no digit (e.g. DL/YY1YYY -> DL0), a single digit suffix replaces the digit of the
+    prefix (e.g. YY1YYY/3 -> YY3). Calls without digit get a 0 appended to the first two letters.
+    :param call: the call
+    :return: the prefix"""
+
+    parts = [p for p in call.upper().split('/') if p and p not in PORTABLE_SUFFIXES]
+    if not parts:
+        return ''
+
+    call = max(parts, key=len)
+    if len(parts) > 1:
+        other = parts[0] if parts[0] != call else parts[1]
+        if len(other) == 1 and other.isdigit():
+            m = REGEX_PREFIX.fullmatch(call)
+            return (m.group(1)[:-1] if m else call[:2]) + other
+        if other[-1].isdigit():
+            return other
+        m = REGEX_PREFIX.fullmatch(other)
+        return m.group(1) if m else other + '0'
+
+    m = REGEX_PREFIX.fullmatch(call)
+    return m.group(1) if m else call[:2] + '0'
+
+
+class ContestScore:
+    """Keep the QSO points, multipliers and score of a contest up to date with each added or removed QSO
+    The points of dupes count once, the points of the first QSO per dupe key are used. Multipliers are counted
+    per value so removing a QSO removes a multiplier only if it was its last QSO."""
+
+    MULT_FIELDS = {'EXCHANGE': 'SRX_STRING', 'GRID': 'GRIDSQUARE'}
+
+    def __init__(self, definition: dict, key: Callable[[dict[str, str]], tuple | None]):
+        """
+        :param definition: the scoring rules (see contest_definition())
+        :param key: a function getting the dupe key of a QSO (e.g. DupeIndex.key)"""
+
+        self.__points_def__: int | dict[str, int] = definition.get('points', 1)
+        self.__mult_kinds__: tuple[str, ...] = tuple(definition.get('multipliers', ()))
+        self.__per_band__: bool = definition.get('per_band', False)
+        self.__key__ = key
+
+        self.__qso_points__: dict[tuple, list[int]] = {}  # Points of all QSOs per dupe key, the first one counts
+        self.__mults__: Counter[tuple[str, ...]] = Counter()
+        self.__points__ = 0
+
+    @property
+    def points(self) -> int:
+        return self.__points__
+
+    @property
+    def qsos(self) -> int:
+        """The number of QSOs without dupes"""
+        return len(self.__qso_points__)
+
+    @property
+    def multipliers(self) -> int:
+        return len(self.__mults__)
+
+    @property
+    def score(self) -> int:
+        return self.__points__ * len(self.__mults__) if self.__mult_kinds__ else self.__points__
+
+    def __str__(self) -> str:
+        if self.__mult_kinds__:
+            return f'Score {self.score} ({self.__points__}x{len(self.__mults__)})'
+        return f'Score {self.score}'
+
+    def points_of(self, qso: dict[str, str]) -> int:
+        """Get the points of a QSO
+        :param qso: the QSO
+        :return: the points by mode or the points of any QSO"""
+
+        if isinstance(self.__points_def__, dict):
+            return self.__points_def__.get(qso.get('MODE', '').upper(), self.__points_def__.get('*', 1))
+        return self.__points_def__
+
+    def multipliers_of(self, qso: dict[str, str]) -> list[tuple[str, ...]]:
+        """Get the multipliers of a QSO
+        :param qso: the QSO
+        :return: the multipliers as tuples of kind, value and if counted per band the band"""
+
+        mults = []
+        for kind in self.__mult_kinds__:
+            if kind == 'PREFIX':
+                value = wpx_prefix(qso.get('CALL', ''))
+            elif kind == 'GRID':
+                value = qso.get('GRIDSQUARE', '')[:4].upper()
+            else:
+                value = str(qso.get(self.MULT_FIELDS.get(kind, kind), '')).upper()
+            if value:
+                mults.append((kind, value, qso.get('BAND', '').lower()) if self.__per_band__ else (kind, value))
+        return mults
+
+    def add(self, qso: dict[str, str]) -> tuple[int, int]:
+        """Add a QSO to the score
+        :param qso: the QSO
+        :return: the points gained (0 for a dupe) and the number of new multipliers"""
+
+        key = self.__key__(qso)
+        if not key:
+            return 0, 0
+
+        points = self.points_of(qso)
+        gained = 0
+        if key in self.__qso_points__:
+            self.__qso_points__[key].append(points)
+        else:
+            self.__qso_points__[key] = [points]
+            self.__points__ += points
+            gained = points
+
+        new_mults = 0
+        for m in self.multipliers_of(qso):
+            if not self.__mults__[m]:
+                new_mults += 1
+            self.__mults__[m] += 1
+        return gained, new_mults
+
+    def remove(self, qso: dict[str, str]):
+        """Remove a QSO from the score e.g. after it was deleted
+        :param qso: the QSO"""
+
+        key = self.__key__(qso)
+        points_list = self.__qso_points__.get(key) if key else None
+        if not points_list:
+            return
+
+        points = self.points_of(qso)
+        counted = points_list[0]
+        points_list.remove(points if points in points_list else counted)
+        if points_list:
+            self.__points__ += points_list[0] - counted
+        else:
+            del self.__qso_points__[key]
+            self.__points__ -= counted
+
+        for m in self.multipliers_of(qso):
+            if self.__mults__[m] > 1:
+                self.__mults__[m] -= 1
+            else:
+                self.__mults__.pop(m, None)
@@ -0,0 +1,190 @@
+# Copyright 2024 by Andreas Schawo, licensed under CC BY-SA 4.0
+
+"""Resolve the DXCC entity, continent and zones of a callsign from a country file (cty.dat or cty.csv)"""
+
+import re
+import logging
+from functools import lru_cache
+from typing import NamedTuple
+from collections.abc import Iterator
+
+logger = logging.getLogger(__name__)
+
+CACHE_SIZE = 64 * 1024  # Resolved calls kept in memory
+ENTITY_FIELDS = ('COUNTRY', 'DXCC', 'CONT', 'CQZ', 'ITUZ')
+
+# Suffixes not changing the entity, /MM and /AM are not in any entity
+PORTABLE_SUFFIXES = ('P', 'M', 'A', 'R', 'T', 'QRP', 'LH')
+NO_ENTITY_SUFFIXES = ('MM', 'AM')
+
+# Alias of a prefix or call (=) with optional overrides of CQ zone (), ITU zone [], coordinates <>,
+# continent {} and time zone ~~
+REGEX_ALIAS = re.compile(r'(=?)([A-Z0-9/]+)((?:\([0-9]+\)|\[[0-9]+]|<[^>]*>|\{[A-Z]{2}}|~[^~]*~)*)')
+REGEX_OVERRIDE = re.compile(r'\(([0-9]+)\)|\[([0-9]+)]|\{([A-Z]{2})}')
+
+
+class Entity(NamedTuple):
+    name: str
+    dxcc: str  # ADIF DXCC entity code, empty if the country file does not provide it (cty.dat)
+    cont: str
+    cqz: str
+    ituz: str
+    prefix: str
+
+    def to_adif_dict(self) -> dict[str, str]:
+        """Get the ADIF fields of the entity
+        :return: the fields COUNTRY, DXCC (if known), CONT, CQZ and ITUZ"""
+
+        fields = {'COUNTRY': self.name, 'DXCC': self.dxcc, 'CONT': self.cont, 'CQZ': self.cqz, 'ITUZ': self.ituz}
+        return {f: v for f, v in fields.items() if v}
+
+
+class CtyIndex:
+    """Longest prefix match of callsigns against the prefixes of a country file held in a trie
+    Calls listed explicitly (= in the country file) are matched exactly before. Resolved calls are memoized
+    in a bounded LRU cache, so recurring calls of a contest or a large log are resolved only once."""
+
+    def __init__(self, cache_size: int = CACHE_SIZE):
+        """
+        :param cache_size: the maximum number of resolved calls to memoize"""
+
+        self.__trie__: dict = {}
+        self.__exact__: dict[str, Entity] = {}
+        self.__entities__ = 0
+        self.__cached_resolve__ = lru_cache(maxsize=cache_size)(self.__resolve__)
+
+    def __len__(self) -> int:
+        return self.__entities__
+
+    @classmethod
+    def load(cls, file: str, wae: bool = False) -> 'CtyIndex':
+        """Load a country file in the format of cty.dat or cty.csv (by extension .csv)
+        :param file: the country file
+        :param wae: include entities only valid for the WAE award (prefixed with * e.g. *TA1)
+        :return: the index"""
+
+        index = cls()
+        with open(file, encoding='utf-8', errors='replace') as f:
+            text = f.read()
+        entries = read_cty_csv(text) if file.lower().endswith('.csv') else read_cty_dat(text)
+        for entity, aliases in entries:
+            if entity.prefix.startswith('*') and not wae:
+                continue
+            index.add(entity, aliases)
+        logger.info(f'Loaded {len(index)} entities from "{file}"')
+        return index
+
+    def add(self, entity: Entity, aliases: list[str]):
+        """Add an entity with its prefixes and calls
+        :param entity: the entity
+        :param aliases: the prefixes and calls (starting with =) with optional overrides"""
+
+        self.__entities__ += 1
+        for alias in aliases:
+            m = REGEX_ALIAS.fullmatch(alias.strip().upper())
+            if not m:
+                continue
+            exact, prefix, overrides = m.groups()
+
+            target = entity
+            if overrides:
+                changes = {}
+                for cqz, ituz, cont in REGEX_OVERRIDE.findall(overrides):
+                    if cqz:
+                        changes['cqz'] = cqz.lstrip('0')
+                    if ituz:
+                        changes['ituz'] = ituz.lstrip('0')
+                    if cont:
+                        changes['cont'] = cont
+                if changes:
+                    target = entity._replace(**changes)
+
+            if exact:
+                self.__exact__[prefix] = target
+            else:
+                node = self.__trie__
+                for c in prefix:
+                    node = node.setdefault(c, {})
+                node[''] = target
+        self.__cached_resolve__.cache_clear()
+
+    def __longest__(self, call: str) -> Entity | None:
+        node = self.__trie__
+        found = None
+        for c in call:
+            node = node.get(c)
+            if node is None:
+                break
+            found = node.get('', found)
+        return found
+
+    def resolve(self, call: str) -> Entity | None:
+        """Get the entity of a call regarding prefix designators (XX/CALL, CALL/XX) and portable suffixes
+        :param call: the call
+        :return: the entity or None if no prefix matches or the call is maritime or aeronautical mobile"""
+
+        return self.__cached_resolve__(call)
+
+    def __resolve__(self, call: str) -> Entity | None:
+        call = call.upper()
+        entity = self.__exact__.get(call)
+        if entity or '/' not in call:
+            return entity or self.__longest__(call)
+
+        parts = call.split('/')
+        if parts[-1] in NO_ENTITY_SUFFIXES:
+            return None
+        parts = [p for i, p in enumerate(parts) if p and not (i > 0 and (p in PORTABLE_SUFFIXES or p.isdigit()))]
+        if not parts:
+            return None
+        if len(parts) == 1:
+            return self.__exact__.get(parts[0]) or self.__longest__(parts[0])
+
+        # A prefix designator (XX/CALL or CALL/XX) is the shorter part
+        base = max(range(len(parts)), key=lambda i: len(parts[i]))
+        designator = min(parts[:base] + parts[base + 1:], key=len)
+        return self.__longest__(designator)
+
+    def annotate(self, record: dict[str, str]) -> Entity | None:
+        """Set the entity fields (ENTITY_FIELDS) of a record by its call, former values are removed
+        :param record: the record
+        :return: the entity or None if the call is not resolved"""
+
+        for f in ENTITY_FIELDS:
+            record.pop(f, None)
+        entity = self.resolve(record.get('CALL', '')) if record.get('CALL') else None
+        if entity:
+            record.update(entity.to_adif_dict())
+        return entity
+
+
+def read_cty_dat(text: str) -> Iterator[tuple[Entity, list[str]]]:
+    """Parse a country file in the format of cty.dat (e.g. from country-files.com)
+    Each entity starts with a line of 8 fields separated by colons (name, CQ zone, ITU zone, continent, latitude,
+    longitude, time offset, primary prefix) followed by its prefixes separated by commas and terminated by ;
+    :param text: the content of the file
+    :return: an iterator over tuples of entity and its aliases"""
+
+    for block in text.split(';'):
+        parts = block.split(':')
+        if len(parts) != 9:
+            continue
+        name, cqz, ituz, cont, _, _, _, prefix, aliases = (p.strip() for p in parts)
+        entity = Entity(name, '', cont.upper(), cqz.lstrip('0'), ituz.lstrip('0'), prefix.upper())
+        yield entity, [a for a in aliases.replace('\n', '').split(',') if a.strip()]
+
+
+def read_cty_csv(text: str) -> Iterator[tuple[Entity, list[str]]]:
+    """Parse a country file in the format of cty.csv (e.g. from country-files.com)
+    Each line has the fields primary prefix, name, DXCC code, continent, CQ zone, ITU zone, latitude, longitude,
+    time offset and the prefixes separated by spaces and terminated by ;
+    :param text: the content of the file
+    :return: an iterator over tuples of entity and its aliases"""
+
+    for line in text.splitlines():
+        parts = line.split(',', 9)
+        if len(parts) != 10:
+            continue
+        prefix, name, dxcc, cont, cqz, ituz, _, _, _, aliases = (p.strip() for p in parts)
+        entity = Entity(name, dxcc, cont.upper(), cqz.lstrip('0'), ituz.lstrip('0'), prefix.upper())
+        yield entity, aliases.rstrip(';').split()
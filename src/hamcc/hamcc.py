@@ -6,11 +6,22 @@ import os
 import re
 import sys
 import json
-from copy import deepcopy
 import datetime
 import logging
+from collections.abc import Iterable, Iterator
 
 from . import __proj_name__, __version_str__
+from .callindex import CallIndex
+from .scp import ScpIndex
+from .bktree import BKTree
+from .contest import DupeIndex, ContestScore, contest_definition
+from .rate import RateMeter
+from .history import CallHistory
+from .dxcc import CtyIndex, ENTITY_FIELDS
+from .bandplan import band_of, check_freq
+from .locator import distance, adif_distance
+from .journal import QSOJournal
+from .validators import is_call, split_call, is_rst, is_locator, split_qth
 
 logger = logging.getLogger(__name__)
 
@@ -50,6 +61,35 @@ def adif_time2iso(time: str) -> str | None:
     return time[:2] + ':' + time[2:4]
 
 
+class QSO(dict):
+    """A QSO as a dictionary of ADIF compatible keys and values
+    As all values are plain strings a shallow copy is sufficient. Field names and values which repeat a lot
+    (e.g. band, mode, date) are interned to share memory if many QSOs are loaded."""
+
+    __slots__ = ()
+
+    INTERN_FIELDS = frozenset(('STATION_CALLSIGN', 'MY_GRIDSQUARE', 'MY_CITY', 'MY_NAME',
+                               'QSO_DATE', 'BAND', 'MODE', 'FREQ', 'TX_PWR',
+                               'RST_RCVD', 'RST_SENT', 'QSL_RCVD', 'CONTEST_ID', 'MY_SIG', 'SIG'))
+
+    @classmethod
+    def from_dict(cls, record: dict[str, str]) -> 'QSO':
+        """Create a QSO from a record e.g. loaded from an ADIF file
+        :param record: the record as a dictionary of ADIF compatible keys and values
+        :return: a QSO"""
+
+        intern = sys.intern
+        return cls((intern(f), intern(v) if f in cls.INTERN_FIELDS and type(v) is str else v)
+                   for f, v in record.items())
+
+    def copy(self) -> 'QSO':
+        return QSO(self)
+
+    def to_adif_dict(self) -> dict[str, str]:
+        """Return the QSO as a plain dictionary e.g. to be serialised to ADIF"""
+        return dict(self)
+
+
 class CassiopeiaConsole:
     # These are some hostilog compatible definitions
     # Credits to Peter, DF1LX the author of hostilog which inspired me to write hamcc
@@ -96,6 +136,14 @@ class CassiopeiaConsole:
                       'GRIDSQUARE',
                       ]
 
+    # Session values carried over from one QSO to the next (attributes __<name>__)
+    SESSION_FIELDS = ('my_call', 'my_loc', 'my_qth', 'my_name', 'online', 'date', 'time', 'band', 'mode',
+                      'freq', 'pwr', 'comment', 'event', 'event_ref')
+
+    # Fields used from a previous QSO to initialise the session
+    INIT_FIELDS = ('STATION_CALLSIGN', 'MY_GRIDSQUARE', 'MY_CITY', 'MY_NAME', 'QSO_DATE', 'TIME_ON',
+                   'BAND', 'MODE', 'FREQ', 'TX_PWR', 'COMMENT')
+
     REGEX_TIME = re.compile(r'(([0-1][0-9])|(2[0-3]))([0-5][0-9])')
     REGEX_DATE = re.compile(r'([1-9][0-9]{3})((0[1-9])|(1[0-2]))((0[1-9])|([1-2][0-9])|(3[0-1]))')
     REGEX_CALL = re.compile(
@@ -104,11 +152,21 @@ class CassiopeiaConsole:
     REGEX_LOCATOR = re.compile(r'[a-rA-R]{2}[0-9]{2}([a-xA-X]{2}([0-9]{2})?)?')
     REGEX_QTH = re.compile(r'(.*?)? *\(([a-rA-R]{2}[0-9]{2}([a-xA-X]{2}([0-9]{2})?)?)\)')
 
+    # Runs of plain characters for evaluate_line() in normal and in quoted long mode
+    REGEX_WORD_RUN = re.compile(r'[^ "\n~?\b]*')
+    REGEX_LONG_RUN = re.compile(r'[^"\n\b]*')
+
+    # Precomputed lookup tables for evaluate()
+    BAND_LOOKUP = frozenset(b for b in BANDS if b.endswith('m'))
+    MODE_LOOKUP = {**MODES_HOSTI, **{m: m for m in MODES}}
+
     def __init__(self, my_call: str = '', my_loc: str = '', my_name: str = '',
                  event: str = '', event_ref: int = 1,
-                 init_qso: dict[str, str] = None, init_worked: dict[str, tuple[str, str]] = None, online=False):
+                 init_qso: dict[str, str] = None, init_worked: dict[str, tuple[str, str]] = None, online=False,
+                 scp: ScpIndex = None, suggest_similar=False, dupe_rule: str = 'band-mode',
+                 history: CallHistory = None, cty: CtyIndex = None, journal: QSOJournal = None):
         logger.debug('Initialising...')
-        if my_call and not self.check_format(self.REGEX_CALL, my_call):
+        if my_call and not self.check_call(my_call):
             raise Exception('Wrong call format')
         self.__my_call__ = init_qso['STATION_CALLSIGN'] if init_qso and 'STATION_CALLSIGN' in init_qso else ''
         if my_call:
@@ -116,9 +174,9 @@ class CassiopeiaConsole:
 
         self.__my_loc__ = init_qso['MY_GRIDSQUARE'] if init_qso and 'MY_GRIDSQUARE' in init_qso else ''
         self.__my_qth__ = init_qso['MY_CITY'] if init_qso and 'MY_CITY' in init_qso else ''
-        if my_loc and (not self.check_format(self.REGEX_LOCATOR, my_loc) and not self.check_qth(my_loc)):
+        if my_loc and (not self.check_locator(my_loc) and not self.check_qth(my_loc)):
             raise Exception('Wrong QTH/maidenhead format')
-        if self.check_format(self.REGEX_LOCATOR, my_loc):
+        if self.check_locator(my_loc):
             self.__my_loc__ = my_loc
         elif self.check_qth(my_loc):
             qth, loc = self.check_qth(my_loc)
@@ -131,7 +189,7 @@ class CassiopeiaConsole:
         if my_name:
             self.__my_name__ = my_name
 
-        self.__qsos__: list[dict] = []
+        self.__qsos__: list[QSO] = []
         self.__online__ = online
 
         # Mandatory
@@ -158,9 +216,22 @@ class CassiopeiaConsole:
             except ValueError:
                 self.__event_ref__ = event_ref
         else:
-            self.__event_ref__ = event_ref
+            self.__event_ref__ = str(event_ref).upper()  # The reference e.g. DE-0001 is stored to MY_SIG_INFO
 
         self.__worked_calls__: dict[str, tuple[str, str]] = init_worked if type(init_worked) is dict else {}
+        self.__call_index__: CallIndex | None = None  # Built on first partial lookup
+        self.__scp__ = scp
+        self.__suggest_similar__ = suggest_similar
+        self.__similar_index__: BKTree | None = None  # Built on first similarity lookup
+        self.__dupes__ = DupeIndex(dupe_rule)
+        self.__scores__: dict[str, ContestScore] = {}
+        self.__rate__ = RateMeter()
+        self.__history__ = history
+        self.__prefilled__: dict[str, str] = {}  # Values of the current QSO taken from the call history
+        self.__band_entered__ = False  # The band was typed for the current QSO, not carried over
+        self.__cty__ = cty
+        self.__journal__ = journal
+        self.__edit_orig__: dict[str, str] = {}  # The QSO loaded for editing before any change
 
         self.__edit_pos__ = -1
         self.__cur_seq__ = ''
@@ -168,6 +239,27 @@ class CassiopeiaConsole:
 
         self.__cur_qso__ = {}
         self.__qso_active__ = False
+
+        # Dispatch tables for evaluate() keyed on the first character and for numbers on the suffix
+        self.__prefix_evaluators__ = {
+            '#': self.evaluate_comment,
+            '\'': self.evaluate_name,
+            '@': lambda seq: self.evaluate_locator(seq[1:]),
+            '$': lambda seq: self.evaluate_event(seq[1:].upper()),
+            '%': self.evaluate_exchange,
+            '.': self.evaluate_rst,
+            ',': self.evaluate_rst,
+            '*': self.evaluate_qsl,
+            '=': self.evaluate_sync,
+            '-': self.evaluate_extended,
+        }
+        self.__numeric_evaluators__ = {
+            'd': self.evaluate_date,
+            't': self.evaluate_time,
+            'f': self.evaluate_freq,
+            'p': self.evaluate_pwr,
+        }
+
         self.clear()
 
     def is_sig(self) -> bool:
@@ -219,6 +311,48 @@ class CassiopeiaConsole:
 
         return ''
 
+    def evaluate_line(self, line: str) -> list[tuple[str, str]]:
+        """Evaluate a whole line of input in one pass
+        The result is the same as appending the line char by char via append_char but avoids the per char overhead.
+        Quotes, ~, ?, backspace and linefeed are handled the same way, an unfinished sequence is kept for further input
+        :param line: the characters to add
+        :return: list of tuples (sequence, result) for each evaluated sequence or command"""
+
+        results = []
+        pos = 0
+        end = len(line)
+        while pos < end:
+            run = (self.REGEX_LONG_RUN if self.__long_mode__ else self.REGEX_WORD_RUN).match(line, pos)
+            self.__cur_seq__ += run.group()
+            pos = run.end()
+            if pos == end:
+                break
+
+            char = line[pos]
+            pos += 1
+            if char == '\b':
+                self.__cur_seq__ = self.__cur_seq__[:-1]
+            elif char == '\n':
+                seq = self.__cur_seq__
+                results.append((seq, self.finalize_qso()))
+            elif char in ' "':
+                if char == ' ' or self.__long_mode__:
+                    seq = self.__cur_seq__
+                    res = self.evaluate(seq)
+                    self.__cur_seq__ = ''
+                    self.__long_mode__ = False
+                    if seq or res:
+                        results.append((seq, res))
+                else:
+                    self.__long_mode__ = True
+            elif char == '~':
+                self.__cur_seq__ = ''
+                self.clear()
+            else:  # ?
+                results.append((char, str(self.current_qso)))
+
+        return results
+
     @staticmethod
     def check_format(exp: re.Pattern, txt: str) -> bool:
         """Test the given text against a regular expression
@@ -227,23 +361,44 @@ class CassiopeiaConsole:
         :return: True if pattern matches"""
         return bool(re.fullmatch(exp, txt))
 
+    @staticmethod
+    def check_call(txt: str) -> bool:
+        """Test if the text is a call (same as REGEX_CALL but in linear time)
+        :param txt: a text
+        :return: True if valid"""
+        return is_call(txt)
+
+    @staticmethod
+    def check_locator(txt: str) -> bool:
+        """Test if the text is a maidenhead locator (same as REGEX_LOCATOR but in linear time)
+        :param txt: a text
+        :return: True if valid"""
+        return is_locator(txt)
+
+    @staticmethod
+    def check_rst(txt: str) -> bool:
+        """Test if the text is a RST value (same as REGEX_RSTFIELD but in linear time)
+        :param txt: a text
+        :return: True if valid"""
+        return is_rst(txt)
+
     def check_qth(self, qth_loc: str) -> None | tuple:
-        """Test a QTH + locator against a regular expression
+        """Test a QTH + locator (same as REGEX_QTH but in linear time)
         :param qth_loc: "QTH (locator)"
         :return: tuple of parts ('QTH', 'locator')"""
 
-        m = re.fullmatch(self.REGEX_QTH, qth_loc.strip())
-        if m:
-            return m.groups()[:2]
-        else:
-            return None
+        return split_qth(qth_loc.strip())
 
     def clear(self):
         """Clear current QSO (input cache)"""
 
+        if 0 <= self.__edit_pos__ < len(self.__qsos__):
+            self.__leave_edit__()
         self.__edit_pos__ = -1
         self.__qso_active__ = False
         self.__long_mode__ = False
+        self.__prefilled__ = {}
+        self.__band_entered__ = False
 
         if self.__online__:
             date, time = get_cur_adif_dt()
@@ -311,7 +466,12 @@ class CassiopeiaConsole:
         # Special
         self.__event__ = ''
         self.__event_ref__: int | str = 0
-        self.__worked_calls__ = []
+        self.__worked_calls__ = {}
+        self.__call_index__ = None
+        self.__dupes__ = DupeIndex(self.__dupes__.rule)
+        self.__scores__ = {}
+        self.__rate__ = RateMeter()
+        self.__similar_index__ = None
 
         self.clear()
 
@@ -319,7 +479,7 @@ class CassiopeiaConsole:
         """Append a QSO to stack
         Missing fields will be initialised and the call will be added to 'worked before'
         :param qso: the QSO as a dictionary of ADIF compatible keys and values"""
-        _qso = deepcopy(qso)
+        _qso = QSO.from_dict(qso)
 
         for f in self.QSO_REQ_FIELDS:
             if f not in _qso:
@@ -331,7 +491,8 @@ class CassiopeiaConsole:
                     _qso[f] = ''
 
         if _qso["CALL"]:
-            self.__worked_calls__[_qso["CALL"]] = (qso['QSO_DATE'], qso['TIME_ON'])
+            self.__add_worked__(_qso)
+        self.__add_to_indexes__(_qso)
 
         self.__qsos__.append(_qso)
 
@@ -344,7 +505,7 @@ class CassiopeiaConsole:
         self.__long_mode__ = False
 
         if self.__qso_active__:
-            qso = deepcopy(self.__cur_qso__)
+            qso = QSO(self.__cur_qso__)
 
             if qso["CALL"]:
                 res = f'Last QSO cached: {qso["CALL"]}'
@@ -357,20 +518,173 @@ class CassiopeiaConsole:
             if '*' in qso['TIME_ON']:
                 qso['TIME_ON'] = time
 
+            self.__annotate__(qso if self.__edit_pos__ == -1 else self.__cur_qso__)
+            self.__set_distance__(qso if self.__edit_pos__ == -1 else self.__cur_qso__)
+
             if self.__edit_pos__ == -1:
                 self.__qsos__.append(qso)
                 if qso["CALL"]:
-                    self.__worked_calls__[qso["CALL"]] = (qso['QSO_DATE'], qso['TIME_ON'])
+                    self.__add_worked__(qso)
+                self.__add_to_indexes__(qso)
+                if self.__journal__ is not None:
+                    self.__journal__.add(qso)
             else:
                 self.__qsos__[self.__edit_pos__] = self.__cur_qso__
 
-            self.clear()
+            self.clear()  # Counts an edited QSO again
 
             if self.__event__:
                 self.finalize_event()
 
         return res
 
+    @staticmethod
+    def __set_distance__(qso: dict[str, str]):
+        # A logged or imported distance is kept, it is removed if a locator is changed
+        if 'DISTANCE' in qso:
+            return
+        try:
+            qso['DISTANCE'] = adif_distance(distance(qso['MY_GRIDSQUARE'], qso['GRIDSQUARE']))
+        except (KeyError, ValueError):
+            pass
+
+    def __annotate__(self, qso: dict[str, str]):
+        # Only valid calls are resolved, the entity of a former call is removed in any case
+        if self.__cty__ is None:
+            return
+        if self.check_call(qso.get('CALL', '')):
+            self.__cty__.annotate(qso)
+        else:
+            for f in ENTITY_FIELDS:
+                qso.pop(f, None)
+
+    def __add_worked__(self, qso: QSO):
+        self.__worked_calls__[qso["CALL"]] = (qso['QSO_DATE'], qso['TIME_ON'])
+        if self.__call_index__ is not None:
+            self.__call_index__.add(qso["CALL"])
+        if self.__similar_index__ is not None:
+            self.__similar_index__.add(qso["CALL"])
+        if self.__history__ is not None:
+            self.__history__.add(qso)
+
+    def __add_to_indexes__(self, qso: dict[str, str]):
+        self.__dupes__.add(qso)
+        self.__rate__.add(qso)
+        score = self.__score_of__(qso)
+        if score:
+            score.add(qso)
+
+    def __remove_from_indexes__(self, qso: dict[str, str]):
+        self.__dupes__.remove(qso)
+        self.__rate__.remove(qso)
+        score = self.__score_of__(qso)
+        if score:
+            score.remove(qso)
+
+    def __score_of__(self, qso: dict[str, str]) -> ContestScore | None:
+        contest = qso.get('CONTEST_ID', '').upper()
+        if not contest:
+            return None
+        if contest not in self.__scores__:
+            self.__scores__[contest] = ContestScore(contest_definition(contest), self.__dupes__.key)
+        return self.__scores__[contest]
+
+    @property
+    def score(self) -> ContestScore | None:
+        """The score of the current contest (None if not in a contest)"""
+        return self.__score_of__(self.__cur_qso__)
+
+    def rates(self) -> tuple[int, int, int]:
+        """Get the QSO rates in QSOs per hour regarding the QSO times
+        :return: the rate of the last 10 minutes, of the last 60 minutes and the best hour so far"""
+
+        return self.__rate__.rates()
+
+    def add_logged(self, records: Iterable[dict[str, str]]):
+        """Add QSOs already stored in the log to the dupe check, score and rate without adding them to the stack
+        :param records: the QSOs"""
+
+        for r in records:
+            self.__add_to_indexes__(r)
+
+    def session_state(self) -> dict:
+        """Get the values carried over to the next QSO e.g. band, mode, date and time
+        :return: the values by name of SESSION_FIELDS"""
+
+        return {f: getattr(self, f'__{f}__') for f in self.SESSION_FIELDS}
+
+    def restore_session(self, state: dict):
+        """Continue a session from values taken with session_state, the current QSO is cleared
+        :param state: the values by name of SESSION_FIELDS"""
+
+        for f in self.SESSION_FIELDS:
+            setattr(self, f'__{f}__', state[f])
+        self.clear()
+
+    def is_dupe(self, qso: dict[str, str] = None) -> bool:
+        """Check if a QSO was already logged in the current contest or activation regarding the dupe rule
+        :param qso: the QSO (default: the current QSO)
+        :return: True if the QSO is a dupe"""
+
+        return self.__dupes__.is_dupe(self.__cur_qso__ if qso is None else qso)
+
+    def partial_calls(self, fragment: str = None, limit: int = 5) -> list[str]:
+        """Get worked before calls matching a fragment of a call, calls starting with the fragment first
+        :param fragment: the fragment (default: the sequence currently typed)
+        :param limit: the maximum number of calls
+        :return: the list of matching calls (empty if the fragment is shorter than two chars or no call fragment)"""
+
+        fragment = self.__call_fragment__(fragment)
+        if not fragment:
+            return []
+
+        if self.__call_index__ is None:
+            self.__call_index__ = CallIndex(self.__worked_calls__)
+        return self.__call_index__.matches(fragment, limit)
+
+    def scp_calls(self, fragment: str = None, limit: int = 5) -> list[str]:
+        """Get known calls from the Super Check Partial index containing a fragment of a call
+        :param fragment: the fragment (default: the sequence currently typed)
+        :param limit: the maximum number of calls
+        :return: the list of matching calls (empty if no SCP is loaded or no call fragment is given)"""
+
+        fragment = self.__call_fragment__(fragment)
+        if not fragment or self.__scp__ is None:
+            return []
+        return self.__scp__.containing(fragment, limit)
+
+    def similar_calls(self, call: str, max_dist: int = 2, limit: int = 5) -> list[str]:
+        """Get known calls (worked before or from SCP) similar to a call e.g. to detect a busted call
+        Calls with an edit distance of 1 are preferred, calls with a higher distance are only searched if there
+        are none. Only available if the instance was created with suggest_similar.
+        :param call: the call
+        :param max_dist: the maximum edit distance
+        :param limit: the maximum number of calls
+        :return: the list of similar calls sorted by distance"""
+
+        if not self.__suggest_similar__:
+            return []
+
+        if self.__similar_index__ is None:
+            logger.debug('Building index for similar calls...')
+            self.__similar_index__ = BKTree(self.__worked_calls__)
+            if self.__scp__ is not None:
+                for c in self.__scp__:
+                    self.__similar_index__.add(c)
+
+        found = self.__similar_index__.search(call, 1)
+        if max_dist > 1 and not any(d for d, _ in found):
+            found = self.__similar_index__.search(call, max_dist)
+        return [c for d, c in found if d > 0][:limit]
+
+    def __call_fragment__(self, fragment: str | None) -> str:
+        if fragment is None:
+            fragment = '' if self.__long_mode__ else self.__cur_seq__
+        plain = fragment.replace('/', '')
+        if len(fragment) < 2 or not plain.isalnum() or plain.isdecimal():
+            return ''
+        return fragment
+
     def finalize_event(self):
         if not self.is_sig():
             if type(self.__event_ref__) is int:
@@ -381,7 +695,7 @@ class CassiopeiaConsole:
                 self.__cur_qso__['STX_STRING'] = self.__event_ref__
 
     @property
-    def qsos(self) -> list[dict]:
+    def qsos(self) -> list[QSO]:
         """Return the list of QSOs"""
         return self.__qsos__
 
@@ -394,39 +708,73 @@ class CassiopeiaConsole:
         """Test if QSOs are available in the QSO stack"""
         return bool(self.__qsos__)
 
-    def pop_qso(self, __index=0) -> dict:
+    def pop_qso(self, __index=0) -> QSO:
         """Remove a QSO from the stack and return it
         :param __index: the index of the QSO to remove from stack (default: first)
         :return: a QSO"""
         self.clear()
         return self.__qsos__.pop(__index)
 
+    def drain_qsos(self) -> Iterator[QSO]:
+        """Remove all QSOs from the stack in order while iterating
+        QSOs are removed in bulk after iteration. If iteration stops early e.g. due to an error while writing,
+        only the QSOs which were consumed completely will be removed.
+        :return: an iterator over the QSOs"""
+
+        qsos = self.__qsos__
+        done = 0
+        try:
+            for qso in qsos:
+                yield qso
+                done += 1
+        finally:
+            if done:
+                self.clear()
+                del qsos[:done]
+
     @property
     def edit_pos(self):
         return self.__edit_pos__
 
     def load_prev(self):
         if self.qsos:
+            if self.__edit_pos__ != -1:
+                self.__leave_edit__()
             if self.__edit_pos__ in (-1, 0):
                 self.__edit_pos__ = len(self.qsos) - 1
             else:
                 self.__edit_pos__ -= 1
-
-            self.__cur_qso__ = self.__qsos__[self.__edit_pos__]
+            self.__enter_edit__()
 
     def load_next(self):
         if self.qsos:
+            if self.__edit_pos__ != -1:
+                self.__leave_edit__()
             if self.__edit_pos__ in (-1, len(self.qsos) - 1):
                 self.__edit_pos__ = 0
             else:
                 self.__edit_pos__ += 1
+            self.__enter_edit__()
 
-            self.__cur_qso__ = self.__qsos__[self.__edit_pos__]
+    def __enter_edit__(self):
+        self.__cur_qso__ = self.__qsos__[self.__edit_pos__]
+        self.__edit_orig__ = dict(self.__cur_qso__)
+        self.__remove_from_indexes__(self.__cur_qso__)  # Counted again when editing ends
+
+    def __leave_edit__(self):
+        # The QSO was uncounted while loaded for editing
+        qso = self.__qsos__[self.__edit_pos__]
+        self.__add_to_indexes__(qso)
+        if self.__journal__ is not None and qso != self.__edit_orig__:
+            self.__journal__.set(self.__edit_pos__, qso)
+        self.__edit_orig__ = {}
 
     def del_selected(self) -> int:
         if self.__edit_pos__ != -1:
             del_pos = self.__edit_pos__
-            self.pop_qso(self.__edit_pos__)
+            self.__remove_from_indexes__(self.pop_qso(self.__edit_pos__))
+            if self.__journal__ is not None:
+                self.__journal__.delete(del_pos)
             return del_pos
 
         return -1
@@ -460,42 +808,73 @@ class CassiopeiaConsole:
         return not number.startswith('.') and number.replace('.', '').isnumeric() and number.count('.') <= 1
 
     def evaluate_numeric(self, seq: str) -> str:
-        if seq.endswith('d'):
-            d = seq[:-1]
-            if len(d) == 6:  # fill to last century
-                d = self.__date__[:2] + d
-            elif len(d) == 4:  # fill to last year
-                d = self.__date__[:4] + d
-            elif len(d) == 2:  # fill to last year and month
-                d = self.__date__[:6] + d
-            if not self.check_format(self.REGEX_DATE, d):
-                return 'Error: Wrong date format'
-            self.__date__ = d
-            self.__cur_qso__['QSO_DATE'] = d
-        elif seq.endswith('t'):
-            t = seq[:-1]
-            if len(t) == 2:  # if only minutes are given fill hour with old time
-                t = self.__time__[:2] + t
-            if not self.check_format(self.REGEX_TIME, t):
-                return 'Error: Wrong time format'
-            self.__time__ = t
-            self.__cur_qso__['TIME_ON'] = self.__time__
-        elif seq.endswith('f'):
-            if seq[:-1] != '0':
-                self.__freq__ = f'{float(seq[:-1]) / 1000:0.6f}'.rstrip('0').rstrip('.')
-                self.__cur_qso__['FREQ'] = self.__freq__
-            else:
-                self.__freq__ = ''
-                self.__cur_qso__.pop('FREQ', '')
-        elif seq.endswith('p'):
-            if seq[:-1] != '0':
-                self.__pwr__ = seq[:-1]
-                self.__cur_qso__['TX_PWR'] = self.__pwr__
-            else:
-                self.__pwr__ = ''
-                self.__cur_qso__.pop('TX_PWR', '')
+        evaluator = self.__numeric_evaluators__.get(seq[-1])
+        if evaluator:
+            return evaluator(seq[:-1])
+        return 'Error: Unknown number format'
+
+    def evaluate_date(self, d: str) -> str:
+        if len(d) == 6:  # fill to last century
+            d = self.__date__[:2] + d
+        elif len(d) == 4:  # fill to last year
+            d = self.__date__[:4] + d
+        elif len(d) == 2:  # fill to last year and month
+            d = self.__date__[:6] + d
+        if not self.check_format(self.REGEX_DATE, d):
+            return 'Error: Wrong date format'
+        self.__date__ = d
+        self.__cur_qso__['QSO_DATE'] = d
+        return ''
+
+    def evaluate_time(self, t: str) -> str:
+        if len(t) == 2:  # if only minutes are given fill hour with old time
+            t = self.__time__[:2] + t
+        if not self.check_format(self.REGEX_TIME, t):
+            return 'Error: Wrong time format'
+        self.__time__ = t
+        self.__cur_qso__['TIME_ON'] = self.__time__
+        return ''
+
+    def evaluate_freq(self, freq: str) -> str:
+        if freq != '0':
+            self.__freq__ = f'{float(freq) / 1000:0.6f}'.rstrip('0').rstrip('.')
+            self.__cur_qso__['FREQ'] = self.__freq__
+            if self.__band_entered__ and self.__cur_qso__.get('BAND'):
+                # Keep the band typed for this QSO
+                problem = check_freq(self.__freq__, self.__cur_qso__['BAND'])
+                return f'Warning: {problem}' if problem else ''
+            band = band_of(float(freq) / 1000)
+            if not band:
+                return f'Warning: Frequency {self.__freq__} MHz is not in any band'
+            self.__band__ = band
+            self.__cur_qso__['BAND'] = self.__band__
         else:
-            return 'Error: Unknown number format'
+            self.__freq__ = ''
+            self.__cur_qso__.pop('FREQ', '')
+        return ''
+
+    def evaluate_band(self, band: str) -> str:
+        """Set the band and check it against the frequency of the current QSO
+        :param band: the band
+        :return: a warning if the frequency is not in the band"""
+
+        self.__band__ = band
+        self.__cur_qso__['BAND'] = self.__band__
+        self.__band_entered__ = True
+        freq = self.__cur_qso__.get('FREQ')
+        if freq:
+            problem = check_freq(freq, band)
+            if problem:
+                return f'Warning: {problem}'
+        return ''
+
+    def evaluate_pwr(self, pwr: str) -> str:
+        if pwr != '0':
+            self.__pwr__ = pwr
+            self.__cur_qso__['TX_PWR'] = self.__pwr__
+        else:
+            self.__pwr__ = ''
+            self.__cur_qso__.pop('TX_PWR', '')
         return ''
 
     def evaluate_event(self, seq: str) -> str:
@@ -536,20 +915,22 @@ class CassiopeiaConsole:
 
     def evaluate_extended(self, seq: str) -> str:
         if seq.startswith('-c'):
-            if not self.check_format(self.REGEX_CALL, seq[2:]):
+            if not self.check_call(seq[2:]):
                 return 'Error: Wrong call format'
             self.__my_call__ = seq[2:].upper()
             self.__cur_qso__['STATION_CALLSIGN'] = self.__my_call__
         elif seq.startswith('-l'):
+            self.__cur_qso__.pop('DISTANCE', '')  # Calculated again for the new locator
             if seq == '-l':
                 self.__cur_qso__.pop('MY_GRIDSQUARE', '')
                 self.__cur_qso__.pop('MY_CITY', '')
                 self.__my_loc__ = ''
                 self.__my_qth__ = ''
                 return ''
-            if not self.check_format(self.REGEX_LOCATOR, seq[2:]) and not self.check_qth(seq[2:]):
+            if not self.check_locator(seq[2:]) and not self.check_qth(seq[2:]):
                 return 'Error: Wrong QTH/maidenhead format'
-            if self.check_format(self.REGEX_LOCATOR, seq[2:]):
+            self.__cur_qso__.pop('DISTANCE', '')  # Calculated again for the new locator
+            if self.check_locator(seq[2:]):
                 self.__my_loc__ = seq[2:4].upper() + seq[4:]
                 self.__cur_qso__['MY_GRIDSQUARE'] = self.__my_loc__
                 if 'MY_CITY' in self.__cur_qso__:
@@ -592,15 +973,39 @@ class CassiopeiaConsole:
         self.__cur_qso__['TIME_ON'] = self.__time__
         return 'Online mode' if self.is_online() else 'Offline mode'
 
+    def refresh_time(self) -> bool:
+        """Refresh date and time of the current QSO to now in online mode
+        Only date and time which will be set on finalising (marked with "*") are refreshed.
+        :return: True if the current QSO changed"""
+
+        if not self.__online__:
+            return False
+
+        date, time = get_cur_adif_dt()
+        if '*' in self.__date__:
+            self.__date__ = date + '*'
+        if '*' in self.__time__:
+            self.__time__ = time + '*'
+
+        changed = False
+        for field, value in (('QSO_DATE', date + '*'), ('TIME_ON', time + '*')):
+            cur = self.__cur_qso__.get(field, '')
+            if '*' in cur and cur != value:
+                self.__cur_qso__[field] = value
+                changed = True
+        return changed
+
     def evaluate_locator(self, seq: str) -> str:
         if seq == '':
+            self.__cur_qso__.pop('DISTANCE', '')
             self.__cur_qso__.pop('GRIDSQUARE', '')
             self.__cur_qso__.pop('QTH', '')
             return ''
 
-        if not self.check_format(self.REGEX_LOCATOR, seq) and not self.check_qth(seq):
+        if not self.check_locator(seq) and not self.check_qth(seq):
             return 'Error: Wrong QTH/maidenhead format'
-        if self.check_format(self.REGEX_LOCATOR, seq):
+        self.__cur_qso__.pop('DISTANCE', '')  # Calculated again for the new locator
+        if self.check_locator(seq):
             self.__cur_qso__['GRIDSQUARE'] = seq[:2].upper() + seq[2:]
             self.__cur_qso__.pop('QTH', '')
         else:
@@ -610,7 +1015,7 @@ class CassiopeiaConsole:
         return ''
 
     def evaluate_rst(self, seq: str) -> str:
-        if not self.check_format(self.REGEX_RSTFIELD, seq[1:]):
+        if not self.check_rst(seq[1:]):
             return 'Error: Wrong RST format'
         if seq[0] == '.':
             self.__cur_qso__['RST_RCVD'] = seq[1:].upper()
@@ -620,11 +1025,94 @@ class CassiopeiaConsole:
 
     def evaluate_call(self, seq: str) -> str:
         self.__cur_qso__['CALL'] = seq.upper()
-        if not self.check_format(self.REGEX_CALL, seq):
+        self.prefill(seq)
+        self.__annotate__(self.__cur_qso__)
+        if not self.check_call(seq):
             return 'Warning: Wrong call format'
+        if self.is_dupe():
+            return f'Warning: DUPE {self.__dupes__.describe(self.__cur_qso__)}'
         if seq.upper() in self.__worked_calls__:
             return (f'{seq.upper()} worked on {adif_date2iso(self.__worked_calls__[seq.upper()][0])} '
                     f'at {adif_time2iso(self.__worked_calls__[seq.upper()][1])}')
+
+        res = ''
+        if self.__scp__ is not None:
+            base_call = split_call(seq)[1]  # Without pre- and suffix
+            if seq in self.__scp__ or base_call in self.__scp__:
+                return ''
+            res = f'Warning: {seq.upper()} not in SCP'
+
+        similar = self.similar_calls(seq)
+        if similar:
+            res = f'{res or seq.upper() + " not worked before"}, similar: {" ".join(similar)}'
+        return res
+
+    def prefill(self, call: str):
+        """Fill empty fields of the current QSO with the values known from the call history
+        Values filled for a former call are removed if they were not changed. The received exchange is only
+        filled in contests and if it is not a serial number.
+        :param call: the call"""
+
+        for f, v in self.__prefilled__.items():
+            if self.__cur_qso__.get(f) == v:
+                if f == 'GRIDSQUARE':
+                    self.__cur_qso__[f] = ''
+                else:
+                    self.__cur_qso__.pop(f)
+        self.__prefilled__ = {}
+
+        if self.__history__ is None:
+            return
+        for f, v in self.__history__.get(call).items():
+            if f == 'SRX_STRING' and (not self.__cur_qso__.get('CONTEST_ID') or v.isdecimal()):
+                continue
+            if not self.__cur_qso__.get(f):
+                self.__cur_qso__[f] = v
+                self.__prefilled__[f] = v
+
+    def evaluate_comment(self, seq: str) -> str:
+        if seq == '#':
+            self.__cur_qso__.pop('COMMENT', '')
+            self.__comment__ = ''
+            return ''
+        self.__comment__ = seq[1:].replace('_', ' ')
+        self.__cur_qso__['COMMENT'] = self.__comment__
+        return ''
+
+    def evaluate_name(self, seq: str) -> str:
+        if seq == '\'':
+            self.__cur_qso__.pop('NAME', '')
+            return ''
+        self.__cur_qso__['NAME'] = seq[1:].replace('_', ' ')
+        return ''
+
+    def evaluate_exchange(self, seq: str) -> str:
+        if not self.__event__:
+            return 'Error: No active event'
+        self.evaluate_event_ref(seq)
+        return ''
+
+    def evaluate_qsl(self, seq: str) -> str:
+        if seq != '*':
+            return self.evaluate_call(seq)
+
+        # Toggle QSL received
+        if 'QSL_RCVD' in self.__cur_qso__ and self.__cur_qso__['QSL_RCVD'] == 'Y':
+            self.__cur_qso__['QSL_RCVD'] = 'N'
+        else:
+            self.__cur_qso__['QSL_RCVD'] = 'Y'
+        return ''
+
+    def evaluate_sync(self, seq: str) -> str:
+        if seq != '=':
+            return self.evaluate_call(seq)
+
+        # Sync date/time to now
+        date, time = get_cur_adif_dt()
+        self.__date__ = date
+        self.__time__ = time
+        self.__cur_qso__['QSO_DATE'] = self.__date__
+        self.__cur_qso__['TIME_ON'] = self.__time__
         return ''
 
     def evaluate(self, seq: str) -> str:
@@ -633,62 +1121,31 @@ class CassiopeiaConsole:
 
         self.__qso_active__ = True
 
-        if seq.lower().endswith('m') and seq.lower() in BANDS:
-            self.__band__ = seq.lower()
-            self.__cur_qso__['BAND'] = self.__band__
-        elif self.isnumeric(seq) and 0 < len(seq) < 3:
+        if seq.lower() in self.BAND_LOOKUP:
+            return self.evaluate_band(seq.lower())
+
+        if len(seq) < 3 and self.isnumeric(seq):  # hostilog band shortcuts
             if seq in self.BANDS_HOSTI:
-                self.__band__ = self.BANDS_HOSTI[seq.lower()]
-                self.__cur_qso__['BAND'] = self.__band__
-        elif self.isdecimal(seq[:-1]):
+                return self.evaluate_band(self.BANDS_HOSTI[seq])
+            return ''
+
+        # Neither numbers nor modes start with one of the prefix characters
+        evaluator = self.__prefix_evaluators__.get(seq[0])
+        if evaluator:
+            return evaluator(seq)
+
+        if self.isdecimal(seq[:-1]):
             return self.evaluate_numeric(seq)
-        elif seq.upper() in MODES:
-            self.__mode__ = seq.upper()
-            self.__cur_qso__['MODE'] = self.__mode__
-            self.set_rst_default(self.__mode__)
-        elif seq.upper() in self.MODES_HOSTI:
-            self.__mode__ = self.MODES_HOSTI[seq.upper()]
+
+        mode = self.MODE_LOOKUP.get(seq.upper())
+        if mode:
+            self.__mode__ = mode
             self.__cur_qso__['MODE'] = self.__mode__
             self.set_rst_default(self.__mode__)
-        elif seq.startswith('#'):  # Comment
-            if seq == '#':
-                self.__cur_qso__.pop('COMMENT', '')
-                self.__comment__ = ''
-                return ''
-            self.__comment__ = seq[1:].replace('_', ' ')
-            self.__cur_qso__['COMMENT'] = self.__comment__
-        elif seq.startswith('\''):  # Name
-            if seq == '\'':
-                self.__cur_qso__.pop('NAME', '')
-                return ''
-            self.__cur_qso__['NAME'] = seq[1:].replace('_', ' ')
-        elif seq.startswith('@'):  # Locator
-            return self.evaluate_locator(seq[1:])
-        elif seq.startswith('$'):  # Event
-            return self.evaluate_event(seq[1:].upper())
-        elif seq.startswith('%'):  # Event QSO ref
-            if not self.__event__:
-                return 'Error: No active event'
-            self.evaluate_event_ref(seq)
-        elif seq[0] in '.,':  # RST
-            return self.evaluate_rst(seq)
-        elif seq == '*':  # Toggle QSL received
-            if 'QSL_RCVD' in self.__cur_qso__ and self.__cur_qso__['QSL_RCVD'] == 'Y':
-                self.__cur_qso__['QSL_RCVD'] = 'N'
-            else:
-                self.__cur_qso__['QSL_RCVD'] = 'Y'
-        elif seq == '=':  # Sync date/time to now
-            date, time = get_cur_adif_dt()
-            self.__date__ = date
-            self.__time__ = time
-            self.__cur_qso__['QSO_DATE'] = self.__date__
-            self.__cur_qso__['TIME_ON'] = self.__time__
-        elif seq[0] == '-':  # different extended infos and commands
-            return self.evaluate_extended(seq)
-        else:  # Assume a callsign
-            return self.evaluate_call(seq)
+            return ''
 
-        return ''
+        # Assume a callsign
+        return self.evaluate_call(seq)
 
     def evaluate_event_ref(self, seq):
         if self.is_sig():
@@ -0,0 +1,148 @@
+# Copyright 2024 by Andreas Schawo, licensed under CC BY-SA 4.0
+
+"""Remember the latest name, locator, QTH and exchange per call from the log and a call history file"""
+
+import csv
+import sys
+import logging
+from collections.abc import Callable, Iterable, Iterator
+
+from .validators import is_locator
+
+logger = logging.getLogger(__name__)
+
+HISTORY_FIELDS = ('NAME', 'GRIDSQUARE', 'QTH', 'SRX_STRING')
+
+# Column names of call history files (e.g. N1MM+ call history) per field
+COLUMN_ALIASES = {
+    'CALL': 'CALL',
+    'NAME': 'NAME',
+    'GRIDSQUARE': 'GRIDSQUARE',
+    'GRID': 'GRIDSQUARE',
+    'LOC1': 'GRIDSQUARE',
+    'QTH': 'QTH',
+    'CITY': 'QTH',
+    'SRX_STRING': 'SRX_STRING',
+    'EXCH1': 'SRX_STRING',
+    'EXCHANGE': 'SRX_STRING',
+}
+
+HistoryEntry = tuple[str, str, str, str, str]  # Call and the values of HISTORY_FIELDS
+
+
+def read_history_file(file: str) -> Iterator[HistoryEntry]:
+    """Read a call history file in CSV format
+    The first line names the columns, known names are the fields of HISTORY_FIELDS and some aliases e.g. of the
+    N1MM+ call history (Call, Name, Loc1, Exch1). Lines starting with # are comments.
+    Values of the locator column which are no maidenhead locators are skipped.
+    :param file: the history file
+    :return: an iterator over tuples of call and values"""
+
+    with open(file, newline='', encoding='utf-8', errors='replace') as f:
+        lines = (line for line in f if not line.startswith('#') and line.strip())
+        header = next(csv.reader(lines), None)
+        if not header:
+            return
+        if header[0].strip().upper() == '!!ORDER!!':  # N1MM+ marks the header, data lines start with the call
+            header = header[1:]
+
+        columns = {}
+        for i, name in enumerate(header):
+            field = COLUMN_ALIASES.get(name.strip().upper())
+            if field and field not in columns:
+                columns[field] = i
+        if 'CALL' not in columns:
+            raise ValueError(f'No call column in history file "{file}"')
+
+        indexes = [columns['CALL']] + [columns.get(f, -1) for f in HISTORY_FIELDS]
+        grid = 1 + HISTORY_FIELDS.index('GRIDSQUARE')
+        for row in csv.reader(lines):
+            entry = [row[i].strip() if 0 <= i < len(row) else '' for i in indexes]
+            if entry[grid] and not is_locator(entry[grid]):
+                entry[grid] = ''
+            if entry[0]:
+                yield tuple(entry)
+
+
+def call_history(history_file: str | None, index) -> 'CallHistory':
+    """Create the call history of a log from an optional history file and the log index, the log takes precedence
+    :param history_file: the call history file
+    :param index: the LogIndex of the log
+    :return: the call history (not loaded yet)"""
+
+    if history_file:
+        return CallHistory(lambda: read_history_file(history_file), index.history)
+    return CallHistory(index.history)
+
+
+class CallHistory:
+    """The latest known values of HISTORY_FIELDS per call
+    The sources are read on the first lookup. Values are held as tuples of interned strings, so the many
+    recurring values (e.g. names, exchanges) and the empty value are stored only once. Later sources and entries
+    replace earlier values only if they are not empty."""
+
+    def __init__(self, *sources: Callable[[], Iterable[HistoryEntry]]):
+        """
+        :param sources: functions returning the entries to load, later sources take precedence"""
+
+        self.__sources__ = sources
+        self.__entries__: dict[str, tuple[str, str, str, str]] | None = None
+        self.__pending__: list[HistoryEntry] = []  # Added before loading
+
+    @property
+    def loaded(self) -> bool:
+        return self.__entries__ is not None
+
+    def __len__(self) -> int:
+        self.__load__()
+        return len(self.__entries__)
+
+    def __load__(self):
+        if self.__entries__ is not None:
+            return
+
+        self.__entries__ = {}
+        for source in self.__sources__:
+            try:
+                for entry in source():
+                    self.__store__(entry)
+            except (OSError, ValueError) as exc:
+                logger.warning(f'Could not load call history: {exc}')
+        for entry in self.__pending__:
+            self.__store__(entry)
+        self.__pending__ = []
+        logger.info(f'Loaded call history of {len(self.__entries__)} calls')
+
+    def __store__(self, entry: HistoryEntry):
+        call = sys.intern(entry[0].upper())
+        values = tuple(map(sys.intern, entry[1:]))
+        old = self.__entries__.get(call)
+        if old:
+            values = tuple(n or o for n, o in zip(values, old))
+        self.__entries__[call] = values
+
+    def add(self, qso: dict[str, str]):
+        """Update the history with a logged QSO
+        :param qso: the QSO"""
+
+        call = qso.get('CALL')
+        if not call:
+            return
+        entry = (call,) + tuple(str(qso.get(f, '')) for f in HISTORY_FIELDS)
+        if not any(entry[1:]):
+            return
+        if self.__entries__ is None:
+            self.__pending__.append(entry)
+        else:
+            self.__store__(entry)
+
+    def get(self, call: str) -> dict[str, str]:
+        """Get the known values of a call, the history is loaded on the first call
+        :param call: the call
+        :return: the non empty values by field name"""
+
+        self.__load__()
+        values = self.__entries__.get(call.upper())
+        if not values:
+            return {}
+        return {f: v for f, v in zip(HISTORY_FIELDS, values) if v}
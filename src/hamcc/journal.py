@@ -0,0 +1,158 @@
+# Copyright 2024 by Andreas Schawo, licensed under CC BY-SA 4.0
+
+"""Journal of the changes to the cached QSOs of the console, so unsaved QSOs survive a crash or power loss
+
+The journal is a text file next to the ADI file (e.g. hamcc_log.adi.journal) with one line per change
+- A json: a QSO was appended
+- S pos json: the QSO at position pos was changed
+- D pos: the QSO at position pos was deleted
+
+Positions count from the first journaled QSO. QSOs cached in front of them (e.g. loaded with -L, these are kept
+in the backup file) are not journaled, changes to them are not either.
+
+Each line is handed to the operating system immediately, syncing to disk is done in batches by sync().
+After the cached QSOs were saved the journal is compacted to the QSOs still cached."""
+
+import os
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class QSOJournal:
+    """Append only journal of appended, changed and deleted cached QSOs"""
+
+    def __init__(self, file: str):
+        """
+        :param file: the journal file"""
+
+        self.__file__ = file
+        self.__f__ = None
+        self.__dirty__ = False
+        self.__entries__ = 0
+        self.__base__ = 0  # Cached QSOs in front of the journaled ones
+        self.__count__ = 0  # Journaled QSOs still cached
+
+    @property
+    def file(self) -> str:
+        return self.__file__
+
+    def __len__(self) -> int:
+        """The number of entries written since the journal was opened or compacted"""
+        return self.__entries__
+
+    def __write__(self, line: str):
+        if self.__f__ is None:
+            self.__f__ = open(self.__file__, 'a', encoding='utf-8')
+        self.__f__.write(line)
+        self.__f__.flush()
+        self.__dirty__ = True
+        self.__entries__ += 1
+
+    def add(self, qso: dict[str, str]):
+        """Journal a QSO appended to the cache
+        :param qso: the QSO"""
+
+        self.__write__(f'A {json.dumps(qso, separators=(",", ":"))}\n')
+        self.__count__ += 1
+
+    def set(self, pos: int, qso: dict[str, str]):
+        """Journal a changed QSO
+        :param pos: the position of the QSO in the cache
+        :param qso: the QSO"""
+
+        if pos >= self.__base__:
+            self.__write__(f'S {pos - self.__base__} {json.dumps(qso, separators=(",", ":"))}\n')
+
+    def delete(self, pos: int):
+        """Journal a deleted QSO
+        :param pos: the position of the QSO in the cache"""
+
+        if pos < self.__base__:
+            self.__base__ -= 1
+        else:
+            self.__write__(f'D {pos - self.__base__}\n')
+            self.__count__ -= 1
+
+    def sync(self) -> bool:
+        """Sync the entries written since the last sync to disk
+        :return: True if entries were synced"""
+
+        if not self.__dirty__:
+            return False
+        os.fsync(self.__f__.fileno())
+        self.__dirty__ = False
+        return True
+
+    @staticmethod
+    def __load_qso__(data: str) -> dict[str, str]:
+        qso = json.loads(data)
+        if type(qso) is not dict:
+            raise ValueError('no QSO')
+        return qso
+
+    def replay(self) -> list[dict[str, str]]:
+        """Restore the journaled QSOs
+        Reading stops at an incomplete or damaged entry e.g. from a crash while writing.
+        :return: the QSOs in order of the cache"""
+
+        qsos = []
+        try:
+            with open(self.__file__, encoding='utf-8') as f:
+                for i, line in enumerate(f, 1):
+                    if not line.endswith('\n'):
+                        logger.warning(f'Journal "{self.__file__}" ends with an incomplete entry')
+                        break
+                    try:
+                        op, _, data = line[:-1].partition(' ')
+                        if op == 'A':
+                            qsos.append(self.__load_qso__(data))
+                        elif op == 'S':
+                            pos, _, data = data.partition(' ')
+                            qsos[int(pos)] = self.__load_qso__(data)
+                        elif op == 'D':
+                            del qsos[int(data)]
+                        else:
+                            raise ValueError(f'unknown operation "{op}"')
+                    except (ValueError, IndexError) as exc:
+                        logger.warning(f'Damaged entry in line {i} of journal "{self.__file__}": {exc}')
+                        break
+        except FileNotFoundError:
+            pass
+        return qsos
+
+    def compact(self, qsos: list[dict[str, str]], base: int = None):
+        """Replace the journal by the QSOs still cached e.g. after the others were saved
+        The journal is removed if no QSOs are left to journal.
+        :param qsos: the cached QSOs
+        :param base: the number of QSOs in front which are not journaled e.g. loaded with -L (default: the ones not
+                     journaled before and not saved from the front of the cache since)"""
+
+        if base is None:
+            saved = self.__base__ + self.__count__ - len(qsos)
+            base = max(0, self.__base__ - saved)
+        self.__base__ = base
+        self.__count__ = len(qsos) - base
+
+        self.close()
+        if self.__count__ > 0:
+            tmp_file = self.__file__ + '.tmp'
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                for q in qsos[base:]:
+                    f.write(f'A {json.dumps(q, separators=(",", ":"))}\n')
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_file, self.__file__)
+        elif os.path.isfile(self.__file__):
+            os.remove(self.__file__)
+        self.__entries__ = 0
+        logger.debug(f'Compacted journal to {self.__count__} QSO(s)')
+
+    def close(self):
+        """Sync and close the journal"""
+
+        if self.__f__ is not None:
+            self.sync()
+            self.__f__.close()
+            self.__f__ = None
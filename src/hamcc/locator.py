@@ -0,0 +1,124 @@
+# Copyright 2024 by Andreas Schawo, licensed under CC BY-SA 4.0
+
+"""Convert maidenhead locators to coordinates and calculate distance and bearing between locators"""
+
+import math
+from functools import lru_cache
+from collections.abc import Iterable
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency, see extra "fast"
+    np = None
+
+EARTH_RADIUS = 6371.0  # Mean radius in km
+CACHE_SIZE = 16 * 1024  # Converted locators kept in memory
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def locator2coords(locator: str) -> tuple[float, float]:
+    """Get the coordinates of the center of a 4, 6 or 8 character locator
+    :param locator: the locator e.g. JO31 or JO31le
+    :return: tuple of latitude and longitude in degrees
+    :raises ValueError: if the locator is not valid"""
+
+    loc = locator.upper()
+    if len(loc) not in (4, 6, 8) or not ('A' <= loc[0] <= 'R' and 'A' <= loc[1] <= 'R' and loc[2:4].isdigit()):
+        raise ValueError(f'Invalid locator "{locator}"')
+
+    lon = (ord(loc[0]) - 65) * 20 - 180 + int(loc[2]) * 2
+    lat = (ord(loc[1]) - 65) * 10 - 90 + int(loc[3])
+    lon_size, lat_size = 2.0, 1.0
+    if len(loc) > 4:
+        if not ('A' <= loc[4] <= 'X' and 'A' <= loc[5] <= 'X'):
+            raise ValueError(f'Invalid locator "{locator}"')
+        lon_size, lat_size = lon_size / 24, lat_size / 24
+        lon += (ord(loc[4]) - 65) * lon_size
+        lat += (ord(loc[5]) - 65) * lat_size
+    if len(loc) > 6:
+        if not loc[6:8].isdigit():
+            raise ValueError(f'Invalid locator "{locator}"')
+        lon_size, lat_size = lon_size / 10, lat_size / 10
+        lon += int(loc[6]) * lon_size
+        lat += int(loc[7]) * lat_size
+
+    return lat + lat_size / 2, lon + lon_size / 2
+
+
+def path(locator1: str, locator2: str) -> tuple[float, float]:
+    """Get the great circle distance and the initial bearing from one locator to another
+    :param locator1: the own locator
+    :param locator2: the locator of the other station
+    :return: tuple of distance in km and bearing in degrees (0 to 360)
+    :raises ValueError: if a locator is not valid"""
+
+    lat1, lon1 = map(math.radians, locator2coords(locator1))
+    lat2, lon2 = map(math.radians, locator2coords(locator2))
+    d_lon = lon2 - lon1
+
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin(d_lon / 2) ** 2
+    dist = 2 * EARTH_RADIUS * math.asin(min(1.0, math.sqrt(a)))
+
+    y = math.sin(d_lon) * math.cos(lat2)
+    x = math.cos(lat1) * math.sin(lat2) - math.sin(lat1) * math.cos(lat2) * math.cos(d_lon)
+    return dist, math.degrees(math.atan2(y, x)) % 360
+
+
+def distance(locator1: str, locator2: str) -> float:
+    """Get the great circle distance between two locators
+    :param locator1: the first locator
+    :param locator2: the second locator
+    :return: the distance in km
+    :raises ValueError: if a locator is not valid"""
+
+    return path(locator1, locator2)[0]
+
+
+def bearing(locator1: str, locator2: str) -> float:
+    """Get the initial bearing from one locator to another
+    :param locator1: the own locator
+    :param locator2: the locator of the other station
+    :return: the bearing in degrees (0 to 360)
+    :raises ValueError: if a locator is not valid"""
+
+    return path(locator1, locator2)[1]
+
+
+def adif_distance(km: float) -> str:
+    """Format a distance as value of the ADIF field DISTANCE
+    :param km: the distance in km
+    :return: the distance rounded to full km"""
+
+    return str(round(km))
+
+
+def fill_distances(records: Iterable[dict[str, str]]) -> int:
+    """Set the ADIF field DISTANCE of all records with valid MY_GRIDSQUARE and GRIDSQUARE but without distance
+    The distances are calculated in one vectorised pass if NumPy is installed, else record by record.
+    :param records: the records e.g. of a loaded log
+    :return: the number of records the distance was set for"""
+
+    targets = []
+    coords = []
+    for r in records:
+        if r.get('DISTANCE'):
+            continue
+        try:
+            coords.append(locator2coords(r['MY_GRIDSQUARE']) + locator2coords(r['GRIDSQUARE']))
+        except (KeyError, TypeError, ValueError):
+            continue
+        targets.append(r)
+
+    if not targets:
+        return 0
+
+    if np is not None:
+        lat1, lon1, lat2, lon2 = np.radians(np.array(coords, dtype=float)).T
+        a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+        dists = (2 * EARTH_RADIUS * np.arcsin(np.minimum(1.0, np.sqrt(a)))).tolist()
+    else:
+        dists = [distance(r['MY_GRIDSQUARE'], r['GRIDSQUARE']) for r in targets]
+
+    for r, d in zip(targets, dists):
+        r['DISTANCE'] = adif_distance(d)
+    return len(targets)
@@ -0,0 +1,107 @@
+# Copyright 2024 by Andreas Schawo, licensed under CC BY-SA 4.0
+
+"""Stages of the import pipeline running in threads connected by bounded queues
+
+The import reads QSO strings, evaluates them, serializes the QSOs and writes them to the file. Reading,
+serializing and writing run in their own threads, so waiting for input or for the disk overlaps with the
+evaluation. Each stage processes its items in order, so the order of the QSOs is kept."""
+
+import queue
+import logging
+import threading
+from collections.abc import Callable, Iterable, Iterator
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+QUEUE_SIZE = 1024  # Items waiting per stage
+GROUP_SIZE = 64  # Maximum QSOs passed on as one item
+
+END = object()  # Marks the end of the items in a queue
+
+
+class Stage(threading.Thread):
+    """Apply a function to each item of the inbox and put the results to the outbox
+    If the function raises an exception the remaining items are discarded (so no producer blocks on a full
+    queue) and the exception is kept in error. The end of the items is passed on to the outbox in any case."""
+
+    def __init__(self, name: str, func: Callable[[Any], Any], inbox: queue.Queue, outbox: queue.Queue = None,
+                 idle: Callable[[], Any] = None, timeout: float = None):
+        """
+        :param name: the name of the thread
+        :param func: the function applied to each item
+        :param inbox: the queue to take the items from
+        :param outbox: the queue for the results (None to drop the results)
+        :param idle: called if no item arrived within timeout e.g. for time based work
+        :param timeout: the time in seconds to wait for an item before idle is called"""
+
+        super().__init__(name=name, daemon=True)
+        self.__func__ = func
+        self.__inbox__ = inbox
+        self.__outbox__ = outbox
+        self.__idle__ = idle
+        self.__timeout__ = timeout if idle else None
+        self.error: BaseException | None = None
+
+    def run(self):
+        while True:
+            try:
+                item = self.__inbox__.get(timeout=self.__timeout__)
+            except queue.Empty:
+                if self.error is None:
+                    try:
+                        self.__idle__()
+                    except Exception as exc:
+                        self.error = exc
+                continue
+
+            if item is END:
+                break
+            if self.error is not None:
+                continue
+            try:
+                res = self.__func__(item)
+                if self.__outbox__ is not None:
+                    self.__outbox__.put(res)
+            except Exception as exc:
+                logger.error(f'Stage {self.name} failed: {exc}')
+                self.error = exc
+
+        if self.__outbox__ is not None:
+            self.__outbox__.put(END)
+
+
+class Reader(threading.Thread):
+    """Put the items of a (blocking) source e.g. lines from STDIN to a queue"""
+
+    def __init__(self, source: Iterable, outbox: queue.Queue):
+        """
+        :param source: the items
+        :param outbox: the queue for the items"""
+
+        super().__init__(name='reader', daemon=True)
+        self.__source__ = source
+        self.__outbox__ = outbox
+        self.error: BaseException | None = None
+
+    def run(self):
+        try:
+            for item in self.__source__:
+                self.__outbox__.put(item)
+        except Exception as exc:
+            logger.error(f'Reading failed: {exc}')
+            self.error = exc
+        finally:
+            self.__outbox__.put(END)
+
+
+def drain(inbox: queue.Queue) -> Iterator:
+    """Iterate over the items of a queue until the end is reached
+    :param inbox: the queue
+    :return: an iterator over the items"""
+
+    while True:
+        item = inbox.get()
+        if item is END:
+            return
+        yield item
@@ -0,0 +1,126 @@
+# Copyright 2024 by Andreas Schawo, licensed under CC BY-SA 4.0
+
+"""Measure the QSO rate of the last minutes and the best hour"""
+
+import time
+import calendar
+from collections import Counter
+
+RING_MINUTES = 60
+MAX_AGE = 2 * 24 * 60  # QSOs older than two days (in minutes) are not tracked
+
+
+def qso_minute(qso: dict[str, str]) -> int | None:
+    """Get the minute since epoch of a QSO from QSO_DATE and TIME_ON
+    :param qso: the QSO
+    :return: the minute or None if date or time are invalid"""
+
+    d, t = qso.get('QSO_DATE', ''), qso.get('TIME_ON', '')
+    try:
+        return calendar.timegm((int(d[:4]), int(d[4:6]), int(d[6:8]), int(t[:2]), int(t[2:4]), 0)) // 60
+    except (ValueError, OverflowError):
+        return None
+
+
+class RateMeter:
+    """Count QSOs per minute in a ring buffer of 60 buckets to get the rate of the last 10 and 60 minutes
+    Each bucket is stamped with its minute, so stale buckets are detected without clearing the ring. QSOs are
+    bucketed by their own time, which may be in the past for QSOs logged afterwards.
+
+    For the best hour the QSOs per 60 minute window are counted, keyed by the last minute of the window. A QSO
+    updates the 60 windows it belongs to, so the best hour is known without scanning the log."""
+
+    def __init__(self):
+        self.__counts__ = [0] * RING_MINUTES
+        self.__stamps__ = [-1] * RING_MINUTES
+        self.__windows__: Counter[int] = Counter()
+        self.__best__ = 0
+        self.__best_dirty__ = False
+
+    @staticmethod
+    def __now__() -> int:
+        return int(time.time()) // 60
+
+    def add(self, qso: dict[str, str], now: int = None):
+        """Count a QSO
+        :param qso: the QSO
+        :param now: the current minute since epoch (default: system time)"""
+
+        minute = qso_minute(qso)
+        now = self.__now__() if now is None else now
+        if minute is None or not now - MAX_AGE < minute <= now:
+            return
+
+        slot = minute % RING_MINUTES
+        if self.__stamps__[slot] != minute:
+            if self.__stamps__[slot] > minute:  # Older than the ring
+                slot = None
+            else:
+                self.__stamps__[slot] = minute
+                self.__counts__[slot] = 0
+        if slot is not None:
+            self.__counts__[slot] += 1
+
+        windows = self.__windows__
+        for end in range(minute, minute + RING_MINUTES):
+            windows[end] += 1
+            if windows[end] > self.__best__:
+                self.__best__ = windows[end]
+
+        # Drop windows which can not get more QSOs
+        if len(windows) > 2 * (MAX_AGE + RING_MINUTES):
+            for end in [e for e in windows if e <= now - MAX_AGE]:
+                del windows[end]
+
+    def remove(self, qso: dict[str, str], now: int = None):
+        """Uncount a QSO which was deleted or is going to be changed
+        :param qso: the QSO
+        :param now: the current minute since epoch (default: system time)"""
+
+        minute = qso_minute(qso)
+        now = self.__now__() if now is None else now
+        if minute is None or not now - MAX_AGE < minute <= now or not self.__windows__[minute]:
+            return
+
+        slot = minute % RING_MINUTES
+        if self.__stamps__[slot] == minute and self.__counts__[slot]:
+            self.__counts__[slot] -= 1
+
+        windows = self.__windows__
+        for end in range(minute, minute + RING_MINUTES):
+            if windows[end] == self.__best__:
+                self.__best_dirty__ = True
+            if windows[end] > 1:
+                windows[end] -= 1
+            else:
+                windows.pop(end, None)
+
+    def count(self, minutes: int, now: int = None) -> int:
+        """Get the number of QSOs of the last minutes
+        :param minutes: the number of minutes up to 60 including the current one
+        :param now: the current minute since epoch (default: system time)
+        :return: the number of QSOs"""
+
+        now = self.__now__() if now is None else now
+        total = 0
+        for minute in range(now - min(minutes, RING_MINUTES) + 1, now + 1):
+            slot = minute % RING_MINUTES
+            if self.__stamps__[slot] == minute:
+                total += self.__counts__[slot]
+        return total
+
+    @property
+    def best_hour(self) -> int:
+        """The highest number of QSOs within 60 minutes"""
+
+        if self.__best_dirty__:  # Only after removing a QSO of the best hour
+            self.__best__ = max(self.__windows__.values(), default=0)
+            self.__best_dirty__ = False
+        return self.__best__
+
+    def rates(self, now: int = None) -> tuple[int, int, int]:
+        """Get the rates in QSOs per hour
+        :param now: the current minute since epoch (default: system time)
+        :return: the rate of the last 10 minutes, of the last 60 minutes and the best hour"""
+
+        return self.count(10, now) * 6, self.count(60, now), self.best_hour
@@ -0,0 +1,196 @@
+# Copyright 2024 by Andreas Schawo, licensed under CC BY-SA 4.0
+
+"""Find known callsigns from a Super Check Partial file (e.g. MASTER.SCP) containing a fragment"""
+
+import os
+import sys
+import mmap
+import struct
+import logging
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Iterator
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'HAMCCSCP'
+VERSION = 1
+# Magic, version, byte order of the suffix array, size and mtime of the SCP file, count of calls, length of text,
+# count of suffixes
+HEADER = struct.Struct('<8sIcxxxQQQQQ')
+
+
+def read_scp(file: str) -> list[str]:
+    """Read the callsigns of a Super Check Partial file, one per line, lines starting with # are comments
+    :param file: the SCP file
+    :return: the sorted list of unique callsigns"""
+
+    calls = set()
+    with open(file, encoding='ascii', errors='ignore') as f:
+        for line in f:
+            call = line.strip().upper()
+            if call and not call.startswith('#') and ' ' not in call:
+                calls.add(call)
+    return sorted(calls)
+
+
+class ScpIndex:
+    """Suffix array over the callsigns of a Super Check Partial file
+    The calls are stored as one text separated by newlines. The suffix array holds the positions of all suffixes
+    sorted by the suffix up to the end of the call. Calls containing a fragment are found by bisecting.
+
+    The index is cached in a binary file next to the SCP file (e.g. MASTER.SCP.idx) and is mapped into memory
+    on later starts. It is rebuilt if size or modification time of the SCP file changed."""
+
+    def __init__(self, text: bytes | memoryview, suffixes: array | memoryview, calls: int,
+                 source: mmap.mmap = None):
+        """
+        :param text: the calls separated and enclosed by newlines
+        :param suffixes: the sorted suffix positions
+        :param calls: the number of calls
+        :param source: the mapped cache file text and suffixes are views of"""
+
+        self.__text__ = text
+        self.__suffixes__ = suffixes
+        self.__calls__ = calls
+        self.__source__ = source
+
+    @classmethod
+    def build(cls, calls: list[str]) -> 'ScpIndex':
+        """Build the index in memory
+        :param calls: the sorted list of unique callsigns
+        :return: the index"""
+
+        text = b'\n' + '\n'.join(calls).encode('ascii') + b'\n'
+        positions = []
+        start = 1
+        for c in calls:
+            positions.extend(range(start, start + len(c)))
+            start += len(c) + 1
+
+        end_of = text.index
+        positions.sort(key=lambda p: text[p:end_of(b'\n', p)])
+        return cls(text, array('I', positions), len(calls))
+
+    @classmethod
+    def load(cls, file: str, cache_file: str = None) -> 'ScpIndex':
+        """Load the index from the cache file or build it from the SCP file and cache it
+        :param file: the SCP file
+        :param cache_file: the cache file (default: file + '.idx')
+        :return: the index"""
+
+        cache_file = cache_file or file + '.idx'
+        st = os.stat(file)
+
+        index = cls.__map__(cache_file, st)
+        if index:
+            logger.info(f'Mapped SCP index "{cache_file}" with {len(index)} calls')
+            return index
+
+        logger.info(f'Building SCP index from "{file}"...')
+        index = cls.build(read_scp(file))
+        try:
+            index.save(cache_file, st)
+        except OSError as exc:
+            logger.warning(f'Could not cache SCP index to "{cache_file}": {exc}')
+            return index
+
+        return cls.__map__(cache_file, st) or index
+
+    @classmethod
+    def __map__(cls, cache_file: str, st: os.stat_result) -> 'ScpIndex | None':
+        try:
+            with open(cache_file, 'rb') as f:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+
+        if len(mm) >= HEADER.size:
+            magic, version, byteorder, size, mtime, calls, text_len, count = HEADER.unpack_from(mm)
+            sa_start = HEADER.size + text_len + (-text_len % 4)
+            compatible = magic == MAGIC and version == VERSION and byteorder == sys.byteorder[0].encode()
+            if compatible and size == st.st_size and mtime == st.st_mtime_ns and len(mm) == sa_start + count * 4:
+                with memoryview(mm) as view:
+                    return cls(view[HEADER.size:HEADER.size + text_len], view[sa_start:].cast('I'), calls, mm)
+
+        mm.close()
+        return None
+
+    def save(self, cache_file: str, st: os.stat_result):
+        """Save the index to a cache file
+        :param cache_file: the cache file
+        :param st: the stat of the SCP file the index was built from"""
+
+        text = bytes(self.__text__)
+        suffixes = array('I', self.__suffixes__)
+        tmp_file = cache_file + '.tmp'
+        with open(tmp_file, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, VERSION, sys.byteorder[0].encode(), st.st_size, st.st_mtime_ns,
+                                self.__calls__, len(text), len(suffixes)))
+            f.write(text)
+            f.write(b'\0' * (-len(text) % 4))
+            suffixes.tofile(f)
+        os.replace(tmp_file, cache_file)
+
+    def close(self):
+        """Release the mapped cache file"""
+
+        if self.__source__ is not None:
+            self.__suffixes__.release()
+            self.__text__.release()
+            self.__source__.close()
+            self.__source__ = None
+
+    def __len__(self) -> int:
+        return self.__calls__
+
+    def __iter__(self) -> Iterator[str]:
+        if self.__calls__:
+            yield from bytes(self.__text__[1:-1]).decode('ascii').split('\n')
+
+    def __call_at__(self, pos: int) -> str:
+        text = self.__text__
+        start = pos
+        while text[start - 1] != 0x0A:
+            start -= 1
+        end = pos
+        while text[end] != 0x0A:
+            end += 1
+        return bytes(text[start:end]).decode('ascii')
+
+    def __range__(self, fragment: bytes) -> tuple[int, int]:
+        text = self.__text__
+        n = len(fragment)
+
+        def key(p: int) -> bytes:
+            return bytes(text[p:p + n])
+
+        lo = bisect_left(self.__suffixes__, fragment, key=key)
+        hi = bisect_right(self.__suffixes__, fragment, lo, key=key)
+        return lo, hi
+
+    def __contains__(self, call: str) -> bool:
+        # Suffixes equal to the call up to the end of a call, the call itself starts behind a newline
+        lo, hi = self.__range__(call.upper().encode('ascii', 'replace') + b'\n')
+        return any(self.__text__[self.__suffixes__[i] - 1] == 0x0A for i in range(lo, hi))
+
+    def containing(self, fragment: str, limit: int = 10) -> list[str]:
+        """Get the calls containing a fragment, calls starting with the fragment first
+        The search stops after limit calls were found, so the time per query is bounded.
+        :param fragment: the fragment
+        :param limit: the maximum number of calls
+        :return: the list of matching calls"""
+
+        if not fragment or limit <= 0:
+            return []
+
+        lo, hi = self.__range__(fragment.upper().encode('ascii', 'replace'))
+        calls = []
+        for i in range(lo, hi):
+            call = self.__call_at__(self.__suffixes__[i])
+            if call not in calls:
+                calls.append(call)
+                if len(calls) >= limit:
+                    break
+        fragment = fragment.upper()
+        return sorted(calls, key=lambda c: (not c.startswith(fragment), c))
@@ -0,0 +1,114 @@
+# Copyright 2024 by Andreas Schawo, licensed under CC BY-SA 4.0
+
+"""Validators for call, RST, locator and QTH running in linear time
+
+Each validator accepts exactly the strings the corresponding regular expression of CassiopeiaConsole
+(REGEX_CALL, REGEX_RSTFIELD, REGEX_LOCATOR, REGEX_QTH) matches in full. The inputs are scanned once, so long,
+garbled or hostile input (e.g. a pasted paragraph) cannot stall the evaluation by backtracking."""
+
+DIGITS = frozenset('0123456789')
+LETTERS = frozenset('abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ')
+ALNUM = DIGITS | LETTERS
+CALL_SUFFIX = frozenset('aAmMpPrRtT')
+RST_SIGNALS = frozenset('aAcCkKmMsSxX')
+LOC_FIELD = frozenset('abcdefghijklmnopqrABCDEFGHIJKLMNOPQR')
+LOC_SUBSQUARE = frozenset('abcdefghijklmnopqrstuvwxABCDEFGHIJKLMNOPQRSTUVWX')
+
+MAX_CALL = 3 + 1 + 8 + 1 + 2  # Prefix and slash, base call, slash and suffix
+
+
+def __is_base_call__(txt: str) -> bool:
+    # 1 to 3 characters, a digit, 0 to 3 characters and a letter
+    size = len(txt)
+    if not 3 <= size <= 8 or txt[-1] not in LETTERS or not ALNUM.issuperset(txt):
+        return False
+    return any(txt[i] in DIGITS for i in range(max(1, size - 5), min(3, size - 2) + 1))
+
+
+def split_call(txt: str) -> tuple[str, str, str] | None:
+    """Split a call into prefix, base call and suffix like the groups of REGEX_CALL
+    :param txt: the call e.g. DL/XX1XXX/P
+    :return: tuple of prefix with slash, base call and suffix with slash (None if missing) or None if not valid"""
+
+    if len(txt) > MAX_CALL:
+        return None
+
+    parts = txt.split('/')
+    if len(parts) == 1:
+        if __is_base_call__(txt):
+            return None, txt, None
+    elif len(parts) == 2:
+        first, second = parts
+        if 1 <= len(first) <= 3 and ALNUM.issuperset(first) and __is_base_call__(second):
+            return first + '/', second, None
+        if __is_base_call__(first) and 1 <= len(second) <= 2 and CALL_SUFFIX.issuperset(second):
+            return None, first, '/' + second
+    elif len(parts) == 3:
+        prefix, base, suffix = parts
+        valid_prefix = 1 <= len(prefix) <= 3 and ALNUM.issuperset(prefix)
+        valid_suffix = 1 <= len(suffix) <= 2 and CALL_SUFFIX.issuperset(suffix)
+        if valid_prefix and valid_suffix and __is_base_call__(base):
+            return prefix + '/', base, '/' + suffix
+    return None
+
+
+def is_call(txt: str) -> bool:
+    """Test if the text is a call, equivalent to a full match of REGEX_CALL
+    :param txt: the text
+    :return: True if valid"""
+
+    return split_call(txt) is not None
+
+
+def is_rst(txt: str) -> bool:
+    """Test if the text is a RST value, equivalent to a full match of REGEX_RSTFIELD
+    :param txt: the text e.g. 59, 599s or -06
+    :return: True if valid"""
+
+    size = len(txt)
+    if not txt or size > 4:
+        return False
+    if txt[0] in '-+':
+        return 2 <= size <= 3 and DIGITS.issuperset(txt[1:])
+    if txt[0] not in '12345':
+        return False
+    if size >= 2 and not '1' <= txt[1] <= '9':
+        return False
+    if size >= 3 and not '1' <= txt[2] <= '9':
+        return False
+    return size < 4 or txt[3] in RST_SIGNALS
+
+
+def is_locator(txt: str) -> bool:
+    """Test if the text is a maidenhead locator, equivalent to a full match of REGEX_LOCATOR
+    :param txt: the text e.g. JO31 or JO31le
+    :return: True if valid"""
+
+    size = len(txt)
+    if size not in (4, 6, 8):
+        return False
+    if txt[0] not in LOC_FIELD or txt[1] not in LOC_FIELD or txt[2] not in DIGITS or txt[3] not in DIGITS:
+        return False
+    if size >= 6 and (txt[4] not in LOC_SUBSQUARE or txt[5] not in LOC_SUBSQUARE):
+        return False
+    return size < 8 or (txt[6] in DIGITS and txt[7] in DIGITS)
+
+
+def split_qth(txt: str) -> tuple[str, str] | None:
+    """Split a QTH with locator like the first two groups of REGEX_QTH
+    :param txt: the text e.g. "Essen (JO31)"
+    :return: tuple of QTH (without trailing spaces) and locator or None if not valid"""
+
+    if not txt.endswith(')'):
+        return None
+    for size in (4, 6, 8):
+        start = len(txt) - size - 2
+        if start >= 0 and txt[start] == '(':
+            loc = txt[start + 1:-1]
+            if not is_locator(loc):
+                return None
+            qth = txt[:start]
+            if '\n' in qth:  # Not matched by . of the regular expression
+                return None
+            return qth.rstrip(' '), loc
+    return None
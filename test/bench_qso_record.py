@@ -0,0 +1,66 @@
+"""Benchmark loading QSOs into CassiopeiaConsole (e.g. via -L) with deepcopy against the QSO record
+
+Run with: PYTHONPATH=./src python test/bench_qso_record.py [COUNT]"""
+
+import sys
+import time
+import tracemalloc
+from copy import deepcopy
+
+from hamcc import hamcc
+
+
+def make_records(count: int) -> list[dict[str, str]]:
+    """Create records with distinct string objects like a parsed ADIF file would have"""
+
+    records = []
+    for i in range(count):
+        records.append({
+            ''.join('CALL'): f'XX{i % 10}X{i:05d}',
+            ''.join('QSO_DATE'): ''.join(f'2024{1 + i % 12:02d}{1 + i % 28:02d}'),
+            ''.join('TIME_ON'): f'{i % 24:02d}{i % 60:02d}',
+            ''.join('BAND'): ''.join('20m'),
+            ''.join('MODE'): ''.join('SSB'),
+            ''.join('STATION_CALLSIGN'): ''.join('XX1XXX'),
+            ''.join('MY_GRIDSQUARE'): ''.join('JO30uj'),
+            ''.join('GRIDSQUARE'): f'JO{i % 100:02d}aa',
+            ''.join('RST_RCVD'): ''.join('59'),
+            ''.join('RST_SENT'): ''.join('59'),
+            ''.join('NAME'): f'Name {i}',
+            ''.join('COMMENT'): ''.join('Some comment'),
+        })
+    return records
+
+
+def measure(name: str, func, count: int):
+    records = make_records(count)
+    start = time.perf_counter()
+    for r in records:
+        func(r)
+    duration = time.perf_counter() - start
+
+    # Source records are dropped after loading as the console does
+    tracemalloc.start()
+    records = make_records(count)
+    loaded = [func(r) for r in records]
+    del records
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del loaded
+
+    print(f'{name:<16} {duration:8.3f} s  {current / 2 ** 20:8.1f} MiB kept  {peak / 2 ** 20:8.1f} MiB peak')
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    print(f'Loading {count} records')
+
+    measure('deepcopy', deepcopy, count)
+    measure('QSO.from_dict', hamcc.QSO.from_dict, count)
+
+    cc = hamcc.CassiopeiaConsole('XX1XXX', 'JO30uj')
+    measure('append_qso', cc.append_qso, count)
+
+
+if __name__ == '__main__':
+    main()
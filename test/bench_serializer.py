@@ -0,0 +1,52 @@
+"""Benchmark serialising QSOs with adif_file.adi.dumps against serialize_record
+
+Run with: PYTHONPATH=./src python test/bench_serializer.py [COUNT]"""
+
+import sys
+import time
+
+from adif_file import adi
+
+from hamcc.hamcc import QSO
+from hamcc.adi_writer import serialize_record
+
+
+def make_qsos(count: int) -> list[QSO]:
+    qsos = []
+    for i in range(count):
+        qsos.append(QSO.from_dict({
+            'STATION_CALLSIGN': 'XX1XXX',
+            'MY_GRIDSQUARE': 'JO30uj',
+            'QSO_DATE': f'2024{1 + i % 12:02d}{1 + i % 28:02d}',
+            'TIME_ON': f'{i % 24:02d}{i % 60:02d}',
+            'BAND': '20m',
+            'MODE': 'SSB',
+            'CALL': f'XX{i % 10}X{i:05d}',
+            'GRIDSQUARE': '',
+            'MY_NAME': 'Me',
+            'MY_CITY': 'Home',
+            'RST_RCVD': '59',
+            'RST_SENT': '59',
+            'NAME': f'Name {i}',
+            'COMMENT': 'Some comment',
+        }))
+    return qsos
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    qsos = make_qsos(count)
+
+    start = time.perf_counter()
+    text_dumps = ''.join('\n\n' + adi.dumps({'RECORDS': [q.to_adif_dict()]}) for q in qsos)
+    print(f'adi.dumps:        {time.perf_counter() - start:.2f} s')
+
+    start = time.perf_counter()
+    text_serialize = ''.join('\n\n' + serialize_record(q) for q in qsos)
+    print(f'serialize_record: {time.perf_counter() - start:.2f} s')
+
+    print('Output equal:', text_dumps == text_serialize)
+
+
+if __name__ == '__main__':
+    main()
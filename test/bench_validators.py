@@ -0,0 +1,34 @@
+"""Benchmark worst case input for the regular expressions of CassiopeiaConsole against the validators
+
+Run with: PYTHONPATH=./src python test/bench_validators.py [LENGTH]"""
+
+import sys
+import time
+
+from hamcc.hamcc import CassiopeiaConsole
+from hamcc.validators import is_call, is_rst, is_locator, split_qth
+
+
+def measure(func, txt: str) -> float:
+    start = time.perf_counter()
+    func(txt)
+    return time.perf_counter() - start
+
+
+def main():
+    length = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    cases = (
+        ('call', CassiopeiaConsole.REGEX_CALL, is_call, 'A1/' * (length // 3)),
+        ('rst', CassiopeiaConsole.REGEX_RSTFIELD, is_rst, '5' * length),
+        ('locator', CassiopeiaConsole.REGEX_LOCATOR, is_locator, 'AA00' * (length // 4)),
+        ('qth', CassiopeiaConsole.REGEX_QTH, split_qth, ' ' * length + 'x'),
+        ('qth paragraph', CassiopeiaConsole.REGEX_QTH, split_qth, 'Some pasted text (JO31) ' * (length // 24)),
+    )
+
+    for name, regex, validator, txt in cases:
+        print(f'{name + ":":15s} regex {measure(regex.fullmatch, txt):8.4f} s | '
+              f'validator {measure(validator, txt):8.4f} s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,150 @@
+import os
+import unittest
+import tempfile
+
+from hamcc.adi_index import LogIndex
+
+HEADER = 'ADIF export by test <ADIF_VER:5>3.1.4 <PROGRAMID:5>HamCC\n<EOH>\n'
+
+
+def record(call: str, date: str, time: str) -> str:
+    return f'\n\n<CALL:{len(call)}>{call} <QSO_DATE:8>{date} <TIME_ON:4>{time} <BAND:3>20m <EOR>'
+
+
+class TestCaseLogIndex(unittest.TestCase):
+    def setUp(self):
+        fd, self.file = tempfile.mkstemp(suffix='.adi')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(HEADER)
+            f.write(record('YY1YYY', '20240101', '1200'))
+            f.write(record('YY2YYY', '20240102', '1300'))
+
+    def tearDown(self):
+        os.remove(self.file)
+        if os.path.isfile(self.file + '.idx'):
+            os.remove(self.file + '.idx')
+
+    def append(self, call: str, date: str, time: str):
+        with open(self.file, 'a', encoding='utf-8') as f:
+            f.write(record(call, date, time))
+
+    def refreshed(self) -> LogIndex:
+        index = LogIndex(self.file)
+        index.refresh()
+        index.close()
+        return index
+
+    def test_10_build(self):
+        index = self.refreshed()
+        self.assertDictEqual({'YY1YYY': ('20240101', '1200'), 'YY2YYY': ('20240102', '1300')},
+                             index.worked_calls)
+        self.assertDictEqual({'CALL': 'YY2YYY', 'QSO_DATE': '20240102', 'TIME_ON': '1300', 'BAND': '20m'},
+                             index.last_qso)
+        self.assertTrue(os.path.isfile(self.file + '.idx'))
+
+        index = self.refreshed()
+        self.assertEqual(2, len(index.worked_calls))
+        self.assertEqual('YY2YYY', index.last_qso['CALL'])
+
+    def test_20_incremental(self):
+        self.refreshed()
+        self.append('YY3YYY', '20240103', '1400')
+        self.append('YY1YYY', '20240104', '1500')
+
+        index = self.refreshed()
+        self.assertDictEqual({'YY1YYY': ('20240104', '1500'), 'YY2YYY': ('20240102', '1300'),
+                              'YY3YYY': ('20240103', '1400')}, index.worked_calls)
+        self.assertEqual('YY1YYY', index.last_qso['CALL'])
+
+    def test_30_rewritten(self):
+        self.refreshed()
+        with open(self.file, 'w', encoding='utf-8') as f:
+            f.write(HEADER)
+            f.write(record('YY4YYY', '20240105', '1600'))
+            f.write(record('YY5YYY', '20240106', '1700'))
+            f.write(record('YY6YYY', '20240107', '1800'))
+
+        index = self.refreshed()
+        self.assertListEqual(['YY4YYY', 'YY5YYY', 'YY6YYY'], list(index.worked_calls))
+        self.assertEqual('YY6YYY', index.last_qso['CALL'])
+
+    def test_40_broken_index(self):
+        with open(self.file + '.idx', 'w', encoding='utf-8') as f:
+            f.write('garbage\n')
+
+        index = self.refreshed()
+        self.assertEqual(2, len(index.worked_calls))
+
+    def test_50_add(self):
+        self.refreshed()
+
+        index = LogIndex(self.file)
+        self.assertTrue(index.open_append())
+        self.append('YY3YYY', '20240103', '1400')
+        index.add({'CALL': 'YY3YYY', 'QSO_DATE': '20240103', 'TIME_ON': '1400', 'NAME': 'Test'})
+        index.close()
+
+        index = self.refreshed()
+        self.assertEqual(('20240103', '1400'), index.worked_calls['YY3YYY'])
+        self.assertDictEqual({'CALL': 'YY3YYY', 'QSO_DATE': '20240103', 'TIME_ON': '1400'}, index.last_qso)
+
+    def test_60_open_append_outdated(self):
+        self.refreshed()
+        self.append('YY3YYY', '20240103', '1400')
+
+        self.assertFalse(LogIndex(self.file).open_append())
+        self.assertIn('YY3YYY', self.refreshed().worked_calls)
+
+    def test_70_reset(self):
+        index = LogIndex(self.file)
+        index.reset()
+        with open(self.file, 'w', encoding='utf-8') as f:
+            f.write(HEADER)
+            f.write(record('YY4YYY', '20240105', '1600'))
+        index.add({'CALL': 'YY4YYY', 'QSO_DATE': '20240105', 'TIME_ON': '1600'})
+        index.close()
+
+        index = self.refreshed()
+        self.assertListEqual(['YY4YYY'], list(index.worked_calls))
+
+    def test_80_events(self):
+        with open(self.file, 'a', encoding='utf-8') as f:
+            f.write('\n\n<CALL:6>YY3YYY <QSO_DATE:8>20240103 <TIME_ON:4>1400 <BAND:3>20m <MODE:3>SSB '
+                    '<CONTEST_ID:4>TEST <EOR>')
+            f.write('\n\n<CALL:6>YY4YYY <QSO_DATE:8>20240104 <TIME_ON:4>1500 <BAND:3>40m <MODE:2>CW '
+                    '<MY_SIG:4>POTA <MY_SIG_INFO:7>DE-0001 <EOR>')
+
+        index = self.refreshed()
+        self.assertListEqual(['YY3YYY', 'YY4YYY'], [e['CALL'] for e in index.events])
+        self.assertEqual('TEST', index.events[0]['CONTEST_ID'])
+        self.assertEqual('DE-0001', index.events[1]['MY_SIG_INFO'])
+
+        index = LogIndex(self.file, '20240104')
+        index.refresh()
+        index.close()
+        self.assertListEqual(['YY4YYY'], [e['CALL'] for e in index.events])
+        self.assertNotIn('MY_SIG_INFO', index.last_qso)
+
+    def test_90_crashed_session(self):
+        self.refreshed()
+
+        index = LogIndex(self.file)
+        index.refresh()
+        with open(self.file, 'a', encoding='utf-8') as f:
+            f.write('\n\n<CALL:6>YY3YYY <QSO_DATE:8>20240103 <TIME_ON:4>1400 <NAME:4>Test '
+                    '<CONTEST_ID:4>TEST <EOR>')
+        index.add({'CALL': 'YY3YYY', 'QSO_DATE': '20240103', 'TIME_ON': '1400', 'NAME': 'Test',
+                   'CONTEST_ID': 'TEST'})
+        index.__idx_f__.close()  # Crashed without updating the header
+
+        index = self.refreshed()
+        self.assertListEqual(['YY3YYY'], [e['CALL'] for e in index.events])
+        self.assertListEqual(['YY3YYY'], [e[0] for e in index.history()])
+        self.assertIn('YY3YYY', index.worked_calls)
+
+        index = self.refreshed()
+        self.assertEqual(1, len(index.events))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import os
+import unittest
+import tempfile
+
+from hamcc import adi_reader
+
+ADI = ('ADIF export by test <ADIF_VER:5>3.1.4 <PROGRAMID:5>HamCC\n<EOH>\n\n'
+       '<CALL:6>YY1YYY <QSO_DATE:8>20240101 <TIME_ON:4>1200 <BAND:3>20m <EOR>\n\n'
+       '<call:6>yy2yyy <qso_date:8:D>20240102 <time_on:4>1300 <comment:10>Übung <x>ß <EOR>\n\n'
+       '<CALL:6>YY3YYY <QSO_DATE:8>20240103 <TIME_ON:4>1400 <NAME:0> <EOR>\n')
+
+
+class TestCaseADIReader(unittest.TestCase):
+    def setUp(self):
+        fd, self.file = tempfile.mkstemp(suffix='.adi')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(ADI)
+
+    def tearDown(self):
+        os.remove(self.file)
+
+    def test_10_records(self):
+        records = list(adi_reader.iter_records(self.file))
+        self.assertEqual(3, len(records))
+        self.assertDictEqual({'CALL': 'YY1YYY', 'QSO_DATE': '20240101', 'TIME_ON': '1200', 'BAND': '20m'},
+                             records[0])
+        self.assertEqual('yy2yyy', records[1]['CALL'])
+        self.assertEqual('Übung <x>ß', records[1]['COMMENT'])
+        self.assertEqual('', records[2]['NAME'])
+
+    def test_20_chunks(self):
+        expected = list(adi_reader.iter_records(self.file))
+        for size in range(1, 40):
+            self.assertListEqual(expected, list(adi_reader.ADIScanner(self.file, chunk_size=size)), size)
+
+    def test_30_fields(self):
+        records = list(adi_reader.iter_records(self.file, ('call', 'TIME_ON')))
+        self.assertDictEqual({'CALL': 'YY3YYY', 'TIME_ON': '1400'}, records[2])
+
+    def test_40_offset(self):
+        scanner = adi_reader.ADIScanner(self.file, ('CALL',))
+        it = iter(scanner)
+        next(it)
+        offset = scanner.offset
+        with open(self.file, 'rb') as f:
+            self.assertTrue(f.read(offset).endswith(b'<EOR>'))
+
+        self.assertListEqual(['yy2yyy', 'YY3YYY'],
+                             [r['CALL'] for r in adi_reader.iter_records(self.file, ('CALL',), offset)])
+
+    def test_50_last_record(self):
+        self.assertEqual('YY3YYY', adi_reader.read_last_record(self.file)['CALL'])
+
+        with open(self.file, 'w') as f:
+            f.write('Header only <EOH>\n')
+        self.assertDictEqual({}, adi_reader.read_last_record(self.file))
+
+    def test_60_tail_record(self):
+        expected = adi_reader.read_tail_record(self.file)
+        self.assertEqual('YY3YYY', expected['CALL'])
+
+        block_size = adi_reader.TAIL_BLOCK_SIZE
+        try:
+            for size in range(1, 40):
+                adi_reader.TAIL_BLOCK_SIZE = size
+                self.assertDictEqual(expected, adi_reader.read_tail_record(self.file), size)
+        finally:
+            adi_reader.TAIL_BLOCK_SIZE = block_size
+
+        with open(self.file, 'w') as f:
+            f.write('<CALL:6>YY1YYY <EOR>')
+        self.assertDictEqual({'CALL': 'YY1YYY'}, adi_reader.read_tail_record(self.file))
+
+        with open(self.file, 'w') as f:
+            f.write('')
+        self.assertDictEqual({}, adi_reader.read_tail_record(self.file))
+
+    def test_70_tail_fallback(self):
+        with open(self.file, 'a') as f:
+            f.write('<CALL:6>YY4YYY <COMMENT:9>Bad <EOR> <EOR>\n')
+
+        self.assertIsNone(adi_reader.read_tail_record(self.file))
+        self.assertEqual('YY4YYY', adi_reader.read_last_record(self.file)['CALL'])
+
+
+if __name__ == '__main__':
+    unittest.main()
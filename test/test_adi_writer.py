@@ -0,0 +1,157 @@
+import io
+import os
+import time
+import unittest
+import tempfile
+import warnings
+
+from adif_file import adi
+
+from hamcc.hamcc import CassiopeiaConsole
+from hamcc.adi_writer import ADIWriter, serialize_record
+
+
+def serialize(record: dict) -> str:
+    return ' '.join(f'<{k}:{len(v)}>{v}' for k, v in record.items()) + ' <EOR>'
+
+
+class FlushCountIO(io.StringIO):
+    def __init__(self):
+        super().__init__()
+        self.flushes = 0
+
+    def flush(self):
+        self.flushes += 1
+        super().flush()
+
+
+class TestCaseADIWriter(unittest.TestCase):
+    def test_10_single(self):
+        stream = FlushCountIO()
+        writer = ADIWriter(stream, serialize)
+        self.assertEqual(1, writer.write({'CALL': 'YY1YYY'}))
+        self.assertEqual(1, writer.write({'CALL': 'YY2YYY'}))
+        self.assertEqual('\n\n<CALL:6>YY1YYY <EOR>\n\n<CALL:6>YY2YYY <EOR>', stream.getvalue())
+        self.assertEqual(2, stream.flushes)
+        self.assertEqual(0, writer.pending)
+
+    def test_20_batch_size(self):
+        stream = FlushCountIO()
+        committed = []
+        writer = ADIWriter(stream, serialize, batch_size=3, on_commit=committed.append)
+        for i in range(7):
+            writer.write({'CALL': f'YY{i}YYY'})
+        self.assertEqual(1, writer.pending)
+        self.assertEqual(6, writer.committed)
+        self.assertEqual(2, stream.flushes)
+        self.assertListEqual([3, 3], [len(b) for b in committed])
+
+        writer.close()
+        self.assertEqual(7, writer.committed)
+        self.assertListEqual([3, 3, 1], [len(b) for b in committed])
+        self.assertEqual(7, stream.getvalue().count('<EOR>'))
+
+    def test_30_batch_time(self):
+        stream = FlushCountIO()
+        writer = ADIWriter(stream, serialize, batch_size=100, batch_time=.05)
+        writer.write({'CALL': 'YY1YYY'})
+        self.assertEqual(0, writer.poll())
+        self.assertEqual('', stream.getvalue())
+
+        time.sleep(.06)
+        self.assertEqual(1, writer.poll())
+        self.assertEqual('\n\n<CALL:6>YY1YYY <EOR>', stream.getvalue())
+        self.assertEqual(0, writer.poll())
+
+        writer.write({'CALL': 'YY2YYY'})
+        time.sleep(.06)
+        self.assertEqual(2, writer.write({'CALL': 'YY3YYY'}))
+
+    def test_40_sync_none(self):
+        stream = FlushCountIO()
+        writer = ADIWriter(stream, serialize, sync='none')
+        writer.write({'CALL': 'YY1YYY'})
+        self.assertEqual(0, stream.flushes)
+        writer.close()
+        self.assertEqual(1, stream.flushes)
+
+    def test_50_text(self):
+        stream = io.StringIO()
+        writer = ADIWriter(stream, serialize, batch_size=10)
+        writer.write({'CALL': 'YY1YYY'})
+        writer.write_text('Header <EOH>')
+        self.assertEqual('\n\n<CALL:6>YY1YYY <EOR>Header <EOH>', stream.getvalue())
+
+    def test_60_fsync(self):
+        fd, file = tempfile.mkstemp(suffix='.adi')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                writer = ADIWriter(f, serialize, sync='fsync')
+                writer.write({'CALL': 'YY1YYY'})
+                with open(file) as r:
+                    self.assertEqual('\n\n<CALL:6>YY1YYY <EOR>', r.read())
+        finally:
+            os.remove(file)
+
+    def test_70_invalid(self):
+        self.assertRaises(ValueError, ADIWriter, io.StringIO(), serialize, sync='always')
+        self.assertRaises(ValueError, ADIWriter, io.StringIO(), serialize, batch_size=0)
+
+    def test_80_serialized(self):
+        stream = io.StringIO()
+        committed = []
+        writer = ADIWriter(stream, serialize, on_commit=committed.extend)
+        writer.write({'CALL': 'YY1YYY'}, '<CALL:6>YY1YYY <NAME:4>Paul <EOR>')
+        self.assertEqual('\n\n<CALL:6>YY1YYY <NAME:4>Paul <EOR>', stream.getvalue())
+        self.assertListEqual([{'CALL': 'YY1YYY'}], committed)
+
+
+
+class TestCaseSerializeRecord(unittest.TestCase):
+    RECORDS = [
+        {'CALL': 'YY1YYY', 'QSO_DATE': '20240101', 'TIME_ON': '1200', 'BAND': '20m', 'MODE': 'SSB',
+         'NAME': 'Test', 'GRIDSQUARE': '', 'COMMENT': 'x' * 100, 'QTH': 'Somewhere', 'RST_RCVD': '59',
+         'RST_SENT': '59'},
+        {'CALL': 'YY2YYY', 'QSO_DATE': '20240102', 'TIME_ON': '1300', 'BAND': '', 'MODE': '',
+         'NAME': 'A', 'COMMENT': 'Some <tag:3>xyz inside'},
+        {'call': 'YY3YYY', 'app_test_field': 'Value', 'srx': 7, 'FREQ': 14.2, 'QSL_RCVD': True, 'QSL_SENT': False},
+        {'CALL': 'YY4YYY', 'NAME': 'Line\nbreak', 'NAME_INTL': 'Name'},
+        {'CALL': '', 'NAME': ''},
+        {},
+    ]
+
+    def test_10_equal_to_dumps(self):
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            for r in self.RECORDS:
+                self.assertEqual(adi.dumps({'RECORDS': [r]}), serialize_record(r), r)
+
+    def test_20_non_ascii(self):
+        r = {'CALL': 'YY1YYY', 'NAME': 'Jürgen', 'QTH': 'Zürich\tOst'}
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            self.assertEqual(adi.dumps({'RECORDS': [r]}), serialize_record(r))
+
+    def test_30_round_trip(self):
+        cc = CassiopeiaConsole('YY0YYY', 'Home(JO30uj)', 'Me')
+        for qso in ('8 s yy1yyy \'Test 20241105d 1200t "#long comment" ',
+                    '4 f yy2yyy 1202t @Town(JO40aa) 57 ',
+                    '$DARC-10 yy3yyy %012ABC ',
+                    '$ $pota -NXX-001 yy4yyy %XX-002 '):
+            cc.evaluate_line(qso)
+            cc.finalize_qso()
+
+        qsos = list(cc.drain_qsos())
+        self.assertEqual(4, len(qsos))
+        text = adi.dumps({'HEADER': {}}) + ''.join('\n\n' + serialize_record(q) for q in qsos)
+        doc = adi.loads(text)
+        self.assertEqual(4, len(doc['RECORDS']))
+        for q, r in zip(qsos, doc['RECORDS']):
+            self.assertDictEqual({k: v for k, v in q.items() if v}, r)
+
+    def test_40_invalid_field(self):
+        self.assertRaises(ValueError, serialize_record, {'CALL-SIGN': 'YY1YYY'})
+
+
+if __name__ == '__main__':
+    unittest.main()
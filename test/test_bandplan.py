@@ -0,0 +1,69 @@
+import unittest
+
+from hamcc import hamcc
+from hamcc.hamcc import BANDS
+from hamcc.bandplan import BANDPLAN, band_of, check_freq, validate_records
+
+
+class TestCaseBandplan(unittest.TestCase):
+    def test_10_bands(self):
+        self.assertListEqual(BANDS, list(BANDPLAN))
+        for band, (lower, upper) in BANDPLAN.items():
+            self.assertEqual(band, band_of(lower))
+            self.assertEqual(band, band_of(upper))
+            self.assertEqual(band, band_of((lower + upper) / 2))
+
+    def test_20_outside(self):
+        self.assertEqual('', band_of(0.1))
+        self.assertEqual('', band_of(14.351))
+        self.assertEqual('', band_of(123.456))
+        self.assertEqual('', band_of(10000000))
+
+    def test_30_check(self):
+        self.assertEqual('', check_freq('14.312', '20m'))
+        self.assertEqual('', check_freq('14.312', '20M'))
+        self.assertEqual('', check_freq('14.312', ''))
+        self.assertEqual('Frequency 14.312 MHz is not in band 40m', check_freq('14.312', '40m'))
+        self.assertEqual('Frequency 123.456 MHz is not in any band', check_freq('123.456', '2m'))
+        self.assertEqual('Invalid frequency abc', check_freq('abc', '2m'))
+
+    def test_40_validate_records(self):
+        records = [
+            {'CALL': 'YY1YYY', 'BAND': '20m', 'FREQ': '14.2'},
+            {'CALL': 'YY2YYY', 'BAND': '40m', 'FREQ': '14.2'},
+            {'CALL': 'YY3YYY', 'BAND': '40m'},
+            {'CALL': 'YY4YYY', 'FREQ': '3.5'},
+        ]
+        self.assertListEqual([(1, 'Frequency 14.2 MHz is not in band 40m')], list(validate_records(records)))
+
+    def test_50_console(self):
+        cc = hamcc.CassiopeiaConsole('XX1XXX', 'AA11aa', 'Tester')
+        cc.evaluate_line('40m ssb YY1YYY\n')
+
+        # The band carried over from the last QSO follows the frequency
+        self.assertEqual('', cc.evaluate('14312f'))
+        self.assertEqual('20m', cc.current_qso['BAND'])
+        self.assertEqual('Warning: Frequency 14.312 MHz is not in band 40m', cc.evaluate('4'))
+        self.assertEqual('40m', cc.current_qso['BAND'])
+        self.assertEqual('', cc.evaluate('20m'))
+        self.assertEqual('Warning: Frequency 123.456 MHz is not in any band', cc.evaluate('123456f'))
+        self.assertEqual('20m', cc.current_qso['BAND'])
+        self.assertEqual('123.456', cc.current_qso['FREQ'])
+        self.assertEqual('', cc.evaluate('0f'))
+        self.assertEqual('', cc.evaluate('40m'))
+
+    def test_60_console_band_first(self):
+        cc = hamcc.CassiopeiaConsole('XX1XXX', 'AA11aa', 'Tester')
+        cc.evaluate('20m')
+        self.assertEqual('Warning: Frequency 7.074 MHz is not in band 20m', cc.evaluate('7074f'))
+        self.assertEqual('20m', cc.current_qso['BAND'])  # A typed band is kept
+        self.assertEqual('', cc.evaluate('14074f'))
+
+        cc.clear()
+        self.assertEqual('', cc.evaluate('7074f'))
+        self.assertEqual('40m', cc.current_qso['BAND'])
+        self.assertEqual('Warning: Frequency 7.074 MHz is not in band 20m', cc.evaluate('20m'))
+        self.assertEqual('20m', cc.current_qso['BAND'])
+
+if __name__ == '__main__':
+    unittest.main()
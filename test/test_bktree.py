@@ -0,0 +1,94 @@
+import random
+import unittest
+
+from hamcc import hamcc
+from hamcc.bktree import BKTree, levenshtein
+
+
+def levenshtein_dp(a: str, b: str) -> int:
+    prev = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        cur = [i]
+        for j, cb in enumerate(b, 1):
+            cur.append(min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (ca != cb)))
+        prev = cur
+    return prev[-1]
+
+
+class TestCaseBKTree(unittest.TestCase):
+    def test_10_levenshtein(self):
+        self.assertEqual(0, levenshtein('DF1ASC', 'DF1ASC'))
+        self.assertEqual(1, levenshtein('DF1ASC', 'DF1ABC'))
+        self.assertEqual(1, levenshtein('DF1ASC', 'DF1AS'))
+        self.assertEqual(2, levenshtein('DF1ASC', 'FD1ASC'))
+        self.assertEqual(6, levenshtein('', 'DF1ASC'))
+        self.assertEqual(6, levenshtein('DF1ASC', ''))
+
+        rnd = random.Random(1)
+        for _ in range(2000):
+            a = ''.join(rnd.choices('AB1/', k=rnd.randint(0, 9)))
+            b = ''.join(rnd.choices('AB1/', k=rnd.randint(0, 9)))
+            self.assertEqual(levenshtein_dp(a, b), levenshtein(a, b), (a, b))
+
+    def test_20_search(self):
+        rnd = random.Random(2)
+        calls = {''.join(rnd.choices('DFKL19AB', k=rnd.randint(3, 6))) for _ in range(500)}
+        tree = BKTree(calls)
+        self.assertEqual(len(calls), len(tree))
+
+        for query in list(calls)[:50] + ['DF1AB', 'XYZ', 'K']:
+            for k in (1, 2):
+                expected = sorted((d, c) for c in calls if (d := levenshtein_dp(query, c)) <= k)
+                self.assertListEqual(expected, tree.search(query, k), query)
+
+    def test_30_add(self):
+        tree = BKTree()
+        self.assertListEqual([], tree.search('DF1ASC'))
+        self.assertTrue(tree.add('df1asc'))
+        self.assertFalse(tree.add('DF1ASC'))
+        self.assertTrue(tree.add('DF1ABC'))
+        self.assertTrue(tree.add('W1AW'))
+        self.assertEqual(3, len(tree))
+        self.assertListEqual([(1, 'DF1ABC'), (1, 'DF1ASC')], tree.search('DF1AAC', 1))
+
+
+class TestCaseSimilarCalls(unittest.TestCase):
+    def setUp(self):
+        self.cc = hamcc.CassiopeiaConsole('XX1XXX', 'AA11aa', 'Tester',
+                                          init_worked={'YY1YYY': ('20240101', '1200'), 'YY2ZZZ': ('20240101', '1300')},
+                                          suggest_similar=True)
+
+    def test_10_similar(self):
+        self.assertListEqual(['YY1YYY'], self.cc.similar_calls('YY1YYX'))
+        self.assertListEqual(['YY1YYY', 'YY2ZZZ'], self.cc.similar_calls('YY1ZZY'))  # Both distance 2
+        self.assertListEqual(['YY1YYY'], self.cc.similar_calls('YY1YYY/P'))
+        self.assertListEqual([], self.cc.similar_calls('ZZ9ABC'))
+
+    def test_20_evaluate_call(self):
+        self.assertEqual('YY1YYX not worked before, similar: YY1YYY', self.cc.evaluate('yy1yyx'))
+        self.assertEqual('', self.cc.evaluate('ZZ9ABC'))
+        self.assertIn('worked on', self.cc.evaluate('YY1YYY'))
+
+    def test_30_finalized(self):
+        self.cc.evaluate_line('20m ssb zz9abc\n')
+        self.assertListEqual(['ZZ9ABC'], self.cc.similar_calls('ZZ9ABD'))
+
+    def test_40_disabled(self):
+        cc = hamcc.CassiopeiaConsole('XX1XXX', 'AA11aa', 'Tester', init_worked={'YY1YYY': ('20240101', '1200')})
+        self.assertListEqual([], cc.similar_calls('YY1YYX'))
+        self.assertEqual('', cc.evaluate('yy1yyx'))
+
+    def test_50_lazy(self):
+        self.assertIsNone(self.cc.__similar_index__)
+        self.cc.append_qso({'CALL': 'ZZ9ABC', 'QSO_DATE': '20240101', 'TIME_ON': '1400'})
+        self.assertIsNone(self.cc.__similar_index__)
+        self.assertListEqual(['ZZ9ABC'], self.cc.similar_calls('ZZ9ABD'))
+        self.assertIsNotNone(self.cc.__similar_index__)
+
+        self.cc.reset()
+        self.assertIsNone(self.cc.__similar_index__)
+        self.assertListEqual([], self.cc.similar_calls('YY1YYX'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import unittest
+
+from hamcc import hamcc
+from hamcc.callindex import CallIndex
+
+
+class TestCaseCallIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = CallIndex(['DF1ASC', 'df1abc', 'DL1ABC', 'DL/DF1XYZ', 'W1AW', '', 'DF1ASC'])
+
+    def test_10_init(self):
+        self.assertEqual(5, len(self.index))
+        self.assertIn('df1asc', self.index)
+        self.assertNotIn('DF1AS', self.index)
+
+    def test_20_starting_with(self):
+        self.assertListEqual(['DF1ABC', 'DF1ASC'], list(self.index.starting_with('df1a')))
+        self.assertListEqual([], list(self.index.starting_with('XX')))
+
+    def test_30_containing(self):
+        self.assertListEqual(['DF1ABC', 'DL1ABC'], list(self.index.containing('1AB')))
+        self.assertListEqual(['DL/DF1XYZ'], list(self.index.containing('DF1X')))
+        self.assertListEqual(['DF1ABC', 'DF1ASC', 'DL/DF1XYZ'], list(self.index.containing('F1')))
+
+    def test_40_matches(self):
+        self.assertListEqual(['DF1ABC', 'DF1ASC', 'DL/DF1XYZ'], self.index.matches('DF1'))
+        self.assertListEqual(['DF1ABC', 'DF1ASC'], self.index.matches('DF1', 2))
+        self.assertListEqual(['DL1ABC'], self.index.matches('L1A'))
+        self.assertListEqual([], self.index.matches(''))
+
+    def test_50_add(self):
+        self.assertTrue(self.index.add('dk1ab'))
+        self.assertFalse(self.index.add('DK1AB'))
+        self.assertListEqual(['DK1AB', 'DF1ABC', 'DL1ABC'], self.index.matches('1AB'))
+
+
+class TestCasePartialCalls(unittest.TestCase):
+    def setUp(self):
+        self.cc = hamcc.CassiopeiaConsole('XX1XXX', 'AA11aa', 'Tester',
+                                          init_worked={'YY1YYY': ('20240101', '1200'), 'YY2ZZZ': ('20240101', '1300')})
+
+    def test_10_typed(self):
+        for c in 'yy':
+            self.cc.append_char(c)
+        self.assertListEqual(['YY1YYY', 'YY2ZZZ'], self.cc.partial_calls())
+        self.cc.append_char('2')
+        self.assertListEqual(['YY2ZZZ'], self.cc.partial_calls())
+
+    def test_20_fragment(self):
+        self.assertListEqual(['YY2ZZZ'], self.cc.partial_calls('ZZ'))
+        self.assertListEqual([], self.cc.partial_calls('Y'))
+        self.assertListEqual([], self.cc.partial_calls('12'))
+        self.assertListEqual([], self.cc.partial_calls('#YY'))
+
+    def test_30_finalized(self):
+        self.assertListEqual([], self.cc.partial_calls('YY3'))
+        self.cc.evaluate_line('20m ssb yy3yyy\n')
+        self.assertListEqual(['YY3YYY'], self.cc.partial_calls('YY3'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import os
+import unittest
+import tempfile
+
+from hamcc.hamcc import CassiopeiaConsole
+from hamcc.scp import ScpIndex
+from hamcc.check import check_file, read_qso_lines
+
+QSO_LINES = '''20240101d 1200t 20m ssb YY1YYY @JO31
+$TEST YY2YYY %001
+YY3YYY 40m cw
+YY2YYY
+XX
+
+YY2YYY 40m
+"#A comment" 123456f YY4YYY
+5 YY5YYY .9999 ~ YY2YYY 4 c
+YY2YYY 7m
+YY6YYY *YY7YYY
+YY6YYY
+'''
+
+
+class TestCaseCheck(unittest.TestCase):
+    def setUp(self):
+        fd, self.file = tempfile.mkstemp(suffix='.txt')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(QSO_LINES * 3)
+        fd, self.scp_file = tempfile.mkstemp(suffix='.scp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write('YY1YYY\nYY3YYY\n')
+
+    def tearDown(self):
+        for f in (self.file, self.scp_file, self.scp_file + '.idx'):
+            if os.path.isfile(f):
+                os.remove(f)
+
+    def sequential(self, scp_file: str = None) -> list[tuple[int, str, str]]:
+        """The messages of an import line by line"""
+
+        scp = ScpIndex.load(scp_file) if scp_file else None
+        cc = CassiopeiaConsole('XX1XXX', 'JO30uj', scp=scp)
+        messages = []
+        for line_no, line in read_qso_lines(self.file):
+            for seq, res in cc.evaluate_line(line + ' ') + [('', cc.finalize_qso())]:
+                if res.startswith(('Warning:', 'Error:')):
+                    messages.append((line_no, seq, res))
+            list(cc.drain_qsos())
+        if scp:
+            scp.close()
+        return messages
+
+    def test_10_messages(self):
+        messages = check_file(self.file, 'XX1XXX', 'JO30uj', jobs=1)
+        self.assertListEqual([
+            (5, 'XX', 'Warning: Wrong call format'),
+            (7, 'YY2YYY', 'Warning: DUPE YY2YYY 40m CW'),
+            (8, '123456f', 'Warning: Frequency 123.456 MHz is not in any band'),
+            (9, '5', 'Warning: Frequency 123.456 MHz is not in any band'),
+            (9, '.9999', 'Error: Wrong RST format'),
+            (9, '4', 'Warning: Frequency 123.456 MHz is not in any band'),
+            (10, 'YY2YYY', 'Warning: DUPE YY2YYY 40m CW'),  # Not on line 9, the call was given on 15m
+            (10, '7m', 'Error: Unknown number format'),
+        ], messages[:8])
+
+    def test_20_chunks(self):
+        expected = self.sequential()
+        self.assertGreater(len(expected), 9)
+        for chunk_lines in (1, 2, 7):
+            self.assertListEqual(expected, check_file(self.file, 'XX1XXX', 'JO30uj', jobs=1, chunk_lines=chunk_lines))
+        self.assertListEqual(expected, check_file(self.file, 'XX1XXX', 'JO30uj', jobs=2, chunk_lines=4))
+
+        # Worked before calls of former chunks are known, so repeated calls are not reported as unknown to SCP
+        expected = self.sequential(self.scp_file)
+        self.assertTrue(any('not in SCP' in res for _, _, res in expected))
+        for chunk_lines in (1, 2, 7, 2000):
+            self.assertListEqual(expected, check_file(self.file, 'XX1XXX', 'JO30uj', scp_file=self.scp_file,
+                                                      jobs=1, chunk_lines=chunk_lines))
+        self.assertListEqual(expected, check_file(self.file, 'XX1XXX', 'JO30uj', scp_file=self.scp_file,
+                                                  jobs=2, chunk_lines=4))
+
+
+if __name__ == '__main__':
+    unittest.main()
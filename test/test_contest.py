@@ -0,0 +1,176 @@
+import unittest
+
+from hamcc import hamcc
+from hamcc.contest import DupeIndex, ContestScore, event_key, wpx_prefix, contest_definition
+
+
+class TestCaseDupeIndex(unittest.TestCase):
+    def test_10_rules(self):
+        qso = {'CALL': 'YY1YYY', 'BAND': '20m', 'MODE': 'SSB', 'CONTEST_ID': 'TEST'}
+        for rule, dupes in (('call', (True, True, True)),
+                            ('band', (False, True, True)),
+                            ('band-mode', (False, False, True))):
+            index = DupeIndex(rule)
+            index.add(qso)
+            self.assertListEqual(list(dupes), [index.is_dupe({**qso, 'BAND': '40m'}),
+                                               index.is_dupe({**qso, 'MODE': 'CW'}),
+                                               index.is_dupe({**qso, 'CALL': 'yy1yyy'})], rule)
+
+        self.assertRaises(ValueError, DupeIndex, 'unknown')
+
+    def test_20_events(self):
+        self.assertTupleEqual(('TEST',), event_key({'CONTEST_ID': 'test', 'MY_SIG_INFO': 'DE-0001'}))
+        self.assertTupleEqual(('POTA', 'DE-0001', '20240101'),
+                              event_key({'MY_SIG': 'POTA', 'MY_SIG_INFO': 'DE-0001', 'QSO_DATE': '20240101*'}))
+        self.assertTupleEqual((), event_key({'CALL': 'YY1YYY'}))
+
+        index = DupeIndex()
+        index.add({'CALL': 'YY1YYY'})
+        self.assertEqual(0, len(index))
+
+        qso = {'CALL': 'YY1YYY', 'MY_SIG': 'POTA', 'MY_SIG_INFO': 'DE-0001', 'QSO_DATE': '20240101'}
+        index.add(qso)
+        self.assertTrue(index.is_dupe(qso))
+        self.assertFalse(index.is_dupe({**qso, 'QSO_DATE': '20240102'}))
+        self.assertFalse(index.is_dupe({**qso, 'MY_SIG_INFO': 'DE-0002'}))
+        self.assertTupleEqual(('POTA', '1', '20240101'),
+                              event_key({'MY_SIG': 'POTA', 'MY_SIG_INFO': 1, 'QSO_DATE': '20240101'}))
+
+    def test_30_remove(self):
+        index = DupeIndex('call')
+        qso = {'CALL': 'YY1YYY', 'CONTEST_ID': 'TEST'}
+        index.add(qso)
+        index.add(qso)
+        index.remove(qso)
+        self.assertTrue(index.is_dupe(qso))
+        index.remove(qso)
+        self.assertFalse(index.is_dupe(qso))
+        index.remove(qso)
+        self.assertEqual(0, len(index))
+
+
+class TestCaseContestScore(unittest.TestCase):
+    def test_10_wpx_prefix(self):
+        for call, prefix in (('YY1YYY', 'YY1'), ('N8BJQ', 'N8'), ('9A1A', '9A1'), ('2E0ABC', '2E0'),
+                             ('DL/YY1YYY', 'DL0'), ('YY1YYY/VP2E', 'VP2'), ('YY1YYY/KH6', 'KH6'), ('YY1YYY/3', 'YY3'),
+                             ('YY1YYY/P', 'YY1'), ('RAEM', 'RA0')):
+            self.assertEqual(prefix, wpx_prefix(call), call)
+
+    def test_20_points_and_mults(self):
+        score = ContestScore({'points': {'CW': 4, '*': 2}, 'multipliers': ['EXCHANGE']}, DupeIndex('band-mode').key)
+        qso = {'CALL': 'YY1YYY', 'BAND': '10m', 'MODE': 'CW', 'CONTEST_ID': 'ARRL-10', 'SRX_STRING': 'DL'}
+        self.assertTupleEqual((4, 1), score.add(qso))
+        self.assertTupleEqual((2, 0), score.add({**qso, 'CALL': 'YY2YYY', 'MODE': 'SSB'}))
+        self.assertTupleEqual((0, 0), score.add(qso))  # Dupe
+        self.assertTupleEqual((2, 1), score.add({**qso, 'CALL': 'YY3YYY', 'MODE': 'SSB', 'SRX_STRING': 'OE'}))
+        self.assertEqual(3, score.qsos)
+        self.assertEqual(8, score.points)
+        self.assertEqual(2, score.multipliers)
+        self.assertEqual(16, score.score)
+        self.assertEqual('Score 16 (8x2)', str(score))
+
+        score.remove(qso)
+        self.assertEqual(8, score.points)
+        score.remove(qso)
+        self.assertEqual(4, score.points)
+        score.remove({**qso, 'CALL': 'YY3YYY', 'MODE': 'SSB', 'SRX_STRING': 'OE'})
+        self.assertEqual(2, score.score)
+
+    def test_30_per_band(self):
+        score = ContestScore(contest_definition('ARRL-VHF-JUN'), DupeIndex('band').key)
+        qso = {'CALL': 'YY1YYY', 'BAND': '6m', 'CONTEST_ID': 'ARRL-VHF-JUN', 'GRIDSQUARE': 'JO31aa'}
+        score.add(qso)
+        score.add({**qso, 'BAND': '2m'})
+        score.add({**qso, 'CALL': 'YY2YYY', 'GRIDSQUARE': 'JO31bb'})
+        self.assertEqual(2, score.multipliers)
+        self.assertEqual(6, score.score)
+
+    def test_40_default(self):
+        score = ContestScore(contest_definition('UNKNOWN-CONTEST'), DupeIndex().key)
+        score.add({'CALL': 'YY1YYY', 'CONTEST_ID': 'UNKNOWN-CONTEST'})
+        self.assertEqual('Score 1', str(score))
+
+
+class TestCaseDupeCheck(unittest.TestCase):
+    def setUp(self):
+        self.cc = hamcc.CassiopeiaConsole('XX1XXX', 'AA11aa', 'Tester', 'TEST')
+        self.cc.evaluate_line('20m ssb YY1YYY\n')
+
+    def test_10_dupe(self):
+        self.assertEqual('Warning: DUPE YY1YYY 20m SSB', self.cc.evaluate('YY1YYY'))
+        self.cc.evaluate('40m')
+        self.assertIn('worked on', self.cc.evaluate('YY1YYY'))
+
+        # No dupes outside of the event
+        self.cc.evaluate('$')
+        self.cc.evaluate('20m')
+        self.assertIn('worked on', self.cc.evaluate('YY1YYY'))
+
+    def test_20_append_and_logged(self):
+        self.cc.append_qso({'CALL': 'YY2YYY', 'BAND': '20m', 'MODE': 'SSB', 'CONTEST_ID': 'TEST'})
+        self.cc.add_logged([{'CALL': 'YY3YYY', 'BAND': '20m', 'MODE': 'SSB', 'CONTEST_ID': 'TEST'},
+                            {'CALL': 'YY4YYY', 'BAND': '20m', 'MODE': 'SSB', 'CONTEST_ID': 'OTHER'}])
+        self.assertTrue(self.cc.evaluate('YY2YYY').startswith('Warning: DUPE'))
+        self.assertTrue(self.cc.evaluate('YY3YYY').startswith('Warning: DUPE'))
+        self.assertFalse(self.cc.evaluate('YY4YYY').startswith('Warning: DUPE'))
+
+    def test_30_delete(self):
+        self.cc.load_prev()
+        self.assertEqual(0, self.cc.del_selected())
+        self.assertFalse(self.cc.is_dupe({'CALL': 'YY1YYY', 'BAND': '20m', 'MODE': 'SSB', 'CONTEST_ID': 'TEST'}))
+        self.assertNotIn('DUPE', self.cc.evaluate('YY1YYY'))
+
+    def test_40_edit(self):
+        self.cc.load_prev()
+        # The edited QSO is no dupe of itself
+        self.assertNotIn('DUPE', self.cc.evaluate('YY1YYY'))
+        self.cc.evaluate('40m')
+        self.cc.finalize_qso()
+
+        self.cc.evaluate('20m')
+        self.assertNotIn('DUPE', self.cc.evaluate('YY1YYY'))
+        self.cc.evaluate('40m')
+        self.assertIn('DUPE', self.cc.evaluate('YY1YYY'))
+
+        # Leaving edit mode without changes keeps the QSO counted
+        self.cc.clear()
+        self.cc.load_prev()
+        self.cc.load_next()
+        self.cc.clear()
+        self.assertTrue(self.cc.is_dupe({**self.cc.qsos[0]}))
+
+    def test_50_score(self):
+        self.cc.evaluate_line('YY2YYY\nYY3YYY\nYY1YYY\n')
+        self.assertEqual(3, self.cc.score.points)
+
+        self.cc.load_prev()
+        self.assertEqual(3, self.cc.score.points)  # The dupe does not count
+        self.cc.del_selected()
+        self.cc.load_prev()
+        self.assertEqual(2, self.cc.score.points)  # The edited QSO is uncounted
+        self.cc.evaluate('40m')
+        self.cc.finalize_qso()
+        self.assertEqual(3, self.cc.score.points)
+
+        self.cc.add_logged([{'CALL': 'YY4YYY', 'BAND': '20m', 'MODE': 'SSB', 'CONTEST_ID': 'TEST'}])
+        self.assertEqual('Score 4', str(self.cc.score))
+
+        self.cc.evaluate('$')
+        self.assertIsNone(self.cc.score)
+
+    def test_60_reset(self):
+        self.cc.reset()
+        self.cc.evaluate('$TEST')
+        self.cc.evaluate('20m')
+        self.cc.evaluate('ssb')
+        self.assertNotIn('DUPE', self.cc.evaluate('YY1YYY'))
+
+    def test_70_sig_default_ref(self):
+        cc = hamcc.CassiopeiaConsole('XX1XXX', 'AA11aa', 'Tester', 'POTA')  # Started without -N
+        cc.evaluate_line('20m ssb YY1YYY\n')
+        self.assertEqual('1', cc.qsos[0]['MY_SIG_INFO'])
+        self.assertEqual('Warning: DUPE YY1YYY 20m SSB', cc.evaluate('YY1YYY'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+import os
+import unittest
+import tempfile
+
+from hamcc import hamcc
+from hamcc.dxcc import CtyIndex, read_cty_dat
+
+CTY_DAT = '''Fed. Rep. of Germany:     14:  28:  EU:   51.00:   -10.00:    -1.0:  DL:
+    DA,DB,DC,DD,DE,DF,DG,DH,DI,DJ,DK,DL,DM,DN,DO,DP,DQ,DR,Y2,Y3,Y4,Y5,Y6,Y7,Y8,Y9;
+United States:            05:  08:  NA:   37.53:    91.67:     5.0:  K:
+    AA,AB,AC,AD,AE,AF,AG,AI,AJ,AK,K,N,W,=KH6XX(31)[61]{OC};
+Hawaii:                   31:  61:  OC:   21.12:   157.48:    10.0:  KH6:
+    AH6,AH7,KH6,KH7,NH6,NH7,WH6,WH7;
+European Turkey:          20:  39:  EU:   41.02:   -28.97:    -2.0:  *TA1:
+    TA1;
+Turkey:                   20:  39:  AS:   39.18:   -35.65:    -2.0:  TA:
+    TA,TB,TC,YM;
+'''
+
+CTY_CSV = '''DL,Fed. Rep. of Germany,230,EU,14,28,51.00,-10.00,-1.0,DA DB DC DD DE DF DG DH DI DJ DK DL DM DN DO;
+K,United States,291,NA,05,08,37.53,91.67,5.0,AA K N W =KH6XX(31)[61]{OC};
+'''
+
+
+class TestCaseCtyIndex(unittest.TestCase):
+    def setUp(self):
+        self.cty = CtyIndex()
+        for entity, aliases in read_cty_dat(CTY_DAT):
+            if not entity.prefix.startswith('*'):
+                self.cty.add(entity, aliases)
+
+    def test_10_longest_prefix(self):
+        self.assertEqual(4, len(self.cty))
+        self.assertEqual('Fed. Rep. of Germany', self.cty.resolve('DL1ABC').name)
+        self.assertEqual('United States', self.cty.resolve('W1AW').name)
+        self.assertEqual('Hawaii', self.cty.resolve('kh6abc').name)
+        self.assertEqual('Turkey', self.cty.resolve('TA1ABC').name)  # WAE entity skipped
+        self.assertIsNone(self.cty.resolve('XX1XXX'))
+
+    def test_20_exact_and_overrides(self):
+        entity = self.cty.resolve('KH6XX')
+        self.assertEqual('United States', entity.name)
+        self.assertTupleEqual(('OC', '31', '61'), (entity.cont, entity.cqz, entity.ituz))
+        self.assertEqual('Hawaii', self.cty.resolve('KH6XY').name)
+
+    def test_30_portable(self):
+        self.assertEqual('Fed. Rep. of Germany', self.cty.resolve('W1AW/DL').name)
+        self.assertEqual('Fed. Rep. of Germany', self.cty.resolve('DL/W1AW/P').name)
+        self.assertEqual('Hawaii', self.cty.resolve('KH6/W1AW').name)
+        self.assertEqual('United States', self.cty.resolve('W1AW/P').name)
+        self.assertEqual('United States', self.cty.resolve('W1AW/4').name)
+        self.assertIsNone(self.cty.resolve('W1AW/MM'))
+
+    def test_35_designator_edge_cases(self):
+        self.assertEqual('United States', self.cty.resolve('K/K').name)
+        self.assertEqual('United States', self.cty.resolve('W/W/W').name)
+        self.assertEqual('Fed. Rep. of Germany', self.cty.resolve('DL/').name)
+        self.assertEqual('United States', self.cty.resolve('/W1AW').name)
+        self.assertIsNone(self.cty.resolve('/'))
+        self.assertIsNone(self.cty.resolve('//'))
+        self.assertIsNone(self.cty.resolve('/P'))
+
+    def test_40_annotate(self):
+        record = {'CALL': 'DL1ABC', 'DXCC': '291'}
+        self.cty.annotate(record)
+        self.assertDictEqual({'CALL': 'DL1ABC', 'COUNTRY': 'Fed. Rep. of Germany', 'CONT': 'EU', 'CQZ': '14',
+                              'ITUZ': '28'}, record)
+        record['CALL'] = 'XX1XXX'
+        self.assertIsNone(self.cty.annotate(record))
+        self.assertDictEqual({'CALL': 'XX1XXX'}, record)
+
+    def test_50_load(self):
+        for suffix, content, dxcc in (('.dat', CTY_DAT, ''), ('.csv', CTY_CSV, '230')):
+            fd, file = tempfile.mkstemp(suffix=suffix)
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(content)
+            try:
+                cty = CtyIndex.load(file)
+                self.assertEqual(dxcc, cty.resolve('DL1ABC').dxcc)
+                self.assertEqual('OC', cty.resolve('KH6XX').cont)
+            finally:
+                os.remove(file)
+
+        fd, file = tempfile.mkstemp(suffix='.dat')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(CTY_DAT)
+        try:
+            self.assertEqual('European Turkey', CtyIndex.load(file, wae=True).resolve('TA1ABC').name)
+        finally:
+            os.remove(file)
+
+    def test_60_console(self):
+        cc = hamcc.CassiopeiaConsole('XX1XXX', 'AA11aa', 'Tester', cty=self.cty)
+        cc.evaluate('DL1ABC')
+        self.assertEqual('EU', cc.current_qso['CONT'])
+        cc.evaluate('W1AW')
+        self.assertEqual('NA', cc.current_qso['CONT'])
+        cc.finalize_qso()
+        self.assertEqual('United States', cc.qsos[0]['COUNTRY'])
+        self.assertNotIn('COUNTRY', cc.current_qso)
+
+        # Changed call of a loaded QSO
+        cc.load_prev()
+        cc.current_qso['CALL'] = 'DL1ABC'
+        cc.evaluate('40m')
+        cc.finalize_qso()
+        self.assertEqual('14', cc.qsos[0]['CQZ'])
+
+    def test_70_console_wrong_call(self):
+        cc = hamcc.CassiopeiaConsole('XX1XXX', 'AA11aa', 'Tester', cty=self.cty)
+        cc.evaluate('DL1ABC')
+        self.assertEqual('Warning: Wrong call format', cc.evaluate('K/K'))
+        self.assertNotIn('COUNTRY', cc.current_qso)
+        self.assertEqual('Warning: Wrong call format', cc.evaluate('/'))
+        cc.finalize_qso()
+        self.assertNotIn('COUNTRY', cc.qsos[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
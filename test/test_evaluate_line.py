@@ -0,0 +1,70 @@
+import unittest
+
+from hamcc import hamcc
+
+
+class TestCaseEvaluateLine(unittest.TestCase):
+    def setUp(self):
+        self.cc = hamcc.CassiopeiaConsole('XX1XXX', 'AA11aa', 'Tester')
+        self.cc_ref = hamcc.CassiopeiaConsole('XX1XXX', 'AA11aa', 'Tester')
+
+    def assert_same_as_append_char(self, line):
+        self.cc.evaluate_line(line)
+        for c in line:
+            self.cc_ref.append_char(c)
+
+        self.assertEqual(self.cc_ref.__cur_seq__, self.cc.__cur_seq__)
+        self.assertEqual(self.cc_ref.__long_mode__, self.cc.__long_mode__)
+        self.assertDictEqual(self.cc_ref.current_qso, self.cc.current_qso)
+        self.assertListEqual(self.cc_ref.qsos, self.cc.qsos)
+
+    def test_10_simple(self):
+        self.assertListEqual([('YY1YYY', ''), ('\'Test', '')], self.cc.evaluate_line('YY1YYY \'Test '))
+        self.assertEqual('YY1YYY', self.cc.current_qso['CALL'])
+        self.assertEqual('Test', self.cc.current_qso['NAME'])
+
+    def test_20_results(self):
+        self.assertListEqual([('1o', 'Error: Unknown number format'),
+                              ('AA1AAA1', 'Warning: Wrong call format'),
+                              ('', 'Last QSO cached: AA1AAA1')],
+                             self.cc.evaluate_line('1o  AA1AAA1 \n'))
+
+    def test_30_quoted(self):
+        self.assertListEqual([('#Long Comment', '')], self.cc.evaluate_line('"#Long Comment"'))
+        self.assertEqual('Long Comment', self.cc.current_qso['COMMENT'])
+
+        self.cc.evaluate_line('"\'Test Tester\n')
+        self.assertEqual('Test Tester', self.cc.qsos[0]['NAME'])
+
+    def test_40_unfinished(self):
+        self.assertListEqual([], self.cc.evaluate_line('YY1'))
+        self.cc.evaluate_line('YYY ')
+        self.assertEqual('YY1YYY', self.cc.current_qso['CALL'])
+
+        self.cc.evaluate_line('"\'Test')
+        self.cc.evaluate_line(' Tester" ')
+        self.assertEqual('Test Tester', self.cc.current_qso['NAME'])
+
+    def test_50_commands(self):
+        self.cc.evaluate_line('YY1YYY \'Test ~')
+        self.assertEqual('', self.cc.current_qso['CALL'])
+        self.assertNotIn('NAME', self.cc.current_qso)
+
+        self.assertListEqual([('?', str(self.cc.current_qso))], self.cc.evaluate_line('?'))
+
+    def test_60_backspace(self):
+        self.cc.evaluate_line('YY1YYYY\b ')
+        self.assertEqual('YY1YYY', self.cc.current_qso['CALL'])
+
+    def test_70_same_as_append_char(self):
+        for line in ('8 s df1asc \'Andreas 20241105d\n',
+                     '4  f df1asc "#Long comment" 1202d\n',
+                     '$TEST %12 "#Long ~? comment\n',
+                     'a"b c"d e~ f? g\b\bh\n',
+                     '20m cw YY1YYY "\'Te\bst Tester',
+                     ' x"\n'):
+            self.assert_same_as_append_char(line)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+import os
+import unittest
+import tempfile
+
+from hamcc import hamcc
+from hamcc.adi_index import LogIndex
+from hamcc.history import CallHistory, read_history_file
+
+N1MM_HISTORY = '''# Call history for testing
+!!Order!!,Call,Name,Loc1,Exch1,
+YY1YYY,Andreas,JO31aa,B01,
+YY2YYY,Paul,Bremen,,
+'''
+
+
+class TestCaseCallHistory(unittest.TestCase):
+    def setUp(self):
+        fd, self.file = tempfile.mkstemp(suffix='.txt')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(N1MM_HISTORY)
+
+    def tearDown(self):
+        os.remove(self.file)
+
+    def test_10_read_file(self):
+        self.assertListEqual([('YY1YYY', 'Andreas', 'JO31aa', '', 'B01'),
+                              ('YY2YYY', 'Paul', '', '', '')], list(read_history_file(self.file)))
+
+        with open(self.file, 'w', encoding='utf-8') as f:
+            f.write('Name,QTH\nAndreas,Essen\n')
+        self.assertRaises(ValueError, list, read_history_file(self.file))
+
+    def test_20_lazy_merge(self):
+        loaded = []
+
+        def log():
+            loaded.append(True)
+            yield 'YY1YYY', '', 'JO31bb', 'Essen', ''
+            yield 'YY3YYY', 'Tom', '', '', '001'
+
+        history = CallHistory(lambda: read_history_file(self.file), log)
+        history.add({'CALL': 'YY3YYY', 'NAME': 'Thomas'})
+        self.assertFalse(history.loaded)
+        self.assertListEqual([], loaded)
+
+        self.assertDictEqual({'NAME': 'Andreas', 'GRIDSQUARE': 'JO31bb', 'QTH': 'Essen', 'SRX_STRING': 'B01'},
+                             history.get('yy1yyy'))
+        self.assertDictEqual({'NAME': 'Thomas', 'SRX_STRING': '001'}, history.get('YY3YYY'))
+        self.assertDictEqual({}, history.get('YY4YYY'))
+        self.assertEqual(3, len(history))
+        self.assertListEqual([True], loaded)
+
+        history.add({'CALL': 'YY4YYY', 'GRIDSQUARE': 'JO40'})
+        self.assertDictEqual({'GRIDSQUARE': 'JO40'}, history.get('YY4YYY'))
+
+    def test_30_missing_file(self):
+        history = CallHistory(lambda: read_history_file(self.file + '.missing'))
+        self.assertDictEqual({}, history.get('YY1YYY'))
+
+    def test_40_log_index(self):
+        fd, file = tempfile.mkstemp(suffix='.adi')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write('<EOH>\n\n<CALL:6>YY1YYY <QSO_DATE:8>20240101 <TIME_ON:4>1200 <NAME:7>Andreas <EOR>\n'
+                    '<CALL:6>YY2YYY <QSO_DATE:8>20240101 <TIME_ON:4>1300 <EOR>\n')
+        try:
+            index = LogIndex(file)
+            index.refresh()
+            index.add({'CALL': 'YY3YYY', 'QSO_DATE': '20240101', 'TIME_ON': '1400', 'QTH': 'Essen\tCity'})
+            index.close()
+            self.assertListEqual([('YY1YYY', 'Andreas', '', '', ''), ('YY3YYY', '', '', 'Essen City', '')],
+                                 list(index.history()))
+        finally:
+            os.remove(file)
+            os.remove(file + '.idx')
+
+
+class TestCasePrefill(unittest.TestCase):
+    def setUp(self):
+        history = CallHistory(lambda: [('YY1YYY', 'Andreas', 'JO31aa', 'Essen', 'B01'),
+                                       ('YY2YYY', 'Paul', '', '', '042')])
+        self.cc = hamcc.CassiopeiaConsole('XX1XXX', 'AA11aa', 'Tester', history=history)
+
+    def test_10_prefill(self):
+        self.cc.evaluate('YY1YYY')
+        qso = self.cc.current_qso
+        self.assertEqual('Andreas', qso['NAME'])
+        self.assertEqual('JO31aa', qso['GRIDSQUARE'])
+        self.assertEqual('Essen', qso['QTH'])
+        self.assertNotIn('SRX_STRING', qso)
+
+        # Corrected call
+        self.cc.evaluate('YY2YYY')
+        self.assertEqual('Paul', qso['NAME'])
+        self.assertEqual('', qso['GRIDSQUARE'])
+        self.assertNotIn('QTH', qso)
+
+    def test_20_override(self):
+        self.cc.evaluate('\'Paul')
+        self.cc.evaluate('YY1YYY')
+        self.assertEqual('Paul', self.cc.current_qso['NAME'])
+        self.cc.evaluate('@JO40aa')
+        self.cc.evaluate('YY2YYY')
+        self.assertEqual('JO40aa', self.cc.current_qso['GRIDSQUARE'])
+
+        self.cc.finalize_qso()
+        self.assertNotIn('NAME', self.cc.current_qso)
+
+    def test_30_contest(self):
+        self.cc.evaluate('$TEST')
+        self.cc.evaluate('YY1YYY')
+        self.assertEqual('B01', self.cc.current_qso['SRX_STRING'])
+        self.cc.evaluate('YY2YYY')
+        self.assertEqual('', self.cc.current_qso.get('SRX_STRING', ''))  # No serial numbers
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -63,7 +63,7 @@ class TestCaseInstantiate(unittest.TestCase):
             '1Y1YY',
             '@BB22bb',
             '#Test_Comment',
-            '123456f',
+            '144300f',
             '23p',
             '\'Nobody',
         ]
@@ -82,7 +82,7 @@ class TestCaseInstantiate(unittest.TestCase):
             'COMMENT': 'Test Comment',
             'RST_RCVD': '59',
             'RST_SENT': '59',
-            'FREQ': '123.456',
+            'FREQ': '144.3',
             'TX_PWR': '23',
         }
 
@@ -99,7 +99,7 @@ class TestCaseInstantiate(unittest.TestCase):
             'COMMENT': 'Test Comment',
             'RST_RCVD': '59',
             'RST_SENT': '59',
-            'FREQ': '123.456',
+            'FREQ': '144.3',
             'TX_PWR': '23',
         }
 
@@ -0,0 +1,193 @@
+import os
+import unittest
+import tempfile
+
+from hamcc import hamcc
+from hamcc.journal import QSOJournal
+from hamcc._console_ import load_cache
+
+
+class TestCaseJournal(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.file = os.path.join(self.dir.name, 'log.adi.journal')
+        self.journal = QSOJournal(self.file)
+
+    def tearDown(self):
+        self.journal.close()
+        self.dir.cleanup()
+
+    def lines(self) -> list[str]:
+        with open(self.file, encoding='utf-8') as f:
+            return f.read().splitlines()
+
+    def test_10_replay(self):
+        self.assertListEqual([], self.journal.replay())
+
+        for call in ('YY1YYY', 'YY2YYY', 'YY3YYY'):
+            self.journal.add({'CALL': call, 'BAND': '20m'})
+        self.journal.set(2, {'CALL': 'YY3YYY', 'BAND': '40m'})
+        self.journal.delete(1)
+        self.assertEqual(5, len(self.journal))
+        self.assertListEqual(['A', 'A', 'A', 'S', 'D'], [line[0] for line in self.lines()])
+
+        self.assertTrue(self.journal.sync())
+        self.assertFalse(self.journal.sync())
+
+        self.assertListEqual([{'CALL': 'YY1YYY', 'BAND': '20m'}, {'CALL': 'YY3YYY', 'BAND': '40m'}],
+                             QSOJournal(self.file).replay())
+
+    def test_20_damaged(self):
+        self.journal.add({'CALL': 'YY1YYY'})
+        self.journal.close()
+
+        with open(self.file, 'a', encoding='utf-8') as f:
+            f.write('A {"CALL":"YY2YY')  # Crashed while writing
+        with self.assertLogs('hamcc.journal', 'WARNING'):
+            self.assertListEqual([{'CALL': 'YY1YYY'}], self.journal.replay())
+
+        for damaged in ('D 5', 'S x {}', 'A []', 'X'):
+            with open(self.file, 'w', encoding='utf-8') as f:
+                f.write(f'A {{"CALL":"YY1YYY"}}\n{damaged}\nA {{"CALL":"YY2YYY"}}\n')
+            with self.assertLogs('hamcc.journal', 'WARNING'):
+                self.assertListEqual([{'CALL': 'YY1YYY'}], self.journal.replay(), damaged)
+
+    def test_30_compact(self):
+        for call in ('YY1YYY', 'YY2YYY'):
+            self.journal.add({'CALL': call})
+        self.journal.delete(0)
+
+        self.journal.compact([{'CALL': 'YY2YYY'}])
+        self.assertEqual(0, len(self.journal))
+        self.assertListEqual(['A {"CALL":"YY2YYY"}'], self.lines())
+        self.assertFalse(os.path.exists(self.file + '.tmp'))
+
+        self.journal.add({'CALL': 'YY3YYY'})
+        self.assertListEqual([{'CALL': 'YY2YYY'}, {'CALL': 'YY3YYY'}], self.journal.replay())
+
+        self.journal.compact([])
+        self.assertFalse(os.path.exists(self.file))
+        self.journal.compact([])
+
+
+class TestCaseJournalConsole(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.journal = QSOJournal(os.path.join(self.dir.name, 'log.adi.journal'))
+        self.cc = hamcc.CassiopeiaConsole('XX1XXX', 'AA11aa', 'Tester', journal=self.journal)
+        for call in ('YY1YYY', 'YY2YYY', 'YY3YYY'):
+            self.cc.evaluate_line(f'20m ssb {call}\n')
+
+    def tearDown(self):
+        self.journal.close()
+        self.dir.cleanup()
+
+    def replayed(self) -> list[tuple[str, str]]:
+        return [(q['CALL'], q['BAND']) for q in self.journal.replay()]
+
+    def test_10_finalize(self):
+        self.assertEqual(3, len(self.journal))
+        self.assertListEqual([(q['CALL'], q['BAND']) for q in self.cc.qsos], self.replayed())
+
+    def test_20_edit(self):
+        # Browsing without changes is not journaled
+        self.cc.load_prev()
+        self.cc.load_prev()
+        self.cc.load_next()
+        self.cc.clear()
+        self.assertEqual(3, len(self.journal))
+
+        self.cc.load_prev()
+        self.cc.evaluate_line('40m\n')
+        self.assertEqual(4, len(self.journal))
+        self.assertListEqual([('YY1YYY', '20m'), ('YY2YYY', '20m'), ('YY3YYY', '40m')], self.replayed())
+
+    def test_30_delete(self):
+        self.cc.load_prev()
+        self.cc.load_prev()
+        self.assertEqual(1, self.cc.del_selected())
+        self.assertListEqual([('YY1YYY', '20m'), ('YY3YYY', '20m')], self.replayed())
+
+    def test_40_drain(self):
+        drained = list(self.cc.drain_qsos())
+        self.assertEqual(3, len(drained))
+        self.journal.compact(self.cc.qsos)
+        self.assertListEqual([], self.journal.replay())
+
+
+class TestCaseJournalLoaded(unittest.TestCase):
+    """QSOs loaded with -L are kept in the backup file and not journaled"""
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.file = os.path.join(self.dir.name, 'log.adi.journal')
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def start(self, records: list[dict[str, str]]) -> tuple[hamcc.CassiopeiaConsole, QSOJournal, int]:
+        journal = QSOJournal(self.file)
+        cc = hamcc.CassiopeiaConsole('XX1XXX', 'AA11aa', 'Tester', journal=journal)
+        return cc, journal, load_cache(cc, records, journal)
+
+    @staticmethod
+    def loaded() -> list[dict[str, str]]:
+        return [{'CALL': f'YY{i}YYY', 'QSO_DATE': '20240101', 'TIME_ON': f'12{i}0', 'BAND': '20m', 'MODE': 'SSB'}
+                for i in range(1, 4)]
+
+    def test_10_restart(self):
+        cc, journal, restored = self.start(self.loaded())
+        self.assertEqual(0, restored)
+        self.assertFalse(os.path.exists(self.file))
+
+        cc.evaluate_line('40m cw ZZ1ZZZ\n')
+        cc.evaluate_line('ZZ2ZZZ\n')
+        cc.load_prev()
+        cc.evaluate_line('80m\n')  # Changed a new QSO
+        for _ in range(3):
+            cc.load_prev()
+        cc.evaluate_line('15m\n')  # Changed a loaded QSO
+        for _ in range(4):
+            cc.load_prev()
+        self.assertEqual(1, cc.del_selected())  # Deleted a loaded QSO
+        cc.clear()
+        journal.close()  # Crashed
+        self.assertListEqual(['YY1YYY', 'YY3YYY', 'ZZ1ZZZ', 'ZZ2ZZZ'], [q['CALL'] for q in cc.qsos])
+
+        # Restarted with -L from the file still without the QSOs
+        cc, journal, restored = self.start([])
+        self.assertEqual(2, restored)
+        self.assertListEqual([('ZZ1ZZZ', '40m'), ('ZZ2ZZZ', '80m')], [(q['CALL'], q['BAND']) for q in cc.qsos])
+        journal.close()
+
+        cc, journal, restored = self.start(self.loaded())
+        self.assertListEqual(['YY1YYY', 'YY2YYY', 'YY3YYY', 'ZZ1ZZZ', 'ZZ2ZZZ'], [q['CALL'] for q in cc.qsos])
+        self.assertEqual(2, len(journal.replay()))
+        journal.close()
+
+    def test_20_saved(self):
+        cc, journal, _ = self.start(self.loaded())
+        cc.evaluate_line('40m cw ZZ1ZZZ\n')
+
+        drained = []
+        with self.assertRaises(OSError):
+            for q in cc.drain_qsos():
+                if len(drained) == 2:
+                    raise OSError('Disk full')
+                drained.append(q)
+        journal.compact(cc.qsos)  # One loaded QSO is left in front of the journaled one
+        self.assertListEqual(['ZZ1ZZZ'], [q['CALL'] for q in journal.replay()])
+
+        cc.load_next()
+        cc.evaluate_line('15m\n')  # Changed the loaded QSO
+        self.assertListEqual([('ZZ1ZZZ', '40m')], [(q['CALL'], q['BAND']) for q in journal.replay()])
+
+        list(cc.drain_qsos())
+        journal.compact(cc.qsos)
+        self.assertFalse(os.path.exists(self.file))
+        cc.evaluate_line('ZZ2ZZZ\n')
+        self.assertListEqual(['ZZ2ZZZ'], [q['CALL'] for q in journal.replay()])
+        journal.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import unittest
+from unittest import mock
+
+from hamcc import hamcc, locator
+from hamcc.locator import locator2coords, path, distance, bearing, fill_distances
+from hamcc._console_ import qso2str
+
+
+class TestCaseLocator(unittest.TestCase):
+    def test_10_coords(self):
+        self.assertTupleEqual((0.5, 1.0), locator2coords('JJ00'))
+        lat, lon = locator2coords('jo31LE')
+        self.assertAlmostEqual(51.1875, lat)
+        self.assertAlmostEqual(6.958333, lon, places=5)
+        lat, lon = locator2coords('JO31le56')
+        self.assertAlmostEqual(51.19375, lat)
+        self.assertAlmostEqual(6.9625, lon)
+
+        for loc in ('', 'JO3', 'JO31l', 'SS00', 'JO31yy', 'JO31le5a', 'JO31le5678'):
+            self.assertRaises(ValueError, locator2coords, loc)
+
+    def test_20_path(self):
+        self.assertAlmostEqual(222.38, distance('JJ00', 'JJ10'), places=2)
+        self.assertAlmostEqual(90.0, bearing('JJ00', 'JJ10'), places=1)
+        self.assertAlmostEqual(0.0, bearing('JJ00', 'JJ01'))
+        self.assertAlmostEqual(270.0, bearing('JJ10', 'JJ00'), places=1)
+        self.assertEqual(0.0, distance('JO31le', 'JO31LE'))
+
+        dist, azimuth = path('JO31le', 'FN31pr')
+        self.assertEqual(5887, round(dist))
+        self.assertEqual(293, round(azimuth))
+
+    def test_30_fill_distances(self):
+        records = [
+            {'MY_GRIDSQUARE': 'JO31le', 'GRIDSQUARE': 'FN31pr'},
+            {'MY_GRIDSQUARE': 'JO31le', 'GRIDSQUARE': ''},
+            {'MY_GRIDSQUARE': 'JO31le', 'GRIDSQUARE': 'JJ00'},
+            {'GRIDSQUARE': 'JJ00', 'DISTANCE': '7'},
+            {'MY_GRIDSQUARE': 'JO31le', 'GRIDSQUARE': 'FN31pr', 'DISTANCE': '5890'},
+        ]
+        self.assertEqual(2, fill_distances(records))
+        self.assertEqual('5887', records[0]['DISTANCE'])
+        self.assertNotIn('DISTANCE', records[1])
+        self.assertEqual('5664', records[2]['DISTANCE'])
+        self.assertEqual('7', records[3]['DISTANCE'])
+        self.assertEqual('5890', records[4]['DISTANCE'])  # Logged distance is kept
+        self.assertEqual(0, fill_distances([]))
+
+    def test_40_fill_distances_fallback(self):
+        records = [{'MY_GRIDSQUARE': 'JO31le', 'GRIDSQUARE': 'FN31pr'}]
+        with mock.patch.object(locator, 'np', None):
+            self.assertEqual(1, fill_distances(records))
+        self.assertEqual('5887', records[0]['DISTANCE'])
+
+    def test_50_console(self):
+        cc = hamcc.CassiopeiaConsole('XX1XXX', 'JO31le', 'Tester')
+        cc.evaluate('YY1YYY')
+        cc.evaluate('@FN31pr')
+        self.assertIn('@ FN31pr 5887 km 293 deg', qso2str(cc.current_qso, cc.edit_pos, 0)[1])
+        cc.finalize_qso()
+        self.assertEqual('5887', cc.qsos[0]['DISTANCE'])
+
+        cc.load_prev()
+        cc.evaluate('@')
+        cc.finalize_qso()
+        self.assertNotIn('DISTANCE', cc.qsos[0])
+
+    def test_60_console_logged_distance(self):
+        cc = hamcc.CassiopeiaConsole('XX1XXX', 'JO31le', 'Tester')
+        cc.append_qso({'CALL': 'YY1YYY', 'MY_GRIDSQUARE': 'JO31le', 'GRIDSQUARE': 'FN31pr', 'DISTANCE': '5890'})
+        cc.load_prev()
+        cc.evaluate('20m')
+        cc.finalize_qso()
+        self.assertEqual('5890', cc.qsos[0]['DISTANCE'])
+
+        cc.load_prev()
+        cc.evaluate('@FN31')
+        cc.finalize_qso()
+        self.assertEqual('5922', cc.qsos[0]['DISTANCE'])
+
+
+if __name__ == '__main__':
+    unittest.main()
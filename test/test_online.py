@@ -0,0 +1,40 @@
+import unittest
+from unittest import mock
+
+from hamcc import hamcc
+
+
+class TestCaseOnline(unittest.TestCase):
+    def setUp(self):
+        with mock.patch.object(hamcc, 'get_cur_adif_dt', return_value=('20240101', '1200')):
+            self.cc = hamcc.CassiopeiaConsole('XX1XXX', 'AA11aa', 'Tester', online=True)
+
+    def test_10_refresh(self):
+        self.assertEqual('1200*', self.cc.current_qso['TIME_ON'])
+
+        with mock.patch.object(hamcc, 'get_cur_adif_dt', return_value=('20240101', '1200')):
+            self.assertFalse(self.cc.refresh_time())
+
+        with mock.patch.object(hamcc, 'get_cur_adif_dt', return_value=('20240102', '0001')):
+            self.assertTrue(self.cc.refresh_time())
+        self.assertEqual('20240102*', self.cc.current_qso['QSO_DATE'])
+        self.assertEqual('0001*', self.cc.current_qso['TIME_ON'])
+
+    def test_20_refresh_fixed_time(self):
+        self.cc.evaluate('1130t')
+
+        with mock.patch.object(hamcc, 'get_cur_adif_dt', return_value=('20240101', '1201')):
+            self.assertFalse(self.cc.refresh_time())
+        self.assertEqual('1130', self.cc.current_qso['TIME_ON'])
+
+    def test_30_offline(self):
+        self.cc.set_online(False)
+        time_on = self.cc.current_qso['TIME_ON']
+
+        with mock.patch.object(hamcc, 'get_cur_adif_dt', return_value=('20240102', '0001')):
+            self.assertFalse(self.cc.refresh_time())
+        self.assertEqual(time_on, self.cc.current_qso['TIME_ON'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,121 @@
+import io
+import os
+import queue
+import unittest
+import threading
+import tempfile
+from unittest import mock
+
+from adif_file import adi
+
+from hamcc.pipeline import END, Stage, Reader, drain
+from hamcc import __main__
+from hamcc.adi_writer import ADIWriter
+from hamcc.__main__ import process_qsos
+
+
+class TestCasePipeline(unittest.TestCase):
+    def test_10_order(self):
+        inbox, middle, outbox = queue.Queue(4), queue.Queue(4), queue.Queue(4)
+        stages = [Stage('double', lambda i: i * 2, inbox, middle), Stage('inc', lambda i: i + 1, middle, outbox)]
+        reader = Reader(range(100), inbox)
+        reader.start()
+        for s in stages:
+            s.start()
+        self.assertListEqual([i * 2 + 1 for i in range(100)], list(drain(outbox)))
+        for s in stages:
+            s.join()
+        self.assertIsNone(reader.error)
+
+    def test_20_error(self):
+        inbox, outbox = queue.Queue(2), queue.Queue()
+        stage = Stage('fail', lambda i: 10 // i, inbox, outbox)
+        stage.start()
+        for i in (5, 2, 0, 1, 1, 1):  # Items after the error are discarded without blocking
+            inbox.put(i)
+        inbox.put(END)
+        stage.join(5)
+        self.assertFalse(stage.is_alive())
+        self.assertListEqual([2, 5], list(drain(outbox)))
+        self.assertIsInstance(stage.error, ZeroDivisionError)
+
+    def test_30_idle(self):
+        inbox, polled = queue.Queue(), threading.Event()
+        stage = Stage('idle', lambda i: i, inbox, idle=polled.set, timeout=0.01)
+        stage.start()
+        self.assertTrue(polled.wait(5))
+        inbox.put(END)
+        stage.join(5)
+        self.assertFalse(stage.is_alive())
+
+    def test_40_reader_error(self):
+        def source():
+            yield 'line'
+            raise OSError('broken pipe')
+
+        outbox = queue.Queue()
+        reader = Reader(source(), outbox)
+        reader.start()
+        reader.join(5)
+        self.assertListEqual(['line'], list(drain(outbox)))
+        self.assertIsInstance(reader.error, OSError)
+
+
+class TestCaseProcessQSOs(unittest.TestCase):
+    def setUp(self):
+        fd, self.file = tempfile.mkstemp(suffix='.adi')
+        os.close(fd)
+
+    def tearDown(self):
+        for f in (self.file, self.file + '.idx'):
+            if os.path.isfile(f):
+                os.remove(f)
+
+    def test_10_stdin(self):
+        lines = ''.join(f'20m cw 20240101d {i % 60:02d}00t YY{i % 10}YYY\n' for i in range(200)) + '\nYY1XXX\n'
+        process_qsos(io.StringIO(lines), self.file, 'XX1XXX', 'JO31le', 'Tester', contest_id='TEST',
+                     batch_size=7, batch_time=0.01)
+
+        records = adi.load(self.file)['RECORDS']
+        self.assertEqual(200, len(records))  # Input ends at the empty line
+        self.assertListEqual([f'YY{i % 10}YYY' for i in range(200)], [r['CALL'] for r in records])
+        self.assertListEqual([f'{i + 1:03d}' for i in range(200)], [r['STX_STRING'] for r in records])
+
+    def test_20_list(self):
+        process_qsos([['YY1YYY', '20m', 's'], ['YY2YYY']], self.file, 'XX1XXX', 'JO31le', 'Tester')
+        self.assertListEqual(['YY1YYY', 'YY2YYY'], [r['CALL'] for r in adi.load(self.file)['RECORDS']])
+
+    def test_30_logged_dupes(self):
+        process_qsos(io.StringIO('20m cw YY1YYY\n'), self.file, 'XX1XXX', 'JO31le', 'Tester', contest_id='TEST')
+
+        # The dupe check of an appending import knows the event QSOs of the log
+        with self.assertLogs('HamCC', 'WARNING') as logs:
+            process_qsos(io.StringIO('20m cw YY1YYY\n'), self.file, 'XX1XXX', 'JO31le', 'Tester', True,
+                         contest_id='TEST')
+        self.assertIn('DUPE YY1YYY', '\n'.join(logs.output))
+        self.assertEqual(2, len(adi.load(self.file)['RECORDS']))
+
+    def test_40_interrupted(self):
+        evaluate_qso = __main__.evaluate_qso
+
+        def interrupt(cc, qso):
+            if qso == ['YY9YYY']:
+                raise KeyboardInterrupt()
+            evaluate_qso(cc, qso)
+
+        qsos = [[f'YY{i}YYY', '20m', 's'] for i in range(9)] + [['YY9YYY']] + [['ZZ1ZZZ']] * 10
+        with mock.patch.object(__main__, 'evaluate_qso', interrupt):
+            process_qsos(qsos, self.file, 'XX1XXX', 'JO31le', 'Tester')
+
+        # QSOs evaluated before the interrupt are written even if not passed on as group yet
+        self.assertListEqual([f'YY{i}YYY' for i in range(9)], [r['CALL'] for r in adi.load(self.file)['RECORDS']])
+
+    def test_50_stage_error(self):
+        with (mock.patch.object(ADIWriter, 'write', side_effect=OSError('Disk full')),
+              mock.patch.object(ADIWriter, 'close', side_effect=ValueError('I/O operation on closed file'))):
+            with self.assertRaises(OSError):
+                process_qsos([['YY1YYY', '20m', 's']], self.file, 'XX1XXX', 'JO31le', 'Tester')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import unittest
+
+from hamcc import hamcc
+
+
+class TestCaseQSOStack(unittest.TestCase):
+    def setUp(self):
+        self.cc = hamcc.CassiopeiaConsole('XX1XXX', 'AA11aa', 'Tester')
+        for call in ('YY1YYY', 'YY2YYY', 'YY3YYY'):
+            self.cc.evaluate_line(f'20m ssb {call}\n')
+
+    def test_10_record(self):
+        qso = self.cc.qsos[0]
+        self.assertIsInstance(qso, hamcc.QSO)
+        self.assertEqual('YY1YYY', qso['CALL'])
+        self.assertIs(dict, type(qso.to_adif_dict()))
+        self.assertDictEqual(qso, qso.to_adif_dict())
+        self.assertIsInstance(qso.copy(), hamcc.QSO)
+
+        # Finalised QSOs are independent of the input cache
+        self.cc.evaluate('YY4YYY')
+        self.assertEqual('YY3YYY', self.cc.qsos[2]['CALL'])
+
+    def test_20_append(self):
+        record = {'CALL': 'ZZ1ZZZ', 'QSO_DATE': '20240101', 'TIME_ON': '1200', 'BAND': '40m'}
+        self.cc.append_qso(record)
+        self.assertEqual(4, len(self.cc.qsos))
+        self.assertEqual('ZZ1ZZZ', self.cc.qsos[3]['CALL'])
+        self.assertEqual('', self.cc.qsos[3]['MODE'])
+        self.assertNotIn('MODE', record)
+        self.assertIn('ZZ1ZZZ worked on 2024-01-01 at 12:00', self.cc.evaluate('ZZ1ZZZ'))
+
+    def test_30_drain(self):
+        self.assertListEqual(['YY1YYY', 'YY2YYY', 'YY3YYY'], [q['CALL'] for q in self.cc.drain_qsos()])
+        self.assertFalse(self.cc.has_qsos())
+
+    def test_40_drain_interrupted(self):
+        drained = []
+        with self.assertRaises(OSError):
+            for q in self.cc.drain_qsos():
+                if len(drained) == 2:
+                    raise OSError('Disk full')
+                drained.append(q['CALL'])
+
+        self.assertListEqual(['YY1YYY', 'YY2YYY'], drained)
+        self.assertListEqual(['YY3YYY'], [q['CALL'] for q in self.cc.qsos])
+
+    def test_50_delete(self):
+        self.cc.load_prev()
+        self.assertEqual('YY3YYY', self.cc.current_qso['CALL'])
+        self.cc.load_prev()
+        self.assertEqual(1, self.cc.del_selected())
+        self.assertListEqual(['YY1YYY', 'YY3YYY'], [q['CALL'] for q in self.cc.qsos])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import unittest
+
+from hamcc import hamcc
+from hamcc.rate import RateMeter, qso_minute
+
+NOW = qso_minute({'QSO_DATE': '20240101', 'TIME_ON': '1200'})
+
+
+def qso(date: str, time: str) -> dict[str, str]:
+    return {'CALL': 'YY1YYY', 'QSO_DATE': date, 'TIME_ON': time}
+
+
+class TestCaseRateMeter(unittest.TestCase):
+    def test_10_minute(self):
+        self.assertEqual(1704110400 // 60, NOW)
+        self.assertEqual(NOW + 1, qso_minute(qso('20240101', '120130')))
+        self.assertEqual(NOW, qso_minute(qso('20240101*', '1200*')))
+        self.assertIsNone(qso_minute(qso('2024', '1200')))
+        self.assertIsNone(qso_minute({}))
+
+    def test_20_rates(self):
+        meter = RateMeter()
+        for t in ('1200', '1155', '1151', '1150', '1130', '1101', '1100', '1030'):
+            meter.add(qso('20240101', t), NOW)
+        meter.add(qso('20240101', '1201'), NOW)  # Future
+        meter.add(qso('20231201', '1200'), NOW)  # Too old
+
+        self.assertEqual(3, meter.count(10, NOW))
+        self.assertEqual(6, meter.count(60, NOW))
+        self.assertTupleEqual((18, 6, 6), meter.rates(NOW))
+
+        # Time goes by
+        self.assertTupleEqual((0, 5, 6), meter.rates(NOW + 10))
+        self.assertTupleEqual((0, 0, 6), meter.rates(NOW + 60))
+
+    def test_30_backfill(self):
+        meter = RateMeter()
+        meter.add(qso('20240101', '1159'), NOW)
+        for i in range(10):
+            meter.add(qso('20240101', f'09{i:02d}'), NOW)
+        self.assertTupleEqual((6, 1, 10), meter.rates(NOW))
+
+    def test_40_remove(self):
+        meter = RateMeter()
+        for t in ('1200', '1159', '0900'):
+            meter.add(qso('20240101', t), NOW)
+        meter.remove(qso('20240101', '1200'), NOW)
+        self.assertTupleEqual((6, 1, 1), meter.rates(NOW))
+        meter.remove(qso('20240101', '1200'), NOW)  # Not counted anymore
+        self.assertTupleEqual((6, 1, 1), meter.rates(NOW))
+        meter.remove(qso('20240101', '1159'), NOW)
+        meter.remove(qso('20240101', '0900'), NOW)
+        self.assertTupleEqual((0, 0, 0), meter.rates(NOW))
+
+
+class TestCaseRates(unittest.TestCase):
+    def test_10_console(self):
+        cc = hamcc.CassiopeiaConsole('XX1XXX', 'AA11aa', 'Tester')
+        date, time = hamcc.get_cur_adif_dt()
+        cc.evaluate_line('20m ssb YY1YYY\nYY2YYY\n')
+        cc.evaluate_line('20200101d 1200t YY3YYY\n')
+        self.assertTupleEqual((12, 2, 2), cc.rates())
+
+        cc.load_prev()
+        cc.load_prev()
+        cc.del_selected()
+        self.assertTupleEqual((6, 1, 1), cc.rates())
+
+        cc.add_logged([{'CALL': 'YY4YYY', 'QSO_DATE': date, 'TIME_ON': time}])
+        self.assertTupleEqual((12, 2, 2), cc.rates())
+
+
+if __name__ == '__main__':
+    unittest.main()
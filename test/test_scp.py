@@ -0,0 +1,80 @@
+import os
+import unittest
+import tempfile
+
+from hamcc import hamcc
+from hamcc.scp import ScpIndex, read_scp
+
+SCP = '# Comment\ndf1asc\nDL1ABC\nDF1ABC\nW1AW\n\nK1ABC\nDF1ASC\nAB1C\n'
+
+
+class TestCaseScpIndex(unittest.TestCase):
+    def setUp(self):
+        fd, self.file = tempfile.mkstemp(suffix='.scp')
+        with os.fdopen(fd, 'w') as f:
+            f.write(SCP)
+        self.index = ScpIndex.load(self.file)
+
+    def tearDown(self):
+        self.index.close()
+        os.remove(self.file)
+        if os.path.isfile(self.file + '.idx'):
+            os.remove(self.file + '.idx')
+
+    def test_10_read(self):
+        self.assertListEqual(['AB1C', 'DF1ABC', 'DF1ASC', 'DL1ABC', 'K1ABC', 'W1AW'], read_scp(self.file))
+
+    def test_20_containing(self):
+        self.assertEqual(6, len(self.index))
+        self.assertListEqual(['DF1ABC', 'DL1ABC', 'K1ABC'], self.index.containing('1abc'))
+        self.assertListEqual(['AB1C', 'DF1ABC', 'DL1ABC', 'K1ABC'], self.index.containing('AB'))
+        self.assertListEqual(['W1AW'], self.index.containing('AW'))
+        self.assertListEqual(['DF1ABC', 'DF1ASC'], self.index.containing('DF1'))
+        self.assertEqual(2, len(self.index.containing('1A', 2)))
+        self.assertListEqual([], self.index.containing('XYZ'))
+        self.assertListEqual([], self.index.containing(''))
+
+    def test_25_iter(self):
+        self.assertListEqual(read_scp(self.file), list(self.index))
+
+    def test_30_contains(self):
+        self.assertIn('df1asc', self.index)
+        self.assertIn('K1ABC', self.index)
+        self.assertNotIn('1ABC', self.index)
+        self.assertNotIn('DF1AS', self.index)
+
+    def test_40_cache(self):
+        self.assertTrue(os.path.isfile(self.file + '.idx'))
+        self.index.close()
+
+        self.index = ScpIndex.load(self.file)
+        self.assertListEqual(['DF1ABC', 'DL1ABC', 'K1ABC'], self.index.containing('1ABC'))
+
+        # A changed SCP file leads to a rebuild
+        self.index.close()
+        with open(self.file, 'a') as f:
+            f.write('XX1ABC\n')
+        self.index = ScpIndex.load(self.file)
+        self.assertIn('XX1ABC', self.index.containing('1ABC'))
+
+    def test_50_broken_cache(self):
+        self.index.close()
+        with open(self.file + '.idx', 'wb') as f:
+            f.write(b'HAMCCSCP broken')
+
+        self.index = ScpIndex.load(self.file)
+        self.assertIn('W1AW', self.index)
+
+    def test_60_console(self):
+        cc = hamcc.CassiopeiaConsole('XX1XXX', 'AA11aa', 'Tester', scp=self.index)
+        self.assertEqual('', cc.evaluate('W1AW'))
+        self.assertEqual('', cc.evaluate('DL/W1AW/P'))
+        self.assertEqual('Warning: W2AW not in SCP', cc.evaluate('W2AW'))
+
+        for c in '1ab':
+            cc.append_char(c)
+        self.assertListEqual(['DF1ABC', 'DL1ABC', 'K1ABC'], cc.scp_calls())
+
+
+if __name__ == '__main__':
+    unittest.main()
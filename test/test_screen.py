@@ -0,0 +1,56 @@
+import unittest
+
+from hamcc._console_ import Screen
+
+
+class FakeWindow:
+    def __init__(self):
+        self.painted = []
+        self.cursor = None
+        self.refreshs = 0
+
+    def addstr(self, y, x, text):
+        self.painted.append((y, text))
+
+    def clrtoeol(self):
+        pass
+
+    def move(self, y, x):
+        self.cursor = (y, x)
+
+    def refresh(self):
+        self.refreshs += 1
+
+
+class TestCaseScreen(unittest.TestCase):
+    def test_10_render_changed(self):
+        win = FakeWindow()
+        screen = Screen(win)
+        screen.set_line(0, 'Line 1')
+        screen.set_line(1, 'Line 2')
+        self.assertEqual(2, screen.render(1, 6))
+        self.assertListEqual([(0, 'Line 1'), (1, 'Line 2')], win.painted)
+        self.assertEqual((1, 6), win.cursor)
+
+        win.painted.clear()
+        screen.set_line(0, 'Line 1')
+        screen.set_line(1, 'Line 2a')
+        self.assertEqual(1, screen.render(1, 7))
+        self.assertListEqual([(1, 'Line 2a')], win.painted)
+
+        win.painted.clear()
+        self.assertEqual(0, screen.render(1, 7))
+        self.assertListEqual([], win.painted)
+        self.assertEqual(3, win.refreshs)
+
+    def test_20_invalidate(self):
+        win = FakeWindow()
+        screen = Screen(win)
+        screen.set_line(0, 'Line 1')
+        screen.render(0, 0)
+        screen.invalidate()
+        self.assertEqual(1, screen.render(0, 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
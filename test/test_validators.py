@@ -0,0 +1,72 @@
+import random
+import unittest
+
+from hamcc.hamcc import CassiopeiaConsole
+from hamcc.validators import is_call, split_call, is_rst, is_locator, split_qth
+
+SAMPLES = 20000
+
+
+def random_text(rnd: random.Random, alphabet: str, max_len: int) -> str:
+    return ''.join(rnd.choice(alphabet) for _ in range(rnd.randint(0, max_len)))
+
+
+def mutate(rnd: random.Random, txt: str, alphabet: str) -> str:
+    chars = list(txt)
+    for _ in range(rnd.randint(0, 2)):
+        op = rnd.randrange(3)
+        pos = rnd.randint(0, len(chars))
+        if op == 0:
+            chars.insert(pos, rnd.choice(alphabet))
+        elif chars and op == 1:
+            del chars[min(pos, len(chars) - 1)]
+        elif chars:
+            chars[min(pos, len(chars) - 1)] = rnd.choice(alphabet)
+    return ''.join(chars)
+
+
+class TestCaseValidators(unittest.TestCase):
+    """Property test: the validators accept exactly what the regular expressions match"""
+
+    def setUp(self):
+        self.rnd = random.Random(4711)
+
+    def test_10_call(self):
+        alphabet = 'aAmMpPrRtTxX019/ä\n'
+        valid = ['XX1XXX', 'X1X', 'xx1/YY11YYY/p', 'DL/XX1XXX', 'XX1XXX/MM', 'YY1YY/T', 'ABC/A1B2C3D']
+        for i in range(SAMPLES):
+            txt = mutate(self.rnd, self.rnd.choice(valid), alphabet) if i % 2 else random_text(self.rnd, alphabet, 16)
+            m = CassiopeiaConsole.REGEX_CALL.fullmatch(txt)
+            self.assertEqual(bool(m), is_call(txt), txt)
+            self.assertEqual(m.groups() if m else None, split_call(txt), txt)
+
+    def test_20_rst(self):
+        alphabet = '0159+-aAsSxXz '
+        for _ in range(SAMPLES):
+            txt = random_text(self.rnd, alphabet, 5)
+            self.assertEqual(bool(CassiopeiaConsole.REGEX_RSTFIELD.fullmatch(txt)), is_rst(txt), txt)
+
+    def test_30_locator(self):
+        alphabet = 'aArRsSxXyY0918'
+        for i in range(SAMPLES):
+            txt = mutate(self.rnd, 'JO31le56', alphabet) if i % 2 else random_text(self.rnd, alphabet, 9)
+            self.assertEqual(bool(CassiopeiaConsole.REGEX_LOCATOR.fullmatch(txt)), is_locator(txt), txt)
+
+    def test_40_qth(self):
+        alphabet = 'aArRxX09() _\n'
+        valid = ['Essen (JO31le)', '(JO31)', 'A  B  (JO31le56)', 'x(y) (AA00)', '  (RR99xx)']
+        for i in range(SAMPLES):
+            txt = mutate(self.rnd, self.rnd.choice(valid), alphabet) if i % 2 else random_text(self.rnd, alphabet, 16)
+            m = CassiopeiaConsole.REGEX_QTH.fullmatch(txt)
+            self.assertEqual(m.groups()[:2] if m else None, split_qth(txt), repr(txt))
+
+    def test_50_hostile(self):
+        self.assertFalse(is_call('A1' * 100000))
+        self.assertIsNone(split_qth(' ' * 100000 + 'x'))
+        self.assertIsNone(split_qth(' ' * 100000 + '(JO31)x'))
+        self.assertTupleEqual(('x', 'JO31'), split_qth('x' + ' ' * 100000 + '(JO31)'))
+        self.assertIsNone(CassiopeiaConsole('XX1XXX', 'JO31le', 'Tester').check_qth('(' * 100000))
+
+
+if __name__ == '__main__':
+    unittest.main()